@@ -1,26 +1,36 @@
 import streamlit as st
-import requests
-import re
-import spacy
-import networkx as nx
-import matplotlib.pyplot as plt
-from bs4 import BeautifulSoup
-from io import StringIO
 from collections import defaultdict
-from matplotlib import rcParams
-import matplotlib.colors as mcolors
 from dotenv import load_dotenv
+import logging
 import os
+import time
 from agno.agent import Agent
 from agno.models.groq import Groq
 from agno.tools.firecrawl import FirecrawlTools
+from mosdac.analytics import AnalyticsCache, analytics_key
+from mosdac.answers import MODEL as ANSWER_MODEL, TTL as ANSWER_TTL, AgentPool, AnswerCache, Assistant
+from mosdac.canonical import alias_version
+from mosdac.chat_history import PAGE_SIZE as CHAT_PAGE_SIZE, ChatHistory
+from mosdac.extraction_cache import ExtractionCache
+from mosdac.graph import build_graph
+from mosdac.graph_store import GraphStore
+from mosdac.jobs import CANCELLED, FAILED, JobCancelled, JobManager
+from mosdac.http_cache import TTL, HttpCache
+from mosdac.ingest import UnreadableUpload, preview as preview_upload
+from mosdac.kb_index import TripleIndex
+from mosdac.layout import LayoutCache, prune_graph
+from mosdac.metrics import METRICS, logger as metrics_logger, serve_metrics
+from mosdac.nlp import model_version
+from mosdac.pipeline import Pipeline, ProbeFailed
+from mosdac.render import RenderCache
+from mosdac.retrieval import PassageIndex
+from mosdac.single_flight import TIMEOUT as FLIGHT_TIMEOUT, FlightTimeout, SingleFlight
 
 # Load environment variables
 load_dotenv()
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
-
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+# Seconds between reruns while this session has a background job running
+POLL_SECONDS = float(os.getenv("MOSDAC_POLL_SECONDS", "0.5"))
 
 # Space Theme Configuration
 st.set_page_config(
@@ -211,197 +221,318 @@ st.markdown('<h1 class="main-title">🚀 MOSDAC Space Knowledge Explorer</h1>',
 st.markdown('<p class="subtitle">🌌 Navigate through the cosmos of knowledge • Extract relationships from the data universe</p>', unsafe_allow_html=True)
 
 # --------- Functions --------- #
-def clean_text(raw_html):
-    soup = BeautifulSoup(raw_html, "html.parser")
-    for script in soup(["script", "style"]):
-        script.decompose()
-    text = soup.get_text(separator=" ")
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^a-zA-Z0-9.,:;\-\s]", "", text)
-    return text
-
-def extract_entities_relations(text):
-    doc = nlp(text)
-    entity_pairs = []
-    triples = []
-    for sent in doc.sents:
-        ent_text = [ent.text.strip() for ent in sent.ents if ent.label_ in ("ORG", "PERSON", "GPE", "LOC", "PRODUCT", "EVENT")]
-        for i in range(len(ent_text)):
-            for j in range(i+1, len(ent_text)):
-                entity_pairs.append((ent_text[i], ent_text[j]))
-
-        root = [t for t in sent if t.dep_ == "ROOT"]
-        if root:
-            verb = root[0]
-            subj = [w.text for w in verb.lefts if w.dep_ in ("nsubj", "nsubjpass")]
-            obj = [w.text for w in verb.rights if w.dep_ in ("dobj", "pobj", "attr")]
-            if subj and obj:
-                triples.append((subj[0], verb.lemma_, obj[0]))
-
-    return list(set(entity_pairs)), list(set(triples))
-
-def build_graph(entity_pairs, triples):
-    G = nx.DiGraph()
-    for a, b in entity_pairs:
-        G.add_node(a)
-        G.add_node(b)
-        G.add_edge(a, b, label="related")
-    for a, rel, b in triples:
-        G.add_node(a)
-        G.add_node(b)
-        G.add_edge(a, b, label=rel)
-    return G
+@st.cache_resource
+def get_extraction_cache():
+    return ExtractionCache(model_version())
+
+@st.cache_resource
+def get_layout_cache():
+    return LayoutCache()
+
+@st.cache_resource
+def get_render_cache():
+    return RenderCache()
+
+@st.cache_resource
+def get_analytics_cache():
+    return AnalyticsCache()
+
+@st.cache_resource
+def get_graph_store():
+    return GraphStore()
+
+@st.cache_resource
+def get_single_flight():
+    # Identical probes and questions from different sessions share one computation
+    return SingleFlight(timeout=float(os.getenv("MOSDAC_FLIGHT_TIMEOUT", FLIGHT_TIMEOUT)), retry=(JobCancelled,))
+
+@st.cache_resource
+def get_assistant():
+    # One pool of agents and one answer cache per process, shared by every session
+    agents = AgentPool(lambda: Agent(
+        name="CosmicFirecrawlAgent",
+        model=Groq(ANSWER_MODEL),
+        tools=[FirecrawlTools(api_key=FIRECRAWL_API_KEY)]
+    ))
+    return Assistant(agents, AnswerCache(ttl=float(os.getenv("MOSDAC_ANSWER_TTL", ANSWER_TTL))), model=ANSWER_MODEL,
+                     single_flight=get_single_flight())
+
+@st.cache_resource
+def get_http_cache():
+    # Cached analyses hold canonical names, so a changed alias table invalidates them too.
+    return HttpCache(f"{model_version()}/{alias_version()}", ttl=float(os.getenv("MOSDAC_HTTP_TTL", TTL)))
+
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+@st.cache_resource
+def start_metrics_export():
+    # Prometheus endpoint and JSON-lines log, once per process and only when configured
+    port = os.getenv("MOSDAC_METRICS_PORT")
+    server = serve_metrics(int(port)) if port else None
+    log_path = os.getenv("MOSDAC_METRICS_LOG")
+    if log_path:
+        handler = logging.FileHandler(log_path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        metrics_logger.addHandler(handler)
+        metrics_logger.setLevel(logging.INFO)
+    return server
+
+start_metrics_export()
+
+@st.cache_resource
+def get_pipeline():
+    # Job threads have no Streamlit context, so they get the shared caches from here
+    return Pipeline(
+        extraction_cache=get_extraction_cache(),
+        http_cache=get_http_cache(),
+        graph_store=get_graph_store(),
+        layout_cache=get_layout_cache(),
+        render_cache=get_render_cache(),
+        analytics_cache=get_analytics_cache(),
+        single_flight=get_single_flight(),
+    )
 
 def draw_space_graph(G):
-    # Professional dashboard-style graph visualization
-    plt.style.use('default')
-    rcParams["figure.figsize"] = 16, 10
-    
-    fig, ax = plt.subplots(facecolor='#f8f9fa')
-    ax.set_facecolor('#f8f9fa')
-    
-    # Use a more spread out layout
-    pos = nx.spring_layout(G, k=2, iterations=100, seed=42)
-    edge_labels = nx.get_edge_attributes(G, 'label')
-    
-    # Professional color palette similar to the dashboard
-    entity_colors = {
-        'SATELLITE': '#4A90E2',    # Blue for satellites
-        'LOCATION': '#F5A623',     # Orange for locations  
-        'OCEAN': '#7ED321',        # Green for ocean-related
-        'WEATHER': '#BD10E0',      # Purple for weather
-        'TEMPERATURE': '#FF6B6B',  # Red for temperature
-        'DEFAULT': '#50E3C2'       # Teal for others
-    }
-    
-    # Categorize nodes based on keywords
-    def get_node_color(node_name):
-        node_lower = node_name.lower()
-        if any(word in node_lower for word in ['satellite', 'insat', 'scatsat', 'oceansat']):
-            return entity_colors['SATELLITE']
-        elif any(word in node_lower for word in ['ocean', 'sea', 'bay', 'arabian']):
-            return entity_colors['OCEAN']
-        elif any(word in node_lower for word in ['temperature', 'data']):
-            return entity_colors['TEMPERATURE']
-        elif any(word in node_lower for word in ['weather', 'wind', 'forecast']):
-            return entity_colors['WEATHER']
-        elif any(word in node_lower for word in ['bengal', 'indian', 'coast']):
-            return entity_colors['LOCATION']
+    # Only lay out and draw a readable subgraph; positions are reused across reruns
+    with METRICS.stage("draw") as span:
+        total_nodes = G.number_of_nodes()
+        G = prune_graph(G, scores=get_analytics_cache().get(G).pagerank)
+        pos = get_layout_cache().positions(G)
+
+        # Identical graphs are served from the shared image cache instead of re-plotting
+        st.image(get_render_cache().render(G, pos), use_container_width=True)
+        span.add(nodes=G.number_of_nodes(), edges=G.number_of_edges())
+    if G.number_of_nodes() < total_nodes:
+        st.caption(f"🔭 Showing {G.number_of_nodes()} nodes for {total_nodes} entities • leaf clusters folded, most central entities kept")
+
+def remember_analysis(pairs, triples, passages):
+    # Index once per analysis so chat lookups don't rescan every triple
+    st.session_state.current_triples = triples
+    st.session_state.current_graph = build_graph(pairs, triples)
+    # Hashed once here and kept on the graph, so analytics lookups on reruns don't re-sort every edge
+    analytics_key(st.session_state.current_graph)
+    st.session_state.triple_index = TripleIndex(triples)
+    st.session_state.passage_index = PassageIndex(passages)
+
+def render_analysis(pairs, triples):
+    # Display metrics in space theme
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>🌟 {len(pairs)}</h3>
+            <p>Entity Pairs Discovered</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>🔗 {len(triples)}</h3>
+            <p>Relationship Triples</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>📡 {len(set([s for s, r, o in triples] + [o for s, r, o in triples]))}</h3>
+            <p>Unique Entities</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    if pairs or triples:
+        st.markdown("### 🌌 Knowledge Constellation Visualization")
+        # Built once by remember_analysis; reruns reuse it instead of rebuilding
+        G = st.session_state.current_graph
+        draw_space_graph(G)
+        analytics = get_analytics_cache().get(G)
+        with st.expander("🏆 Most Central Entities", expanded=False):
+            st.dataframe([
+                {
+                    "Entity": node,
+                    "Category": G.nodes[node].get("category"),
+                    "PageRank": round(analytics.pagerank[node], 4),
+                    "Degree": analytics.degree[node],
+                    "Community": analytics.community_of.get(node),
+                }
+                for node in analytics.top()
+            ], use_container_width=True, hide_index=True)
+            st.caption(f"🌌 {len(analytics.communities)} communities detected")
+
+    if triples:
+        st.markdown("### 🔮 Cosmic Relationship Patterns")
+        with st.expander("🌟 Explore Discovered Relationships", expanded=True):
+            for i, (s, r, o) in enumerate(triples[:10]):
+                st.markdown(f"""
+                <div class="chat-message">
+                    <strong>🌠 {s}</strong> — <em style="color: #00d4ff;">{r}</em> → <strong>🌟 {o}</strong>
+                </div>
+                """, unsafe_allow_html=True)
+
+def describe_graph_query(analytics, query):
+    # Relationship questions answered straight from the cached graph analytics, without an LLM call
+    question = analytics.parse_query(query)
+    if question is None:
+        return None
+    start = time.perf_counter()
+    entity = question.entities[0] if question.entities else None
+    if question.kind == "path":
+        source, target = question.entities
+        steps = analytics.shortest_path(source, target)
+        if steps is None:
+            response = f"🌌 No chain of connections links **{source}** and **{target}** in the current constellation."
         else:
-            return entity_colors['DEFAULT']
-    
-    # Create node colors
-    node_colors = [get_node_color(node) for node in G.nodes()]
-    
-    # Draw nodes with professional styling
-    nx.draw_networkx_nodes(G, pos, 
-                          node_color=node_colors,
-                          node_size=1500, 
-                          alpha=0.9, 
-                          linewidths=2,
-                          edgecolors='white',
-                          ax=ax)
-    
-    # Add subtle glow effect
-    nx.draw_networkx_nodes(G, pos, 
-                          node_color=node_colors,
-                          node_size=1800, 
-                          alpha=0.3, 
-                          ax=ax)
-    
-    # Draw labels with better positioning
-    labels = {}
-    for node in G.nodes():
-        # Truncate long labels
-        if len(node) > 15:
-            labels[node] = node[:12] + "..."
+            response = f"🛰️ **{source}** reaches **{target}** in {len(steps)} hop{'s' if len(steps) > 1 else ''}:\n\n" + "\n".join(
+                f"🌠 **{a}** — *{label}* → **{b}**" if forward else f"🌠 **{a}** ← *{label}* — **{b}**"
+                for a, label, b, forward in steps
+            )
+    elif question.kind == "neighbourhood":
+        distances = analytics.neighbourhood(entity, question.hops)
+        if not distances:
+            response = f"🌌 **{entity}** has no connections in the current constellation."
         else:
-            labels[node] = node
-    
-    nx.draw_networkx_labels(G, pos, 
-                           labels=labels,
-                           font_size=9, 
-                           font_color="#2c3e50", 
-                           font_weight="bold",
-                           ax=ax)
-    
-    # Draw edges with professional styling
-    nx.draw_networkx_edges(G, pos, 
-                          edge_color="#bdc3c7", 
-                          width=1.5, 
-                          alpha=0.6,
-                          ax=ax)
-    
-    # Draw edge labels with better styling
-    if edge_labels:
-        # Filter out generic labels
-        filtered_labels = {k: v for k, v in edge_labels.items() if v not in ['related', 'be', 'have']}
-        if filtered_labels:
-            nx.draw_networkx_edge_labels(G, pos, 
-                                       edge_labels=filtered_labels, 
-                                       font_color="#34495e", 
-                                       font_size=7,
-                                       bbox=dict(boxstyle="round,pad=0.2", 
-                                               facecolor="white", 
-                                               edgecolor="#bdc3c7", 
-                                               alpha=0.8),
-                                       ax=ax)
-    
-    # Add title and clean up
-    ax.set_title("🌌 Knowledge Graph - Entity Relationships", 
-                color="#2c3e50", fontsize=14, fontweight="bold", pad=20)
-    ax.axis('off')
-    
-    # Add legend
-    legend_elements = [
-        plt.Line2D([0], [0], marker='o', color='w', 
-                  markerfacecolor=entity_colors['SATELLITE'], markersize=10, 
-                  label='Satellites'),
-        plt.Line2D([0], [0], marker='o', color='w', 
-                  markerfacecolor=entity_colors['OCEAN'], markersize=10, 
-                  label='Ocean/Sea'),
-        plt.Line2D([0], [0], marker='o', color='w', 
-                  markerfacecolor=entity_colors['LOCATION'], markersize=10, 
-                  label='Locations'),
-        plt.Line2D([0], [0], marker='o', color='w', 
-                  markerfacecolor=entity_colors['WEATHER'], markersize=10, 
-                  label='Weather'),
-        plt.Line2D([0], [0], marker='o', color='w', 
-                  markerfacecolor=entity_colors['TEMPERATURE'], markersize=10, 
-                  label='Temperature/Data'),
-        plt.Line2D([0], [0], marker='o', color='w', 
-                  markerfacecolor=entity_colors['DEFAULT'], markersize=10, 
-                  label='Other')
-    ]
-    
-    ax.legend(handles=legend_elements, loc='upper right', 
-             bbox_to_anchor=(1.0, 1.0), frameon=True, 
-             fancybox=True, shadow=True, ncol=1)
-    
-    plt.tight_layout()
-    st.pyplot(fig)
+            closest = analytics.top(15, distances)
+            response = f"🔭 {len(distances)} entities within {question.hops} hop{'s' if question.hops > 1 else ''} of **{entity}**, most central first:\n\n" + "\n".join(
+                f"🌟 **{node}** • {distances[node]} hop{'s' if distances[node] > 1 else ''} away" for node in closest
+            )
+    elif question.kind == "community":
+        members = analytics.communities[analytics.community_of[entity]]
+        response = f"🌌 **{entity}** belongs to a community of {len(members)} entities. Its most central members:\n\n" + "\n".join(
+            f"🌟 **{node}**" for node in analytics.top(15, members)
+        )
+    elif question.kind == "communities":
+        response = f"🌌 {len(analytics.communities)} communities in the current constellation. The largest:\n\n" + "\n".join(
+            f"{index + 1}. {len(members)} entities • " + ", ".join(f"**{node}**" for node in analytics.top(5, members))
+            for index, members in enumerate(analytics.communities[:5])
+        )
+    else:
+        response = "🏆 Most central entities in the current constellation:\n\n" + "\n".join(
+            f"{rank}. **{node}** • PageRank {analytics.pagerank[node]:.3f}" for rank, node in enumerate(analytics.top(), 1)
+        )
+    return response + f"\n\n*⚡ Answered from the knowledge graph in {(time.perf_counter() - start) * 1000:.1f} ms*"
+
+def firecrawl_web_search(assistant, query, url=None, refresh=False, on_token=None, check=None):
+    """Simple Firecrawl-powered web search and analysis, answered from cache when asked before.
 
-def firecrawl_web_search(query, url=None):
-    """Simple Firecrawl-powered web search and analysis"""
+    ``assistant`` is resolved on the script thread, since this runs in a job.
+    Returns ``(answer, latency)``; latency is None when no answer was produced.
+    """
     try:
         if not FIRECRAWL_API_KEY:
-            return "🚨 Firecrawl API key not configured. Please set FIRECRAWL_API_KEY in your environment."
+            return "🚨 Firecrawl API key not configured. Please set FIRECRAWL_API_KEY in your environment.", None
         
-        firecrawl_agent = Agent(
-            name="CosmicFirecrawlAgent",
-            model=Groq("llama3-8b-8192"),
-            tools=[FirecrawlTools(api_key=FIRECRAWL_API_KEY)]
-        )
-        
-        if url:
-            firecrawl_query = f"Extract and analyze information from {url} related to: {query}"
-        else:
-            firecrawl_query = f"Search the web and analyze information about: {query}"
-        
-        output = firecrawl_agent.run(firecrawl_query)
-        return output.content
+        return assistant.ask(query, url, refresh=refresh, on_token=on_token, check=check)
+    except JobCancelled:
+        raise
     except Exception as e:
-        return f"🚨 Deep space probe encountered an anomaly: {str(e)}"
+        return f"🚨 Deep space probe encountered an anomaly: {str(e)}", None
+
+STAGE_LABELS = {
+    "queued": "⏳ Waiting for a free probe...",
+    "fetching": "🛰️ Probe scanning deep space",
+    "parsing": "🔬 Scanning for cosmic relationships",
+    "graphing": "🌌 Charting the constellation",
+}
+
+def current_job(name):
+    job_id = st.session_state.get(name)
+    return get_job_manager().get(job_id) if job_id else None
+
+def start_analysis(kind, fn, *args, **kwargs):
+    # One analysis per session: a new launch recalls the previous probe
+    previous = current_job("analysis_job")
+    if previous and not previous.finished:
+        previous.cancel()
+    st.session_state.analysis_job = get_job_manager().submit(kind, fn, *args, **kwargs).id
+
+def show_analysis_job(kinds):
+    # Progress while the job runs; results stay attached to the session across reruns
+    job = current_job("analysis_job")
+    if job is None or job.kind not in kinds:
+        return
+    if not job.finished:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            label = STAGE_LABELS.get(job.stage, job.stage)
+            st.progress(job.progress or 0.0, text=f"{label} • {job.detail}" if job.detail else label)
+        with col2:
+            if st.button("🛑 Recall Probe", key="cancel_analysis", use_container_width=True):
+                job.cancel()
+        return
+    if job.status == CANCELLED:
+        st.warning("🛑 Probe recalled before completing its mission")
+        return
+    if job.status == FAILED:
+        if isinstance(job.error, ProbeFailed):
+            st.error("🚨 Probe failed to establish connection with target coordinates")
+        elif isinstance(job.error, FlightTimeout):
+            st.error("🚨 Another session's identical probe is still in flight; try again once it lands")
+        elif isinstance(job.error, UnreadableUpload):
+            st.error(f"🚨 Cosmic data bundle could not be unpacked: {job.error.reason}")
+        else:
+            st.error(f"🚨 Space-time anomaly detected: {str(job.error)}")
+        return
+
+    analysis = job.result
+    if st.session_state.get("remembered_job") != job.id:
+        remember_analysis(analysis.pairs, analysis.triples, analysis.passages)
+        st.session_state.remembered_job = job.id
+
+    if job.kind == "crawl":
+        failed = [page for page in analysis.pages if page.error]
+        st.success(f"🎯 Probe fleet scanned {len(analysis.pages) - len(failed)} of {len(analysis.pages)} pages")
+        if failed:
+            with st.expander(f"🚨 {len(failed)} pages could not be scanned", expanded=False):
+                for page in failed:
+                    st.markdown(f"- {page.url}: {page.error}")
+    elif job.kind == "upload" and analysis.pages:
+        st.success(f"🎯 Scanned {len(analysis.pages)} cosmic data files from {analysis.source}")
+    elif job.kind == "probe":
+        st.markdown("### 🔍 Cosmic Data Intercepted")
+        cache_stats = get_http_cache().stats()
+        st.caption(
+            f"🗄️ Page cache: {analysis.outcome} • {cache_stats['hits']} hits, "
+            f"{cache_stats['revalidated']} revalidated, {cache_stats['misses']} misses"
+        )
+        with st.expander("📊 View Raw Cosmic Data (First 500 words)", expanded=False):
+            st.markdown(f"""
+            <div class="chat-message">
+            {" ".join(analysis.text.split()[:500])}...
+            </div>
+            """, unsafe_allow_html=True)
+
+    render_analysis(analysis.pairs, analysis.triples)
+
+def start_chat(query, url, refresh, stream):
+    # Answers are produced in the background; streamed pieces collect in job.partial.
+    # Cached resources are looked up here, not from the job thread.
+    assistant = get_assistant()
+    def ask(job):
+        job.report("asking")
+        def on_token(piece):
+            job.check()
+            job.partial.append(piece)
+        return firecrawl_web_search(assistant, query, url, refresh=refresh, on_token=on_token if stream else None, check=job.check)
+    st.session_state.chat_job = get_job_manager().submit("chat", ask).id
+
+def collect_chat_job():
+    # Move a finished answer into the conversation log
+    job = current_job("chat_job")
+    if job is None or not job.finished:
+        return
+    del st.session_state.chat_job
+    if job.status == CANCELLED:
+        st.session_state.chat_history.append("bot", "🛑 Probe recalled before it could answer.", "bot")
+    elif job.status == FAILED:
+        st.session_state.chat_history.append("bot", f"🚨 Deep space probe encountered an anomaly: {str(job.error)}", "bot")
+    else:
+        response, latency = job.result
+        st.session_state.chat_history.append("bot", response, "url")
+        if latency is not None:
+            st.session_state.last_latency = latency
 
 # --------- Streamlit UI --------- #
 st.markdown("### 🛸 Mission Control Panel")
@@ -409,9 +540,14 @@ st.markdown("*Launch your exploration by uploading cosmic data or entering a ste
 
 # Initialize session state for chat history
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+    # Older turns spill to disk so long conversations keep a bounded footprint
+    st.session_state.chat_history = ChatHistory()
+    st.session_state.chat_page = 0
 if 'current_triples' not in st.session_state:
     st.session_state.current_triples = []
+    st.session_state.current_graph = None
+    st.session_state.triple_index = TripleIndex([])
+    st.session_state.passage_index = PassageIndex([])
 
 tabs = st.tabs(["🌌 Knowledge Constellation", "💬 Cosmic Chat & Firecrawl"])
 
@@ -429,148 +565,108 @@ with tabs[0]:
         </div>
         """, unsafe_allow_html=True)
 
-    raw_text = ""
+    file = None
 
     if option == "📡 Upload Cosmic Data":
         st.markdown("### 🛸 Data Upload Bay")
-        file = st.file_uploader("Drop your cosmic data files here", type=["txt", "html"], help="Upload HTML or text files from MOSDAC")
+        file = st.file_uploader(
+            "Drop your cosmic data files here",
+            type=["txt", "html", "htm", "zip", "gz", "tgz", "tar"],
+            help="Upload HTML or text files from MOSDAC, or a .zip, .tar.gz or .gz bundle of them",
+        )
         if file:
-            stringio = StringIO(file.getvalue().decode("utf-8"))
-            raw_text = stringio.read()
             st.success("🎯 Cosmic data successfully captured!")
 
     elif option == "🌐 Stellar URL Probe":
         st.markdown("### 🔭 Deep Space URL Scanner")
         url = st.text_input("🌍 Enter cosmic coordinates (URL)", "https://www.mosdac.gov.in", help="Enter a MOSDAC URL to explore")
         
+        crawl_section = st.checkbox("🕸️ Crawl linked pages in the same site section", help="Follow same-site links from this URL and merge every page into one constellation")
+        if crawl_section:
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col1:
+                crawl_depth = st.number_input("🔗 Link depth", min_value=1, max_value=5, value=1)
+            with col2:
+                crawl_pages = st.number_input("📄 Page limit", min_value=1, max_value=500, value=25)
+            with col3:
+                crawl_sitemap = st.checkbox("🗺️ Seed from sitemap.xml")
+
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
             fetch_clicked = st.button("🚀 Launch Probe", use_container_width=True)
 
-        if url and fetch_clicked:
-            try:
-                with st.spinner("🛰️ Probe scanning deep space..."):
-                    headers = {"User-Agent": "Mozilla/5.0 (Space-Explorer/1.0)"}
-                    response = requests.get(url, headers=headers, timeout=10)
-                    
-                if response.status_code == 200:
-                    raw_text = clean_text(response.text)
-
-                    st.markdown("### 🔍 Cosmic Data Intercepted")
-                    with st.expander("📊 View Raw Cosmic Data (First 500 words)", expanded=False):
-                        st.markdown(f"""
-                        <div class="chat-message">
-                        {" ".join(raw_text.split()[:500])}...
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    with st.spinner("🧬 Analyzing cosmic patterns and relationships..."):
-                        pairs, triples = extract_entities_relations(raw_text)
-                        st.session_state.current_triples = triples
-                        
-                        # Display metrics in space theme
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>🌟 {len(pairs)}</h3>
-                                <p>Entity Pairs Discovered</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        with col2:
-                            st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>🔗 {len(triples)}</h3>
-                                <p>Relationship Triples</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        with col3:
-                            st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>📡 {len(set([s for s, r, o in triples] + [o for s, r, o in triples]))}</h3>
-                                <p>Unique Entities</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-
-                        if pairs or triples:
-                            st.markdown("### 🌌 Knowledge Constellation Visualization")
-                            G = build_graph(pairs, triples)
-                            draw_space_graph(G)
-
-                        if triples:
-                            st.markdown("### 🔮 Cosmic Relationship Patterns")
-                            with st.expander("🌟 Explore Discovered Relationships", expanded=True):
-                                for i, (s, r, o) in enumerate(triples[:10]):
-                                    st.markdown(f"""
-                                    <div class="chat-message">
-                                        <strong>🌠 {s}</strong> — <em style="color: #00d4ff;">{r}</em> → <strong>🌟 {o}</strong>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                else:
-                    st.error("🚨 Probe failed to establish connection with target coordinates")
-            except Exception as e:
-                st.error(f"🚨 Space-time anomaly detected: {str(e)}")
+        if url and fetch_clicked and crawl_section:
+            start_analysis(
+                "crawl",
+                get_pipeline().crawl,
+                url,
+                max_pages=int(crawl_pages),
+                max_depth=int(crawl_depth),
+                use_sitemap=crawl_sitemap,
+            )
+        elif url and fetch_clicked:
+            start_analysis("probe", get_pipeline().probe, url)
+
+        show_analysis_job(("crawl", "probe"))
 
     # File upload processing
-    if option == "📡 Upload Cosmic Data" and raw_text:
-        cleaned_text = clean_text(raw_text)
+    if option == "📡 Upload Cosmic Data" and file:
         st.markdown("### 🔍 Cosmic Data Analysis")
         
         with st.expander("📊 View Processed Cosmic Data", expanded=False):
+            # Only the first words are decoded and cleaned, once per uploaded file; the analysis streams the rest
+            cached_preview = st.session_state.get("upload_preview")
+            if cached_preview is not None and cached_preview[0] == file.file_id:
+                preview_text = cached_preview[1]
+            else:
+                file.seek(0)
+                try:
+                    preview_text = preview_upload(file, file.name)
+                except UnreadableUpload as error:
+                    preview_text = f"🚨 {error}"
+                st.session_state.upload_preview = (file.file_id, preview_text)
             st.markdown(f"""
             <div class="chat-message">
-            {" ".join(cleaned_text.split()[:500])}...
+            {preview_text}...
             </div>
             """, unsafe_allow_html=True)
 
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
             if st.button("🧬 Analyze Cosmic Patterns", use_container_width=True):
-                with st.spinner("🔬 Scanning for cosmic relationships..."):
-                    pairs, triples = extract_entities_relations(cleaned_text)
-                    st.session_state.current_triples = triples
-                    
-                    # Display metrics
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <h3>🌟 {len(pairs)}</h3>
-                            <p>Entity Pairs</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <h3>🔗 {len(triples)}</h3>
-                            <p>Relationships</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col3:
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <h3>📡 {len(set([s for s, r, o in triples] + [o for s, r, o in triples]))}</h3>
-                            <p>Unique Entities</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    if pairs or triples:
-                        st.markdown("### 🌌 Knowledge Constellation Map")
-                        G = build_graph(pairs, triples)
-                        draw_space_graph(G)
-
-                    if triples:
-                        st.markdown("### 🔮 Discovered Relationships")
-                        for s, r, o in triples[:10]:
-                            st.markdown(f"""
-                            <div class="chat-message">
-                                <strong>🌠 {s}</strong> — <em style="color: #00d4ff;">{r}</em> → <strong>🌟 {o}</strong>
-                            </div>
-                            """, unsafe_allow_html=True)
+                # The job reads this rerun's UploadedFile in place; later reruns get their own
+                file.seek(0)
+                start_analysis("upload", get_pipeline().analyze_upload, file, file.name)
+
+        show_analysis_job(("upload",))
+
+    # Everything explored so far, across sessions, loaded from the graph store on demand
+    st.markdown("### 🗄️ Cosmic Knowledge Archive")
+    store_stats = get_graph_store().stats()
+    st.caption(f"📚 {store_stats['nodes']} entities and {store_stats['edges']} links gathered from {store_stats['sources']} sources")
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        focus_entity = st.text_input("🎯 Focus entity", placeholder="e.g., INSAT-3DR (leave empty for the strongest links)")
+    with col2:
+        focus_hops = st.number_input("🔗 Hops", min_value=1, max_value=3, value=1)
+    with col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        archive_clicked = st.button("🗺️ Load Archive", use_container_width=True)
+
+    if archive_clicked:
+        seeds = [focus_entity] if focus_entity.strip() else None
+        G = get_graph_store().subgraph(seeds, hops=int(focus_hops))
+        if G.number_of_edges():
+            draw_space_graph(G)
+            if seeds:
+                with st.expander("🛰️ Sources mentioning this entity", expanded=False):
+                    for source, merged_at, count in get_graph_store().provenance(focus_entity):
+                        st.markdown(f"- {source} • {count} links • {time.strftime('%Y-%m-%d %H:%M', time.localtime(merged_at))}")
+                    surface_forms = get_graph_store().surface_forms(focus_entity)
+                    if len(surface_forms) > 1:
+                        st.caption("🔤 Also written as: " + ", ".join(f"{surface} ({count})" for surface, count in surface_forms))
+        else:
+            st.info("🌌 Nothing archived for these coordinates yet. Probe or upload some cosmic data first!")
 
 # --------- Enhanced Cosmic Chat Tab with Firecrawl --------- #
 with tabs[1]:
@@ -586,18 +682,46 @@ with tabs[1]:
     
     with col2:
         if st.button("🗑️ Clear Chat History", use_container_width=True):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
+            st.session_state.chat_page = 0
             st.rerun()
     
     # URL input for Firecrawl URL Analysis mode
     firecrawl_url = ""
     if chat_mode == "🌐 Firecrawl URL Analysis":
         firecrawl_url = st.text_input("🌍 Enter URL to analyze:", value="https://www.mosdac.gov.in")
+    force_refresh = False
+    stream_answers = False
+    if chat_mode != "🧠 Knowledge Base Chat":
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            stream_answers = st.checkbox("⚡ Stream answers", value=True, help="Show the answer word by word as the agent writes it")
+        with col2:
+            force_refresh = st.checkbox("🔄 Force fresh answer", help="Skip the answer cache and ask the Firecrawl agent again")
     
-    # Display chat history
-    if st.session_state.chat_history:
+    collect_chat_job()
+
+    # Display one page of the chat history, newest page first
+    history = st.session_state.chat_history
+    if history:
         st.markdown("### 📚 Cosmic Conversation Log")
-        for i, (role, message, msg_type) in enumerate(st.session_state.chat_history):
+        pages = -(-len(history) // CHAT_PAGE_SIZE)
+        page = min(st.session_state.chat_page, pages - 1)
+        end = len(history) - page * CHAT_PAGE_SIZE
+        start = max(0, end - CHAT_PAGE_SIZE)
+        if pages > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("⬆️ Earlier messages", disabled=page == pages - 1, use_container_width=True):
+                    st.session_state.chat_page = page + 1
+                    st.rerun()
+            with col2:
+                st.caption(f"📜 Messages {start + 1}–{end} of {len(history)}")
+            with col3:
+                if st.button("⬇️ Newer messages", disabled=page == 0, use_container_width=True):
+                    st.session_state.chat_page = page - 1
+                    st.rerun()
+        for role, message, msg_type in history.page(start, end - start):
             if role == "user":
                 st.markdown(f"""
                 <div class="chat-message user-message">
@@ -616,6 +740,23 @@ with tabs[1]:
                     <strong>🤖 Cosmic AI:</strong> {message}
                 </div>
                 """, unsafe_allow_html=True)
+    if 'last_latency' in st.session_state:
+        latency = st.session_state.last_latency
+        if latency.cached:
+            st.caption(f"⚡ Last answer served from cache in {latency.total:.2f} s")
+        else:
+            st.caption(f"⏱️ Last answer: first words after {latency.first_token:.1f} s • complete after {latency.total:.1f} s")
+    # A reply still being written is drawn where it will sit in the log
+    chat_job = current_job("chat_job")
+    if chat_job is not None:
+        reply = "".join(chat_job.partial)
+        st.markdown(f"""
+        <div class="chat-message url-message">
+            <strong>🌐 Firecrawl Analysis:</strong> {reply + "▌" if reply else "🛰️ Firecrawl probe searching the cosmic web..."}
+        </div>
+        """, unsafe_allow_html=True)
+        if st.button("🛑 Recall Probe", key="cancel_chat"):
+            chat_job.cancel()
     
     # Chat input
     if chat_mode == "🧠 Knowledge Base Chat":
@@ -632,45 +773,76 @@ with tabs[1]:
     with col1:
         if st.button("🚀 Send Message", use_container_width=True):
             if user_query:
-                # Add user message to chat history
-                st.session_state.chat_history.append(("user", user_query, "user"))
+                # Add user message to chat history and jump to the newest page
+                st.session_state.chat_history.append("user", user_query, "user")
+                st.session_state.chat_page = 0
                 
                 if chat_mode == "🧠 Knowledge Base Chat":
                     # Original knowledge base functionality
-                    if st.session_state.current_triples:
+                    graph = st.session_state.current_graph
+                    graph_response = describe_graph_query(get_analytics_cache().get(graph), user_query) if graph else None
+                    if graph_response:
+                        st.session_state.chat_history.append("bot", graph_response, "bot")
+                    elif st.session_state.current_triples or len(st.session_state.passage_index):
                         with st.spinner("🔍 Scanning cosmic knowledge database..."):
-                            answers = []
-                            for s, r, o in st.session_state.current_triples:
-                                q = user_query.lower()
-                                if s.lower() in q or o.lower() in q or r.lower() in q:
-                                    answers.append(f"🌠 **{s}** — *{r}* → **{o}**")
+                            matches = st.session_state.triple_index.search(user_query)
+                            answers = [f"🌠 **{s}** — *{r}* → **{o}**" for s, r, o in matches]
+                            passages = st.session_state.passage_index.search(user_query)
 
                             if answers:
                                 response = f"🧠 Found {len(answers)} cosmic connections:\n\n" + "\n".join(answers[:5])
                                 if len(answers) > 5:
                                     response += f"\n\n*...and {len(answers) - 5} more connections in the cosmic database*"
-                            else:
+                            elif not passages:
                                 response = "🌌 No direct matches found in the current cosmic knowledge base. Try exploring different cosmic coordinates or rephrasing your query."
+                            else:
+                                response = "🧠 No direct connections, but these cosmic records look relevant:"
+
+                            if passages:
+                                response += "\n\n📜 **Source passages:**\n\n" + "\n\n".join(
+                                    f"> {sentence}" + "".join(f"\n> 🌠 **{s}** — *{r}* → **{o}**" for s, r, o in sentence_triples)
+                                    for _, sentence, sentence_triples in passages
+                                )
                             
-                            st.session_state.chat_history.append(("bot", response, "bot"))
+                            st.session_state.chat_history.append("bot", response, "bot")
                     else:
                         response = "🚨 Please first explore some cosmic data in the Knowledge Constellation tab!"
-                        st.session_state.chat_history.append(("bot", response, "bot"))
+                        st.session_state.chat_history.append("bot", response, "bot")
                 
                 elif chat_mode == "🚀 Firecrawl Web Search":
-                    # Firecrawl web search
-                    with st.spinner("🛰️ Firecrawl probe searching the cosmic web..."):
-                        response = firecrawl_web_search(user_query)
-                        st.session_state.chat_history.append(("bot", response, "url"))
+                    # Firecrawl web search, answered in the background
+                    start_chat(user_query, None, force_refresh, stream_answers)
                 
                 elif chat_mode == "🌐 Firecrawl URL Analysis":
                     # Firecrawl URL analysis
                     if firecrawl_url:
-                        with st.spinner("🔍 Firecrawl probe analyzing cosmic coordinates..."):
-                            response = firecrawl_web_search(user_query, firecrawl_url)
-                            st.session_state.chat_history.append(("bot", response, "url"))
+                        start_chat(user_query, firecrawl_url, force_refresh, stream_answers)
                     else:
                         response = "🚨 Please enter a URL to analyze!"
-                        st.session_state.chat_history.append(("bot", response, "bot"))
+                        st.session_state.chat_history.append("bot", response, "bot")
                 
-                # Rerun to show new messages
\ No newline at end of file
+                # Rerun to show new messages
+                st.rerun()
+
+# Performance panel: per-stage timings and sizes across every session in this process
+with st.expander("⏱️ Performance Panel"):
+    summary = METRICS.summary()
+    if summary:
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+        st.caption("Recent stage runs, newest first")
+        st.dataframe(METRICS.records(50), use_container_width=True, hide_index=True)
+        st.download_button("📥 Export Prometheus metrics", METRICS.prometheus_text(),
+                           file_name="mosdac_metrics.prom", mime="text/plain")
+        flights = get_single_flight().stats()
+        st.caption(
+            f"🔗 Coalesced requests: {flights['shared']} joined {flights['led']} computations • "
+            f"{flights['in_flight']} in flight • {flights['timeouts']} timed out"
+        )
+    else:
+        st.info("🛰️ No stages timed yet. Launch a probe or ask a question to collect metrics.")
+    st.caption("Set MOSDAC_METRICS_PORT to serve /metrics, or MOSDAC_METRICS_LOG to append JSON records to a file")
+
+# Keep polling while this session has work in the background
+if any(job is not None and not job.finished for job in (current_job("analysis_job"), current_job("chat_job"))):
+    time.sleep(POLL_SECONDS)
+    st.rerun()
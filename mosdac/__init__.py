@@ -0,0 +1 @@
+"""Streamlit-free building blocks of the MOSDAC Space Knowledge Explorer."""
@@ -0,0 +1,217 @@
+"""Cached rankings, communities and path queries over knowledge graphs."""
+import hashlib
+import heapq
+import re
+import threading
+from collections import OrderedDict, deque, namedtuple
+from functools import cached_property
+
+import networkx as nx
+
+from mosdac.layout import graph_key
+from mosdac.metrics import METRICS
+
+CACHE_SIZE = 32
+MAX_HOPS = 3
+# Louvain is exact enough to be worth its cost up to this many nodes; label propagation beyond.
+LOUVAIN_MAX_NODES = 2_000
+TOP = 10
+
+# ``kind`` is "path", "neighbourhood", "community", "rank" or "communities".
+GraphQuery = namedtuple("GraphQuery", "kind entities hops")
+
+# Only questions about the graph itself are answered from it; ordinary questions that
+# happen to name entities ("What instruments do INSAT-3D and Oceansat-3 carry?",
+# "Which important products does MOSDAC offer?") go to the triple and passage lookup.
+_HOPS = re.compile(r"(\d+)[\s-]*hops?\b")
+_PATH_WORDS = re.compile(r"\b(?:between|path|route|chain|connect\w*|link\w*|relat\w*)\b")
+_NEIGHBOURHOOD_WORDS = re.compile(r"\b(?:neighbou?r\w*|connected to|linked to|hops?)\b")
+_GRAPH_NOUNS = r"(?:entit(?:y|ies)|nodes?|hubs?)"
+_RANK_WORDS = re.compile(
+    rf"\b(?:centrality|pagerank|most central|(?:most\s+)?(?:central|important|influential|connected|key|top)"
+    rf"\s+{_GRAPH_NOUNS}|rank(?:ing)?\s+(?:of\s+)?(?:the\s+)?{_GRAPH_NOUNS})\b"
+)
+_COMMUNITY_WORDS = re.compile(r"\b(?:communit\w*|clusters?)\b")
+
+
+def analytics_key(G):
+    """``graph_key`` plus edge labels and weights, which change paths and rankings.
+
+    Hashing sorts every edge, so the key is computed once per graph and
+    kept in ``G.graph["analytics_key"]`` with the node and edge counts
+    it was computed for; graphs are not modified once built. Copies and
+    subgraphs inherit the attribute, and the counts tell them apart.
+    """
+    size = (G.number_of_nodes(), G.number_of_edges())
+    stored = G.graph.get("analytics_key")
+    if stored is not None and stored[0] == size:
+        return stored[1]
+    digest = hashlib.sha1(graph_key(G).encode("ascii"))
+    for a, b, data in sorted(G.edges(data=True), key=lambda edge: (str(edge[0]), str(edge[1]))):
+        digest.update(f"{a}\0{b}\0{data.get('label')}\0{data.get('weight', 1)}\0".encode("utf-8"))
+    key = digest.hexdigest()
+    G.graph["analytics_key"] = (size, key)
+    return key
+
+
+class GraphAnalytics:
+    """Analytics of one version of a graph, computed on first use and kept.
+
+    Paths and neighbourhoods are answered by breadth-first search over an
+    undirected adjacency index that remembers each edge's label and
+    direction. PageRank and communities run on the undirected,
+    co-occurrence-weighted graph; communities come from Louvain on
+    graphs up to ``LOUVAIN_MAX_NODES`` and from near-linear label
+    propagation on larger ones.
+    """
+
+    def __init__(self, G):
+        self.graph = G
+        self.degree = dict(G.degree(weight="weight"))
+        # node -> {neighbour: (label, True if the edge points from node to neighbour)}
+        self.adjacency = {node: {} for node in G}
+        for a, b, data in G.edges(data=True):
+            label = data.get("label", "related")
+            self.adjacency[a][b] = (label, True)
+            self.adjacency[b].setdefault(a, (label, False))
+        self._names = {str(node).lower(): node for node in G}
+
+    @cached_property
+    def pagerank(self):
+        with METRICS.stage("analytics") as span:
+            undirected = self.graph.to_undirected(as_view=True)
+            try:
+                rank = nx.pagerank(undirected, weight="weight") if len(undirected) else {}
+            except nx.PowerIterationFailedConvergence:
+                total = sum(self.degree.values()) or 1
+                rank = {node: degree / total for node, degree in self.degree.items()}
+            span.add(nodes=len(rank))
+        return rank
+
+    @cached_property
+    def communities(self):
+        """Node sets, largest first."""
+        with METRICS.stage("analytics") as span:
+            undirected = nx.Graph(self.graph.to_undirected(as_view=True))
+            undirected.remove_edges_from(nx.selfloop_edges(undirected))
+            if len(undirected) <= LOUVAIN_MAX_NODES:
+                found = nx.community.louvain_communities(undirected, weight="weight", seed=42)
+            else:
+                found = list(nx.community.asyn_lpa_communities(undirected, weight="weight", seed=42))
+            span.add(communities=len(found))
+        return sorted(found, key=len, reverse=True)
+
+    @cached_property
+    def community_of(self):
+        return {node: index for index, members in enumerate(self.communities) for node in members}
+
+    @cached_property
+    def _mention_pattern(self):
+        # Longest names first, so "INSAT-3DR" wins over "INSAT-3D".
+        names = sorted(self._names, key=len, reverse=True)
+        if not names:
+            return None
+        return re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, names)) + r")(?!\w)", re.IGNORECASE)
+
+    def mentions(self, text):
+        """Nodes named in ``text``, in order of first mention."""
+        if self._mention_pattern is None:
+            return []
+        found = []
+        for match in self._mention_pattern.finditer(text):
+            node = self._names[match.group(0).lower()]
+            if node not in found:
+                found.append(node)
+        return found
+
+    def top(self, n=TOP, nodes=None):
+        """The ``n`` highest-PageRank nodes, of ``nodes`` if given."""
+        return heapq.nlargest(n, self.graph if nodes is None else nodes, key=self.pagerank.get)
+
+    def shortest_path(self, source, target):
+        """``[(a, label, b, forward), ...]`` steps from ``source`` to ``target``, or None if unconnected."""
+        if source not in self.adjacency or target not in self.adjacency:
+            return None
+        parents = {source: None}
+        queue = deque([source])
+        while queue and target not in parents:
+            node = queue.popleft()
+            for neighbour in self.adjacency[node]:
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    queue.append(neighbour)
+        if target not in parents:
+            return None
+        steps = []
+        node = target
+        while parents[node] is not None:
+            previous = parents[node]
+            label, forward = self.adjacency[previous][node]
+            steps.append((previous, label, node, forward))
+            node = previous
+        return steps[::-1]
+
+    def neighbourhood(self, node, hops=1):
+        """``{neighbour: distance}`` for every node within ``hops`` of ``node``."""
+        distances = {node: 0}
+        frontier = [node]
+        for hop in range(1, hops + 1):
+            reached = []
+            for current in frontier:
+                for neighbour in self.adjacency.get(current, ()):
+                    if neighbour not in distances:
+                        distances[neighbour] = hop
+                        reached.append(neighbour)
+            frontier = reached
+        del distances[node]
+        return distances
+
+    def parse_query(self, query):
+        """The ``GraphQuery`` a chat question asks for, or None if it isn't a graph question.
+
+        Naming entities is not enough: a path needs two entities and words
+        like "between", "connected" or "related", a ranking needs words
+        like "most central" or "key entities".
+        """
+        entities = self.mentions(query)
+        lower = query.lower()
+        if len(entities) >= 2 and _PATH_WORDS.search(lower):
+            return GraphQuery("path", entities[:2], None)
+        hops = _HOPS.search(lower)
+        if entities and (hops or _NEIGHBOURHOOD_WORDS.search(lower)):
+            return GraphQuery("neighbourhood", entities, min(max(int(hops.group(1)), 1) if hops else 1, MAX_HOPS))
+        if entities and _COMMUNITY_WORDS.search(lower):
+            return GraphQuery("community", entities, None)
+        if _RANK_WORDS.search(lower):
+            return GraphQuery("rank", entities, None)
+        if _COMMUNITY_WORDS.search(lower):
+            return GraphQuery("communities", entities, None)
+        return None
+
+
+class AnalyticsCache:
+    """LRU cache of ``GraphAnalytics`` keyed by ``analytics_key``.
+
+    An unchanged graph reuses its analytics; any change to its nodes,
+    edges, labels or weights gets a fresh entry.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, G):
+        key = analytics_key(G)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            analytics = self._entries[key] = GraphAnalytics(G)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analytics
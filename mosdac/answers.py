@@ -0,0 +1,230 @@
+"""Reused LLM agents and a disk-backed cache of their answers."""
+import hashlib
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+
+from mosdac.metrics import METRICS
+from mosdac.settings import cache_path
+
+MODEL = "llama3-8b-8192"
+# Seconds an answer is served from the cache; None keeps answers forever.
+TTL = 6 * 60 * 60
+MAX_ENTRIES = 2_000
+POOL_SIZE = 4
+LATENCY_HISTORY = 100
+
+# Seconds from the question to the first piece of the answer and to the
+# whole answer; equal when the answer isn't streamed.
+Latency = namedtuple("Latency", "first_token total cached")
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_query(query):
+    """Case-, whitespace- and trailing-punctuation-insensitive form of ``query``."""
+    return _TRAILING_PUNCTUATION.sub("", " ".join(query.lower().split()))
+
+
+def agent_prompt(query, url=None):
+    if url:
+        return f"Extract and analyze information from {url} related to: {query}"
+    return f"Search the web and analyze information about: {query}"
+
+
+class AgentPool:
+    """Agents built on first use and reused for later questions.
+
+    ``factory()`` builds one agent (model client plus tools). Agents keep
+    per-run state, so each is lent to one caller at a time; at most
+    ``size`` are ever built and further callers wait for a free one.
+    """
+
+    def __init__(self, factory, size=POOL_SIZE):
+        self.factory = factory
+        self.size = size
+        self.built = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def run(self, prompt):
+        agent = self._acquire()
+        try:
+            return agent.run(prompt).content
+        finally:
+            self._idle.put(agent)
+
+    def stream(self, prompt):
+        """Yield the answer's content pieces as the model produces them."""
+        agent = self._acquire()
+        try:
+            for chunk in agent.run(prompt, stream=True):
+                # Tool-call and status events carry no text.
+                content = getattr(chunk, "content", None)
+                if isinstance(content, str) and content:
+                    yield content
+        finally:
+            self._idle.put(agent)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self.built < self.size
+            if build:
+                self.built += 1
+        if not build:
+            return self._idle.get()
+        try:
+            return self.factory()
+        except Exception:
+            with self._lock:
+                self.built -= 1
+            raise
+
+
+class AnswerCache:
+    """SQLite cache of answers keyed by normalized query, URL and model.
+
+    Entries older than ``ttl`` are ignored and replaced on the next run;
+    past ``max_entries`` the least recently used are evicted. Shared
+    across Streamlit sessions behind one lock.
+    """
+
+    def __init__(self, path=None, ttl=TTL, max_entries=MAX_ENTRIES):
+        self.path = path or cache_path("answers.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key TEXT PRIMARY KEY, answer TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(query, url, model):
+        payload = f"{model}\0{url or ''}\0{normalize_query(query)}"
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, query, url, model):
+        key = self.key(query, url, model)
+        with self._lock:
+            row = self._conn.execute("SELECT answer, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row and (self.ttl is None or time.time() - row[1] < self.ttl):
+                self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        return None
+
+    def put(self, query, url, model, answer):
+        # An empty or missing answer is a failed run; the next ask should try again.
+        if not answer:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                (self.key(query, url, model), answer, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+class Assistant:
+    """Answers web questions through an ``AgentPool``, memoized in an ``AnswerCache``.
+
+    Only successful, non-empty answers are cached; exceptions propagate
+    to the caller. ``refresh=True`` skips the cached answer and replaces
+    it. The ``Latency`` of the most recent calls is kept in ``latencies``.
+
+    With a ``mosdac.single_flight.SingleFlight``, a question already
+    being answered for another caller (same normalized query, URL, model
+    and ``refresh``) waits for that answer instead of running an agent.
+    """
+
+    def __init__(self, agents, cache=None, model=MODEL, single_flight=None):
+        self.agents = agents
+        self.cache = cache
+        self.model = model
+        self.single_flight = single_flight
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+
+    def ask(self, query, url=None, refresh=False, on_token=None, check=None):
+        """Return ``(answer, latency)``.
+
+        With ``on_token``, the agent's answer is streamed and
+        ``on_token(piece)`` is called as each piece arrives; a cached
+        answer, or one shared from another caller's identical question,
+        arrives as a single piece. ``check()`` is called while waiting
+        for a shared answer and may raise to stop waiting.
+        """
+        start = time.perf_counter()
+        led = []
+
+        def answer_once():
+            led.append(True)
+            return self._answer(query, url, refresh, on_token)
+
+        if self.single_flight is None:
+            answer, cached, first_token = answer_once()
+        else:
+            key = ("answer", AnswerCache.key(query, url, self.model), refresh)
+            answer, cached, first_token = self.single_flight.run(key, answer_once, check=check)
+        if not led:
+            first_token = time.perf_counter()
+            if on_token:
+                on_token(answer)
+
+        end = time.perf_counter()
+        latency = Latency((first_token or end) - start, end - start, cached)
+        self.latencies.append(latency)
+        return answer, latency
+
+    def _answer(self, query, url, refresh, on_token):
+        """``(answer, cached, first_token)`` from the cache or an agent run."""
+        with METRICS.stage("firecrawl") as span:
+            answer = None
+            if self.cache is not None and not refresh:
+                answer = self.cache.get(query, url, self.model)
+            cached = answer is not None
+            first_token = None
+            if cached:
+                first_token = time.perf_counter()
+                if on_token:
+                    on_token(answer)
+            elif on_token is None:
+                answer = self.agents.run(agent_prompt(query, url))
+            else:
+                pieces = []
+                for piece in self.agents.stream(agent_prompt(query, url)):
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    pieces.append(piece)
+                    on_token(piece)
+                answer = "".join(pieces)
+            if not cached and self.cache is not None:
+                self.cache.put(query, url, self.model, answer)
+            span.add(chars=len(answer or ""), cached=int(cached))
+        return answer, cached, first_token
@@ -0,0 +1,254 @@
+"""Headless batch extraction over saved MOSDAC pages.
+
+Run with ``python -m mosdac.batch PATH_OR_GLOB... --output results.jsonl``.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from mosdac.cleaning import clean_text
+from mosdac.nlp import extract_entities_relations, load_nlp
+
+SUFFIXES = (".html", ".htm", ".txt")
+WORKERS = os.cpu_count() or 1
+# Files queued per worker; bounds memory however many files match.
+IN_FLIGHT = 4
+PARQUET_ROWS = 1_000
+
+
+def iter_input_files(patterns, suffixes=SUFFIXES):
+    """Files under each directory or matching each glob, once each, in a stable order."""
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = (
+                os.path.join(root, name)
+                for root, _, names in os.walk(pattern)
+                for name in names
+            )
+        else:
+            matches = glob.iglob(pattern, recursive=True)
+        for path in sorted(matches):
+            if path.lower().endswith(suffixes) and os.path.isfile(path) and path not in seen:
+                seen.add(path)
+                yield path
+
+
+def fingerprint(path):
+    """``(path, size, mtime_ns)``; a file is processed again once it changes."""
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def process_file(path):
+    """Clean and extract one file into a JSON-serializable record."""
+    _, size, mtime_ns = fingerprint(path)
+    record = {"path": path, "size": size, "mtime_ns": mtime_ns, "error": None, "pairs": [], "triples": [], "stats": None}
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as file:
+            raw = file.read().decode("utf-8", errors="replace")
+        cleaned = clean_text(raw)
+        passages = []
+        cooccurrence, triples = extract_entities_relations(cleaned, passages=passages)
+    except Exception as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+        return record
+
+    record["pairs"] = [{"a": a, "b": b, "count": count} for a, b, count in cooccurrence.weighted_pairs()]
+    record["triples"] = [{"subject": s, "relation": r, "object": o} for s, r, o in sorted(triples)]
+    record["stats"] = {
+        "chars": len(cleaned),
+        "sentences": len(passages),
+        "entities": len(cooccurrence.names),
+        "pairs": len(record["pairs"]),
+        "triples": len(record["triples"]),
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+    return record
+
+
+def _init_worker():
+    # Load the pipeline once per worker, not once per file.
+    load_nlp()
+
+
+class JsonlWriter:
+    """Appends one record per line; a line cut off by an interruption is dropped on resume."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def done(self):
+        if not os.path.exists(self.path):
+            return set()
+        done = set()
+        keep = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                done.add((record["path"], record["size"], record["mtime_ns"]))
+                keep += len(line)
+        if keep != os.path.getsize(self.path):
+            with open(self.path, "r+b") as file:
+                file.truncate(keep)
+        return done
+
+    def write(self, record):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class ParquetWriter:
+    """Writes ``part-NNNNN.parquet`` files into the ``path`` directory.
+
+    Parquet files can't be appended to, so every ``rows`` records become
+    a new part; an interrupted run loses at most the unwritten part.
+    Needs ``pyarrow``.
+    """
+
+    def __init__(self, path, rows=PARQUET_ROWS):
+        import pyarrow as pa
+
+        self.path = path
+        self.rows = rows
+        self._pending = []
+        self._schema = pa.schema([
+            ("path", pa.string()),
+            ("size", pa.int64()),
+            ("mtime_ns", pa.int64()),
+            ("error", pa.string()),
+            ("pairs", pa.list_(pa.struct([("a", pa.string()), ("b", pa.string()), ("count", pa.int64())]))),
+            ("triples", pa.list_(pa.struct([
+                ("subject", pa.string()), ("relation", pa.string()), ("object", pa.string()),
+            ]))),
+            ("stats", pa.struct([
+                ("chars", pa.int64()), ("sentences", pa.int64()), ("entities", pa.int64()),
+                ("pairs", pa.int64()), ("triples", pa.int64()), ("seconds", pa.float64()),
+            ])),
+        ])
+        os.makedirs(path, exist_ok=True)
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def done(self):
+        import pyarrow.parquet as pq
+
+        done = set()
+        for part in self._parts():
+            table = pq.read_table(part, columns=["path", "size", "mtime_ns"])
+            done.update(zip(*(table.column(name).to_pylist() for name in ("path", "size", "mtime_ns"))))
+        return done
+
+    def write(self, record):
+        self._pending.append(record)
+        if len(self._pending) >= self.rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parts = self._parts()
+        number = int(os.path.basename(parts[-1])[5:-8]) + 1 if parts else 0
+        target = os.path.join(self.path, f"part-{number:05d}.parquet")
+        # Written under a temporary name so a half-written part is never read back.
+        pq.write_table(pa.Table.from_pylist(self._pending, schema=self._schema), target + ".tmp")
+        os.replace(target + ".tmp", target)
+        self._pending = []
+
+    def close(self):
+        self._flush()
+
+
+def make_writer(path, output_format=None):
+    output_format = output_format or ("parquet" if path.endswith(".parquet") else "jsonl")
+    if output_format == "parquet":
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+
+def run_batch(patterns, writer, workers=WORKERS, on_record=None):
+    """Process every input file not already in ``writer``'s output.
+
+    Returns ``{"files", "skipped", "failed", "bytes", "seconds"}``.
+    """
+    done = writer.done()
+    paths = list(iter_input_files(patterns))
+    todo = [path for path in paths if fingerprint(path) not in done]
+    summary = {"files": 0, "skipped": len(paths) - len(todo), "failed": 0, "bytes": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    def collect(record):
+        writer.write(record)
+        summary["files"] += 1
+        summary["bytes"] += record["size"]
+        summary["failed"] += record["error"] is not None
+        if on_record:
+            on_record(record, summary["files"], len(todo))
+
+    try:
+        if workers <= 1:
+            for path in todo:
+                collect(process_file(path))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                pending = set()
+                for path in todo:
+                    pending.add(executor.submit(process_file, path))
+                    if len(pending) >= workers * IN_FLIGHT:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            collect(future.result())
+                for future in wait(pending).done:
+                    collect(future.result())
+    finally:
+        writer.close()
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of .html/.htm/.txt files")
+    parser.add_argument("--output", "-o", required=True, help="JSONL file, or Parquet directory if it ends in .parquet")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), help="override the format implied by --output")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes (1 runs in-process)")
+    args = parser.parse_args(argv)
+
+    def on_record(record, files_done, total):
+        status = record["error"] or f"{record['stats']['triples']} triples"
+        print(f"[{files_done}/{total}] {record['path']}: {status}", flush=True)
+
+    try:
+        writer = make_writer(args.output, args.format)
+    except ImportError:
+        parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+    summary = run_batch(args.inputs, writer, args.workers, on_record)
+    megabytes = summary["bytes"] / 1_000_000
+    print(
+        f"{summary['files']} files ({megabytes:.1f} MB) in {summary['seconds']:.1f} s, "
+        f"{summary['failed']} failed, {summary['skipped']} already done"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,531 @@
+"""Benchmarks for the extraction pipeline.
+
+Run with ``python -m mosdac.benchmark {model,cleaning,stages,canonical,relations}``.
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+import spacy
+
+from mosdac import cleaning
+from mosdac import nlp as mosdac_nlp
+from mosdac.batch import iter_input_files
+from mosdac.canonical import Canonicalizer
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.gazetteer import TERMS
+from mosdac.graph import build_graph
+from mosdac.kb_index import TripleIndex
+from mosdac.layout import compute_layout, prune_graph
+from mosdac.relations import doc_relations, entity_index, root_relations
+from mosdac.render import render_graph
+from mosdac.retrieval import PassageIndex
+
+SAMPLE_SENTENCES = [
+    "INSAT-3D provides sea surface temperature data over the Indian Ocean.",
+    "ISRO launched SCATSAT-1 from Sriharikota in September 2016.",
+    "MOSDAC distributes Oceansat-2 wind products to users in India.",
+    "Megha-Tropiques observes rainfall over the Bay of Bengal and the Arabian Sea.",
+    "The Space Applications Centre in Ahmedabad operates the MOSDAC data centre.",
+]
+
+
+# Sentences without entities, mixed in to vary entity density.
+FILLER_SENTENCES = [
+    "The page was last updated after the scheduled maintenance window.",
+    "Users can download the files after registering on the portal.",
+    "Please read the terms of use before requesting any archived data.",
+    "The archive is refreshed every few hours with newly processed files.",
+    "Contact the help desk if a download fails or a file looks incomplete.",
+]
+
+CORPUS_SIZES = {"10KB": 10_000, "100KB": 100_000, "1MB": 1_000_000, "10MB": 10_000_000}
+# Share of generated sentences that mention domain entities.
+DENSITIES = {"low": 0.1, "high": 0.9}
+# "chat" builds the triple and passage indexes and searches them. "chat_search" only
+# searches the built triple index, and "chat_scan" runs the same queries through the
+# linear scan over every triple that the index replaced.
+STAGES = ("clean", "extract", "graph", "layout", "render", "chat", "chat_search", "chat_scan")
+CHAT_QUERIES = [
+    "Which satellite observes the Bay of Bengal?",
+    "What does INSAT-3DR measure?",
+    "sea surface temperature over the Arabian Sea",
+    "monsoon rainfall products",
+    "Who operates MOSDAC?",
+]
+TOLERANCE = 0.25
+# Stages faster than this are compared as if they took this long, so timer noise doesn't fail a run.
+MIN_SECONDS = 0.01
+
+
+def sample_document(sentences=200):
+    return " ".join(SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)] for i in range(sentences))
+
+
+def sample_html(sentences=200):
+    """A catalog-like page: navigation, scripts, styles and product tables."""
+    parts = [
+        "<!DOCTYPE html><html><head><title>MOSDAC Catalog</title>",
+        "<style>.nav {display: flex} td {padding: 2px}</style>",
+        "<script>window.dataLayer = [{'page': 'catalog'}];</script></head><body>",
+        "<nav><ul>" + "".join(f"<li><a href='/p/{i}'>Product {i}</a></li>" for i in range(30)) + "</ul></nav>",
+    ]
+    for i in range(sentences):
+        sentence = SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)]
+        if i % 10 == 0:
+            parts.append(f"<table><tr><td>Level-{i % 3}</td><td>{i * 0.25:.2f} &deg;C</td></tr></table>")
+        parts.append(f"<p>{sentence} <!-- row {i} --></p>")
+        if i % 25 == 0:
+            parts.append("<script>track('view');</script>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def entity_sentence(rng):
+    """A generated sentence linking a satellite, sensor or product and a region."""
+    return rng.choice([
+        "{SATELLITE} carries the {SENSOR} that measures {PRODUCT} over the {OCEAN}.",
+        "{PRODUCT} from {SATELLITE} tracks the {WEATHER} near {LOCATION}.",
+        "The {SENSOR} on {SATELLITE} observes the {OCEAN} during the {WEATHER}.",
+        "{SATELLITE} provides {PRODUCT} data for {LOCATION} and the {OCEAN}.",
+    ]).format(**{category: rng.choice(terms) for category, terms in TERMS.items()})
+
+
+def synthetic_corpus(size, density, seed=0):
+    """MOSDAC-like HTML of about ``size`` bytes with ``density`` of sentences naming entities."""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html><head><title>MOSDAC Archive</title>",
+        "<style>.nav {display: flex}</style><script>window.dataLayer = [];</script></head><body>",
+    ]
+    length = sum(map(len, parts))
+    paragraph = 0
+    while length < size:
+        sentences = " ".join(
+            entity_sentence(rng) if rng.random() < density else rng.choice(FILLER_SENTENCES)
+            for _ in range(rng.randint(2, 6))
+        )
+        if paragraph % 20 == 0:
+            part = f"<nav><a href='/p/{paragraph}'>Product {paragraph}</a></nav><script>track({paragraph});</script>"
+        else:
+            part = ""
+        part += f"<p>{sentences}</p>"
+        parts.append(part)
+        length += len(part)
+        paragraph += 1
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def time_load(loader):
+    start = time.perf_counter()
+    nlp = loader()
+    return nlp, time.perf_counter() - start
+
+
+def docs_per_second(nlp, text, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        nlp(text)
+    return repeat / (time.perf_counter() - start)
+
+
+def compare_model_loading(sentences=200, repeat=5):
+    """Cold start and throughput of the old eager full pipeline vs the pruned lazy one."""
+    text = sample_document(sentences)
+
+    full_nlp, full_load = time_load(lambda: spacy.load(mosdac_nlp.MODEL_NAME))
+    mosdac_nlp.load_nlp.cache_clear()
+    pruned_nlp, pruned_load = time_load(mosdac_nlp.load_nlp)
+    _, cached_load = time_load(mosdac_nlp.load_nlp)
+
+    return {
+        "full": {
+            "components": list(full_nlp.pipe_names),
+            "load_seconds": full_load,
+            # The old module-level spacy.load ran on every script rerun.
+            "rerun_load_seconds": full_load,
+            "docs_per_second": docs_per_second(full_nlp, text, repeat),
+        },
+        "pruned": {
+            "components": list(pruned_nlp.pipe_names),
+            "load_seconds": pruned_load,
+            "rerun_load_seconds": cached_load,
+            "docs_per_second": docs_per_second(pruned_nlp, text, repeat),
+        },
+    }
+
+
+def check_cleaning_equivalence(cases=None):
+    """Cases where a backend's output differs from the bs4 reference.
+
+    Outputs are compared after collapsing whitespace, which is all the
+    backends may differ in. By default only the synthetic benchmark
+    page is checked; markup edge cases are covered by
+    ``tests/test_cleaning.py``.
+    """
+    cases = [sample_html(50)] if cases is None else cases
+    mismatches = []
+    for case in cases:
+        expected = " ".join(cleaning.clean_text(case, "bs4").split())
+        outputs = {backend: cleaning.clean_text(case, backend) for backend in cleaning.BACKENDS}
+        outputs["blocks"] = " ".join(cleaning.iter_clean_blocks(case))
+        for backend, output in outputs.items():
+            if " ".join(output.split()) != expected:
+                mismatches.append((backend, case[:60], expected[:60], output[:60]))
+    return mismatches
+
+
+def compare_cleaning(sentences=2000, repeat=5):
+    """MB/s of each cleaning backend on a synthetic catalog page."""
+    raw_html = sample_html(sentences)
+    megabytes = len(raw_html.encode("utf-8")) / 1e6
+    results = {}
+    cleaners = {backend: (lambda html, b=backend: cleaning.clean_text(html, b)) for backend in cleaning.BACKENDS}
+    cleaners["blocks"] = lambda html: list(cleaning.iter_clean_blocks(html))
+    for backend, clean in cleaners.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            clean(raw_html)
+        elapsed = (time.perf_counter() - start) / repeat
+        results[backend] = {"seconds": elapsed, "mb_per_second": megabytes / elapsed}
+    return megabytes, results
+
+
+def scan_triples(triples, query):
+    """The knowledge base chat lookup before ``TripleIndex``: substring checks on every triple."""
+    answers = []
+    for s, r, o in triples:
+        q = query.lower()
+        if s.lower() in q or o.lower() in q or r.lower() in q:
+            answers.append((s, r, o))
+    return answers
+
+
+def run_stages(raw_html):
+    """Run every pipeline stage once on ``raw_html``; returns ``{stage: (seconds, items)}``."""
+    timings = {}
+
+    def timed(stage, fn, items=None):
+        start = time.perf_counter()
+        result = fn()
+        timings[stage] = (time.perf_counter() - start, items(result) if items else None)
+        return result
+
+    text = timed("clean", lambda: cleaning.clean_text(raw_html), len)
+    passages = []
+    cooccurrence, triples = timed(
+        "extract",
+        lambda: mosdac_nlp.extract_entities_relations(text, passages=passages),
+        lambda result: len(passages),
+    )
+    G = timed("graph", lambda: build_graph(cooccurrence, triples), lambda G: G.number_of_edges())
+    pruned = prune_graph(G)
+    pos = timed("layout", lambda: compute_layout(pruned), len)
+    if pruned.number_of_nodes():
+        timed("render", lambda: render_graph(pruned, pos), len)
+    else:
+        timings["render"] = (0.0, 0)
+
+    indexes = {}
+
+    def chat():
+        triple_index = indexes["triples"] = TripleIndex(triples)
+        passage_index = PassageIndex(passages)
+        return sum(len(triple_index.search(q)) + len(passage_index.search(q)) for q in CHAT_QUERIES)
+
+    timed("chat", chat)
+    # Items are the triples matched over all queries.
+    timed("chat_search", lambda: sum(len(indexes["triples"].search(q)) for q in CHAT_QUERIES), int)
+    timed("chat_scan", lambda: sum(len(scan_triples(triples, q)) for q in CHAT_QUERIES), int)
+    return timings
+
+
+def peak_memory(raw_html):
+    """Peak traced allocation in bytes of each stage, from a separate traced run."""
+    peaks = {}
+    tracemalloc.start()
+    try:
+        text = cleaning.clean_text(raw_html)
+        peaks["clean"] = tracemalloc.get_traced_memory()[1]
+        stages = [
+            ("extract", lambda: mosdac_nlp.extract_entities_relations(text, passages=passages)),
+            ("graph", lambda: build_graph(*extracted)),
+            ("layout", lambda: compute_layout(pruned)),
+            ("render", lambda: render_graph(pruned, pos) if pruned.number_of_nodes() else b""),
+            ("chat", lambda: [TripleIndex(extracted[1]).search(q) for q in CHAT_QUERIES]
+                     + [PassageIndex(passages).search(q) for q in CHAT_QUERIES]),
+            ("chat_scan", lambda: [scan_triples(extracted[1], q) for q in CHAT_QUERIES]),
+        ]
+        passages = []
+        for stage, fn in stages:
+            tracemalloc.reset_peak()
+            result = fn()
+            peaks[stage] = tracemalloc.get_traced_memory()[1]
+            if stage == "extract":
+                extracted = result
+            elif stage == "graph":
+                pruned = prune_graph(result)
+            elif stage == "layout":
+                pos = result
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def benchmark_stages(sizes=tuple(CORPUS_SIZES), densities=tuple(DENSITIES), repeat=1, memory=True):
+    """Per-stage seconds, MB/s, item counts and peak memory for each synthetic corpus.
+
+    Timings are the best of ``repeat`` untraced runs; memory comes from
+    one more run under ``tracemalloc``, which would skew the timings.
+    Returns ``{"size/density": {stage: {...}}}``.
+    """
+    mosdac_nlp.load_nlp()
+    results = {}
+    for size in sizes:
+        for density in densities:
+            raw_html = synthetic_corpus(CORPUS_SIZES[size], DENSITIES[density])
+            megabytes = len(raw_html.encode("utf-8")) / 1e6
+            runs = [run_stages(raw_html) for _ in range(repeat)]
+            peaks = peak_memory(raw_html) if memory else {}
+            results[f"{size}/{density}"] = {
+                stage: {
+                    "seconds": min(run[stage][0] for run in runs),
+                    "mb_per_second": megabytes / max(min(run[stage][0] for run in runs), 1e-9),
+                    "items": runs[0][stage][1],
+                    "peak_mb": peaks[stage] / 1e6 if stage in peaks else None,
+                }
+                for stage in STAGES
+            }
+    return results
+
+
+def compare_canonicalization(patterns):
+    """Graph sizes with raw and with canonical entity names, per saved page and over all of them.
+
+    Returns ``(results, merged)``: ``results`` maps each path (and
+    ``"all pages"``) to ``{"raw": {"nodes", "edges"}, "canonical": {...}}``
+    and ``merged`` maps canonical names to the surface forms merged into them.
+    """
+    canonicalizer = Canonicalizer()
+    totals = {mode: (CooccurrenceCounts(), set()) for mode in ("raw", "canonical")}
+    results = {}
+    for path in iter_input_files(patterns):
+        with open(path, "rb") as file:
+            text = cleaning.clean_text(file.read().decode("utf-8", errors="replace"))
+        results[path] = {}
+        for mode in ("raw", "canonical"):
+            pairs, triples = mosdac_nlp.extract_entities_relations(
+                text, canonical=mode == "canonical", canonicalizer=canonicalizer
+            )
+            totals[mode][0].update(pairs)
+            totals[mode][1].update(triples)
+            G = build_graph(pairs, triples)
+            results[path][mode] = {"nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+    if results:
+        results["all pages"] = {}
+        for mode, (pairs, triples) in totals.items():
+            G = build_graph(pairs, triples)
+            results["all pages"][mode] = {"nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+    merged = {
+        name: [form for form, _ in forms.most_common()]
+        for name, forms in canonicalizer.mentions().items() if len(forms) > 1
+    }
+    return results, merged
+
+
+def compare_relations(size="1MB", density="high", repeat=3):
+    """Triples from the ROOT-verb loop vs the compiled dependency patterns on one parsed corpus.
+
+    The corpus is parsed once and only relation extraction is timed,
+    best of ``repeat``. Returns ``(sentences, results, pattern_counts)``
+    with ``results`` mapping "root" and "patterns" to seconds, triples,
+    triples per second and triples per sentence.
+    """
+    text = cleaning.clean_text(synthetic_corpus(CORPUS_SIZES[size], DENSITIES[density]))
+    docs = list(mosdac_nlp.load_nlp().pipe(mosdac_nlp.iter_chunks(text), batch_size=mosdac_nlp.BATCH_SIZE))
+    sentences = sum(1 for doc in docs for _ in doc.sents)
+
+    def root(doc):
+        ents = entity_index(doc)
+        return {sent.start: root_relations(sent, ents) for sent in doc.sents}
+
+    pattern_counts = Counter()
+    extractors = {
+        "root": root,
+        "patterns": doc_relations,
+    }
+    results = {}
+    for name, extract in extractors.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            found = [extract(doc) for doc in docs]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        triples = sum(len(sentence) for relations in found for sentence in relations.values())
+        results[name] = {
+            "seconds": best,
+            "triples": triples,
+            "triples_per_second": triples / max(best, 1e-9),
+            "triples_per_sentence": triples / sentences if sentences else 0.0,
+        }
+    for doc in docs:
+        doc_relations(doc, pattern_counts)
+    return sentences, results, dict(pattern_counts)
+
+
+def find_regressions(results, baseline, tolerance=TOLERANCE, min_seconds=MIN_SECONDS):
+    """``(corpus, stage, baseline_seconds, seconds)`` for stages slower than the baseline allows."""
+    regressions = []
+    for corpus, stages in results.items():
+        for stage, row in stages.items():
+            before = baseline.get(corpus, {}).get(stage)
+            if before is None:
+                continue
+            if row["seconds"] > max(before["seconds"], min_seconds) * (1 + tolerance):
+                regressions.append((corpus, stage, before["seconds"], row["seconds"]))
+    return regressions
+
+
+def print_stages_report(results, regressions=None, tolerance=TOLERANCE):
+    print(f"{'corpus':<14}{'stage':<11}{'seconds':>10}{'MB/s':>10}{'items':>10}{'peak MB':>10}")
+    for corpus, stages in results.items():
+        for stage, row in stages.items():
+            peak = f"{row['peak_mb']:>10.1f}" if row["peak_mb"] is not None else f"{'-':>10}"
+            items = row["items"] if row["items"] is not None else "-"
+            print(f"{corpus:<14}{stage:<11}{row['seconds']:>10.4f}{row['mb_per_second']:>10.2f}{items:>10}{peak}")
+        if "chat_search" in stages and "chat_scan" in stages:
+            search, scan = stages["chat_search"]["seconds"], stages["chat_scan"]["seconds"]
+            print(f"{'':<25}triple lookups: index {search:.4f} s vs scan {scan:.4f} s ({scan / max(search, 1e-9):.1f}x)")
+    if regressions is None:
+        return
+    if regressions:
+        print(f"{len(regressions)} stages slower than baseline + {tolerance:.0%}:")
+        for corpus, stage, before, after in regressions:
+            print(f"  {corpus} {stage}: {before:.4f} s -> {after:.4f} s ({after / max(before, 1e-9):.2f}x)")
+    else:
+        print(f"no stage slower than baseline + {tolerance:.0%}")
+
+
+def print_canonical_report(results, merged, groups=20):
+    def reduction(before, after):
+        return f"{1 - after / before:.0%}" if before else "-"
+
+    print(f"{'page':<40}{'nodes':>14}{'saved':>7}{'edges':>14}{'saved':>7}")
+    for path, row in results.items():
+        raw, canonical = row["raw"], row["canonical"]
+        print(
+            f"{path[-39:]:<40}{raw['nodes']:>7}->{canonical['nodes']:<5}{reduction(raw['nodes'], canonical['nodes']):>7}"
+            f"{raw['edges']:>7}->{canonical['edges']:<5}{reduction(raw['edges'], canonical['edges']):>7}"
+        )
+    if merged:
+        print(f"{len(merged)} entities merged from several surface forms, largest first:")
+        for name, forms in sorted(merged.items(), key=lambda item: -len(item[1]))[:groups]:
+            print(f"  {name}: {', '.join(forms)}")
+
+
+def print_relations_report(sentences, results, pattern_counts):
+    print(f"sentences: {sentences}")
+    print(f"{'extractor':<10}{'seconds':>10}{'triples':>10}{'triples/s':>12}{'per sent':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<10}{row['seconds']:>10.4f}{row['triples']:>10}"
+            f"{row['triples_per_second']:>12.1f}{row['triples_per_sentence']:>10.3f}"
+        )
+    if pattern_counts:
+        print("triples per pattern: " + ", ".join(
+            f"{name} {count}" for name, count in sorted(pattern_counts.items(), key=lambda item: -item[1])
+        ))
+
+
+def print_cleaning_report(megabytes, results, mismatches):
+    print(f"document: {megabytes:.2f} MB")
+    baseline = results["bs4"]["seconds"]
+    print(f"{'backend':<10}{'seconds':>10}{'MB/s':>10}{'speedup':>10}")
+    for backend, row in results.items():
+        print(f"{backend:<10}{row['seconds']:>10.4f}{row['mb_per_second']:>10.2f}{baseline / row['seconds']:>9.1f}x")
+    if mismatches:
+        print(f"{len(mismatches)} equivalence mismatches:")
+        for backend, case, expected, output in mismatches:
+            print(f"  {backend}: {case!r}\n    expected {expected!r}\n    got      {output!r}")
+    else:
+        print("all backends match the bs4 reference")
+
+
+def print_model_report(results):
+    print(f"{'pipeline':<10}{'load s':>10}{'rerun s':>12}{'docs/s':>10}  components")
+    for name, row in results.items():
+        print(
+            f"{name:<10}{row['load_seconds']:>10.3f}{row['rerun_load_seconds']:>12.5f}"
+            f"{row['docs_per_second']:>10.2f}  {', '.join(row['components'])}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    model = commands.add_parser("model", help="spaCy load time and throughput, full vs pruned")
+    model.add_argument("--sentences", type=int, default=200, help="sentences per synthetic document")
+    model.add_argument("--repeat", type=int, default=5, help="documents parsed per measurement")
+    clean = commands.add_parser("cleaning", help="HTML cleaning backends: equivalence and MB/s")
+    clean.add_argument("--sentences", type=int, default=2000, help="paragraphs in the synthetic page")
+    clean.add_argument("--repeat", type=int, default=5, help="cleanings per measurement")
+    stages = commands.add_parser("stages", help="every pipeline stage on synthetic corpora of 10 KB to 10 MB")
+    stages.add_argument("--sizes", default=",".join(CORPUS_SIZES), help=f"comma-separated subset of {', '.join(CORPUS_SIZES)}")
+    stages.add_argument("--densities", default=",".join(DENSITIES), help="comma-separated subset of low, high")
+    stages.add_argument("--repeat", type=int, default=1, help="timed runs per corpus; the fastest counts")
+    stages.add_argument("--no-memory", action="store_true", help="skip the traced run that measures peak memory")
+    stages.add_argument("--json", help="write the results to this file")
+    stages.add_argument("--baseline", help="results JSON to compare against; exit 1 on regressions")
+    stages.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown over the baseline")
+    canonical = commands.add_parser("canonical", help="node and edge reduction from entity canonicalization")
+    canonical.add_argument("inputs", nargs="+", help="directories or glob patterns of saved .html/.htm/.txt pages")
+    canonical.add_argument("--json", help="write the results to this file")
+    relations = commands.add_parser("relations", help="triples/s and triples/sentence, ROOT loop vs dependency patterns")
+    relations.add_argument("--size", default="1MB", choices=CORPUS_SIZES, help="synthetic corpus size")
+    relations.add_argument("--density", default="high", choices=DENSITIES, help="share of sentences naming entities")
+    relations.add_argument("--repeat", type=int, default=3, help="timed runs per extractor; the fastest counts")
+    args = parser.parse_args(argv)
+
+    if args.command == "model":
+        print_model_report(compare_model_loading(args.sentences, args.repeat))
+    elif args.command == "cleaning":
+        mismatches = check_cleaning_equivalence()
+        print_cleaning_report(*compare_cleaning(args.sentences, args.repeat), mismatches)
+        if mismatches:
+            raise SystemExit(1)
+    elif args.command == "stages":
+        sizes, densities = args.sizes.split(","), args.densities.split(",")
+        for name, choices in ((sizes, CORPUS_SIZES), (densities, DENSITIES)):
+            unknown = set(name) - set(choices)
+            if unknown:
+                parser.error(f"unknown corpus {', '.join(sorted(unknown))}")
+        results = benchmark_stages(sizes, densities, args.repeat, memory=not args.no_memory)
+        if args.json:
+            with open(args.json, "w") as file:
+                json.dump(results, file, indent=2)
+        regressions = None
+        if args.baseline:
+            with open(args.baseline) as file:
+                regressions = find_regressions(results, json.load(file), args.tolerance)
+        print_stages_report(results, regressions, args.tolerance)
+        if regressions:
+            raise SystemExit(1)
+    elif args.command == "canonical":
+        results, merged = compare_canonicalization(args.inputs)
+        if not results:
+            parser.error("no .html, .htm or .txt pages matched")
+        if args.json:
+            with open(args.json, "w") as file:
+                json.dump({"results": results, "merged": merged}, file, indent=2)
+        print_canonical_report(results, merged)
+    elif args.command == "relations":
+        print_relations_report(*compare_relations(args.size, args.density, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Canonical entity names, so surface variants of one entity share a node."""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+from mosdac.gazetteer import GAZETTEER
+
+# Surface form -> canonical form; both sides are matched by ``canonical_key``.
+ALIASES = {
+    "SST": "Sea Surface Temperature",
+    "LST": "Land Surface Temperature",
+    "OLR": "Outgoing Longwave Radiation",
+    "TPW": "Total Precipitable Water",
+    "UTH": "Upper Tropospheric Humidity",
+    "CMV": "Cloud Motion Vector",
+    "PFZ": "Potential Fishing Zone",
+    "DWR": "Doppler Weather Radar",
+    "AWS": "Automatic Weather Station",
+    "Himalayas": "Himalaya",
+    "Indian Space Research Organisation": "ISRO",
+    "Indian Space Research Organization": "ISRO",
+    "Space Applications Centre": "SAC",
+    "Space Applications Center": "SAC",
+    "India Meteorological Department": "IMD",
+}
+
+DETERMINERS = frozenset(("a", "an", "the", "this", "that", "these", "those", "its", "their", "our"))
+# Class nouns around a name ("the INSAT-3D satellite"); dropped unless nothing else is left.
+GENERIC_NOUNS = frozenset((
+    "satellite", "satellites", "spacecraft", "mission", "sensor", "instrument", "payload",
+))
+
+_POSSESSIVE = re.compile(r"['’]s\b")
+_WORD = re.compile(r"[^\W_]+")
+
+
+def canonical_key(text):
+    """Case-, punctuation- and hyphenation-insensitive key of an entity mention.
+
+    "INSAT-3D", "INSAT 3D", "Insat3D" and "the INSAT-3D satellite" all
+    map to ``"insat3d"``.
+    """
+    words = _WORD.findall(_POSSESSIVE.sub("", text.casefold()))
+    while words and words[0] in DETERMINERS:
+        del words[0]
+    while len(words) > 1 and words[-1] in GENERIC_NOUNS:
+        del words[-1]
+    while len(words) > 1 and words[0] in GENERIC_NOUNS:
+        del words[0]
+    return "".join(words)
+
+
+def load_aliases(path=None):
+    """``ALIASES`` updated from the JSON object at ``path`` or ``MOSDAC_ALIASES``."""
+    aliases = dict(ALIASES)
+    path = path or os.getenv("MOSDAC_ALIASES")
+    if path:
+        with open(path, encoding="utf-8") as file:
+            aliases.update(json.load(file))
+    return aliases
+
+
+def _display_form(text):
+    words = text.strip().split()
+    while len(words) > 1 and words[0].lower() in DETERMINERS:
+        del words[0]
+    return _POSSESSIVE.sub("", " ".join(words))
+
+
+def alias_version(aliases=None):
+    """Short hash of the alias table; part of the version of stored canonicalized analyses."""
+    aliases = load_aliases() if aliases is None else aliases
+    return hashlib.sha1(json.dumps(aliases, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class Canonicalizer:
+    """Maps the entity mentions of one analysis to canonical names.
+
+    Mentions with the same ``canonical_key``, after resolving the alias
+    table, are one entity. ``intern`` returns that key and counts the
+    mention as one of the entity's surface forms; ``name`` turns a key
+    into a display name once the analysis is done: the gazetteer term,
+    alias target or ``prefer``red name with that key when there is one,
+    otherwise the entity's most frequent surface form (ties broken
+    alphabetically), so the name depends only on what was mentioned, not
+    on the order. A name handed out is kept for later lookups, so pages
+    of one crawl sharing a canonicalizer agree on it.
+
+    One instance serves one analysis, crawl or batch file and is
+    dropped with it; nothing accumulates across analyses. Crawl pages
+    run in one thread, but updates still go through a lock.
+    """
+
+    def __init__(self, gazetteer=GAZETTEER, aliases=None):
+        aliases = load_aliases() if aliases is None else aliases
+        self._preferred = {}
+        for table in (gazetteer.terms, gazetteer.case_sensitive):
+            for terms in table.values():
+                for term in terms:
+                    self._preferred.setdefault(canonical_key(term), term)
+        self._aliases = {}
+        for alias, target in aliases.items():
+            target_key = canonical_key(target)
+            self._aliases[canonical_key(alias)] = target_key
+            self._preferred.setdefault(target_key, target)
+        # Surface form -> key, so repeated mentions skip the key computation.
+        self._surfaces = {}
+        self._forms = {}
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def prefer(self, names):
+        """Use ``names`` (e.g. nodes already stored) as the canonical names for their keys."""
+        with self._lock:
+            for name in names:
+                self._preferred.setdefault(self.key(name), name)
+
+    def key(self, text):
+        key = canonical_key(text)
+        return self._aliases.get(key, key)
+
+    def intern(self, text):
+        """Key of the mention ``text``, recording it as a surface form."""
+        surface = text.strip()
+        with self._lock:
+            key = self._surfaces.get(surface)
+            if key is None:
+                key = self._surfaces[surface] = self.key(surface) or surface
+            forms = self._forms.get(key)
+            if forms is None:
+                forms = self._forms[key] = Counter()
+            forms[surface] += 1
+        return key
+
+    def name(self, key):
+        """Display name of the entity ``key``; fixed from the first call on."""
+        with self._lock:
+            name = self._names.get(key)
+            if name is None:
+                name = self._preferred.get(key)
+                if name is None:
+                    forms = Counter()
+                    for surface, count in self._forms.get(key, {}).items():
+                        forms[_display_form(surface)] += count
+                    name = min(forms.items(), key=lambda item: (-item[1], item[0]))[0] if forms else key
+                self._names[key] = name
+        return name
+
+    def canonical(self, text):
+        """Canonical name of the mention ``text``, recording it."""
+        return self.name(self.intern(text))
+
+    def lookup(self, text):
+        """Canonical name of ``text`` if its entity is known, else ``text`` stripped; records nothing."""
+        key = self.key(text) or text.strip()
+        with self._lock:
+            return self._names.get(key) or self._preferred.get(key) or text.strip()
+
+    def surface_forms(self, name):
+        """``Counter`` of the mentions recorded for ``name``'s entity."""
+        with self._lock:
+            return Counter(self._forms.get(self.key(name) or name.strip(), ()))
+
+    def mentions(self):
+        """``{name: Counter of surface forms}`` for every entity recorded."""
+        with self._lock:
+            forms = {key: Counter(counts) for key, counts in self._forms.items()}
+        return {self.name(key): counts for key, counts in forms.items()}
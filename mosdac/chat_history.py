@@ -0,0 +1,99 @@
+"""Per-session chat log with a bounded in-memory window."""
+import json
+import os
+import time
+import uuid
+from collections import deque
+
+from mosdac.settings import cache_path
+
+# Messages kept in memory; older ones are read back from the session's spill file.
+WINDOW = 50
+PAGE_SIZE = 20
+# Spill files of sessions idle this long are removed when a new session starts.
+SPILL_TTL = 24 * 60 * 60
+# Shown in place of spilled turns whose file was removed while the session was still open.
+EXPIRED_TURN = ("bot", "⌛ This older message has expired and is no longer available.", "bot")
+
+
+def remove_stale_spills(directory, ttl=SPILL_TTL):
+    now = time.time()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if name.endswith(".jsonl") and now - os.path.getmtime(path) > ttl:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class ChatHistory:
+    """``(role, message, msg_type)`` turns of one conversation.
+
+    The newest ``window`` turns stay in memory. Older turns are appended
+    to a JSON-lines spill file of their own, and the byte offset of each
+    is kept so any page is read back with one seek: a spilled turn costs
+    one integer of memory, and reading a page costs the same however
+    long the conversation is. If the spill file was removed as stale
+    while the session was idle, its turns read back as ``EXPIRED_TURN``.
+    """
+
+    def __init__(self, directory=None, window=WINDOW):
+        self.directory = directory or cache_path("chat")
+        os.makedirs(self.directory, exist_ok=True)
+        remove_stale_spills(self.directory)
+        self.path = os.path.join(self.directory, f"{uuid.uuid4().hex}.jsonl")
+        self.window = window
+        self._recent = deque()
+        self._offsets = []
+        # Spilled turns lost with a removed spill file; they come first.
+        self._expired = 0
+
+    def __len__(self):
+        return self._expired + len(self._offsets) + len(self._recent)
+
+    def append(self, role, message, msg_type):
+        self._recent.append((role, message, msg_type))
+        if len(self._recent) > self.window:
+            self._spill(self._recent.popleft())
+
+    def _spill(self, turn):
+        with open(self.path, "ab") as spill:
+            self._offsets.append(spill.tell())
+            spill.write(json.dumps(turn, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def page(self, start, count=PAGE_SIZE):
+        """Turns ``start`` to ``start + count`` (oldest first), wherever they are kept."""
+        end = min(start + count, len(self))
+        start = max(start, 0)
+        if start < self._expired + len(self._offsets) and self._offsets:
+            try:
+                spill = open(self.path, "rb")
+            except FileNotFoundError:
+                self._expired += len(self._offsets)
+                self._offsets = []
+            else:
+                with spill:
+                    return self._read(spill, start, end)
+        return self._read(None, start, end)
+
+    def _read(self, spill, start, end):
+        expired = self._expired
+        spilled = expired + len(self._offsets)
+        turns = [EXPIRED_TURN] * (min(end, expired) - start) if start < expired else []
+        first = max(start, expired)
+        if spill is not None and first < min(end, spilled):
+            spill.seek(self._offsets[first - expired])
+            for _ in range(min(end, spilled) - first):
+                turns.append(tuple(json.loads(spill.readline())))
+        turns.extend(self._recent[index - spilled] for index in range(max(start, spilled), end))
+        return turns
+
+    def clear(self):
+        self._recent.clear()
+        self._offsets = []
+        self._expired = 0
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,170 @@
+"""HTML to plain-text cleaning.
+
+Three interchangeable backends produce the same text:
+
+- ``"bs4"``: the original BeautifulSoup/html.parser implementation,
+  kept as the reference.
+- ``"lxml"``: libxml2's C parser. This is the default when lxml is
+  installed.
+- ``"stream"``: a streaming html.parser tokenizer. It never builds a
+  tree, drops script/style content as it goes, and can emit cleaned
+  blocks incrementally (see ``iter_clean_blocks``).
+"""
+import html
+import os
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+from mosdac.metrics import METRICS
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    lxml = None
+
+_WHITESPACE = re.compile(r"\s+")
+_DISALLOWED = re.compile(r"[^a-zA-Z0-9.,:;\-\s]")
+_CDATA = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.IGNORECASE | re.DOTALL)
+
+# script/style are removed outright; BeautifulSoup's get_text() also
+# leaves out strings inside template and ruby annotations.
+SKIPPED_TAGS = frozenset(("script", "style", "template", "rt", "rp"))
+
+# Tags that end a block of running text for iter_clean_blocks.
+BLOCK_TAGS = frozenset((
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article",
+    "header", "footer", "nav", "aside", "main", "h1", "h2", "h3", "h4", "h5", "h6",
+    "pre", "blockquote", "dd", "dt", "form", "body", "title",
+))
+BLOCK_CHARS = 4_000
+
+BACKENDS = ("bs4", "lxml", "stream")
+DEFAULT_BACKEND = os.getenv("MOSDAC_CLEANER", "lxml" if lxml is not None else "stream")
+
+
+def normalize_text(text):
+    text = _WHITESPACE.sub(" ", text)
+    return _DISALLOWED.sub("", text)
+
+
+def _clean_bs4(raw_html):
+    soup = BeautifulSoup(raw_html, "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    return soup.get_text(separator=" ")
+
+
+def _escape_cdata(match):
+    return html.escape(match.group(1), quote=False)
+
+
+def _clean_lxml(raw_html):
+    # libxml2's HTML parser drops CDATA sections; html.parser keeps their text.
+    if "<![" in raw_html:
+        raw_html = _CDATA.sub(_escape_cdata, raw_html)
+    parser = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+    try:
+        tree = lxml.html.document_fromstring(raw_html.encode("utf-8"), parser=parser)
+    except etree.ParserError:
+        return ""
+    etree.strip_elements(tree, *SKIPPED_TAGS, with_tail=False)
+    return " ".join(tree.itertext())
+
+
+class _TextStream(HTMLParser):
+    """Collects text outside SKIPPED_TAGS, cutting it into blocks at block-level tags."""
+
+    def __init__(self, block_chars=BLOCK_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.block_chars = block_chars
+        self.blocks = []
+        self._strings = []
+        self._size = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._strings.append(data)
+            self._size += len(data)
+            if self._size >= self.block_chars:
+                self._flush()
+
+    def unknown_decl(self, data):
+        if data[:6].upper() == "CDATA[":
+            self.handle_data(data[6:])
+
+    def _flush(self):
+        if self._strings:
+            self.blocks.append(" ".join(self._strings))
+            self._strings = []
+            self._size = 0
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _clean_stream(raw_html):
+    stream = _TextStream()
+    stream.feed(raw_html)
+    stream.close()
+    return " ".join(stream.blocks)
+
+
+_CLEANERS = {"bs4": _clean_bs4, "lxml": _clean_lxml, "stream": _clean_stream}
+
+
+def clean_text(raw_html, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend not in _CLEANERS:
+        raise ValueError(f"Unknown cleaning backend {backend!r}; choose from {', '.join(BACKENDS)}")
+    with METRICS.stage("clean") as span:
+        text = normalize_text(_CLEANERS[backend](raw_html))
+        span.add(chars=len(text))
+    return text
+
+
+def iter_clean_blocks(html_chunks, block_chars=BLOCK_CHARS):
+    """Yield cleaned text blocks while the HTML is still being parsed.
+
+    ``html_chunks`` is a string or an iterable of string pieces (for
+    example a decoded response stream). Each block is cleaned like
+    ``clean_text`` and ends at a block-level tag or after roughly
+    ``block_chars`` characters, so extraction can start on the first
+    blocks before the rest of the document has been read.
+    """
+    if isinstance(html_chunks, str):
+        html_chunks = (html_chunks,)
+    stream = _TextStream(block_chars)
+    for chunk in html_chunks:
+        stream.feed(chunk)
+        yield from _drain(stream)
+    stream.close()
+    yield from _drain(stream)
+
+
+def _drain(stream):
+    blocks, stream.blocks = stream.blocks, []
+    for block in blocks:
+        block = normalize_text(block)
+        if block.strip():
+            yield block
@@ -0,0 +1,116 @@
+"""Weighted entity co-occurrence counts over interned entity ids."""
+import numpy as np
+from scipy import sparse
+
+# Pending pair ids are folded into the sparse matrix once this many accumulate.
+FLUSH_AT = 1_000_000
+
+
+class CooccurrenceCounts:
+    """Counts of ordered entity pairs seen in the same sentence.
+
+    Entity names are interned to integer ids; pair ids are buffered in
+    NumPy arrays and periodically summed into a sparse ``names x names``
+    matrix, so memory grows with the number of distinct pairs rather than
+    with every mention. Iterating yields ``(a, b)`` name pairs and ``len``
+    is the number of distinct pairs, like the pair list it replaces.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self._rows = []
+        self._cols = []
+        self._counts = []
+        self._pending = 0
+        self._matrix = sparse.csr_matrix((0, 0), dtype=np.int64)
+
+    def intern(self, name):
+        entity_id = self.ids.get(name)
+        if entity_id is None:
+            entity_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return entity_id
+
+    def rename(self, names):
+        """Rename entities through the ``{old: new}`` mapping; new names must stay distinct."""
+        self.names = [names.get(name, name) for name in self.names]
+        self.ids = {name: entity_id for entity_id, name in enumerate(self.names)}
+
+    def add_group(self, entities):
+        """Count every ``i < j`` pair of one sentence's entities, in mention order."""
+        if len(entities) < 2:
+            return
+        ids = np.fromiter((self.intern(e) for e in entities), dtype=np.int64, count=len(entities))
+        first, second = np.triu_indices(len(ids), 1)
+        self._push(ids[first], ids[second], np.ones(len(first), dtype=np.int64))
+
+    def update(self, other):
+        """Add all counts from another ``CooccurrenceCounts``."""
+        matrix = other.matrix().tocoo()
+        if not matrix.nnz:
+            return
+        remap = np.fromiter((self.intern(name) for name in other.names), dtype=np.int64, count=len(other.names))
+        self._push(remap[matrix.row], remap[matrix.col], matrix.data.astype(np.int64))
+
+    def _push(self, rows, cols, counts):
+        self._rows.append(rows)
+        self._cols.append(cols)
+        self._counts.append(counts)
+        self._pending += len(rows)
+        if self._pending >= FLUSH_AT:
+            self._flush()
+
+    def _flush(self):
+        size = len(self.names)
+        if self._matrix.shape != (size, size):
+            self._matrix.resize((size, size))
+        if self._pending:
+            pending = sparse.csr_matrix(
+                (np.concatenate(self._counts), (np.concatenate(self._rows), np.concatenate(self._cols))),
+                shape=(size, size),
+            )
+            self._matrix = self._matrix + pending
+            self._rows, self._cols, self._counts = [], [], []
+            self._pending = 0
+
+    def matrix(self):
+        """The ``names x names`` CSR matrix of pair counts."""
+        self._flush()
+        return self._matrix
+
+    def weighted_pairs(self, min_count=1):
+        """Yield ``(a, b, count)`` for pairs seen at least ``min_count`` times."""
+        matrix = self.matrix().tocoo()
+        keep = matrix.data >= min_count
+        names = self.names
+        for row, col, count in zip(matrix.row[keep], matrix.col[keep], matrix.data[keep]):
+            yield names[row], names[col], int(count)
+
+    def __iter__(self):
+        return ((a, b) for a, b, _ in self.weighted_pairs())
+
+    def __len__(self):
+        return self.matrix().nnz
+
+    def to_dict(self):
+        matrix = self.matrix().tocoo()
+        return {
+            "names": self.names,
+            "rows": matrix.row.tolist(),
+            "cols": matrix.col.tolist(),
+            "counts": matrix.data.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        counts = cls()
+        for name in data["names"]:
+            counts.intern(name)
+        if data["rows"]:
+            counts._push(
+                np.asarray(data["rows"], dtype=np.int64),
+                np.asarray(data["cols"], dtype=np.int64),
+                np.asarray(data["counts"], dtype=np.int64),
+            )
+        return counts
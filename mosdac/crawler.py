@@ -0,0 +1,231 @@
+"""Concurrent same-site crawler feeding pages into extraction."""
+import re
+import threading
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from mosdac.cleaning import clean_text, iter_clean_blocks
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.http_cache import HttpResult
+from mosdac.metrics import METRICS
+
+USER_AGENT = "Mozilla/5.0 (Space-Explorer/1.0)"
+TIMEOUT = 10
+MAX_DEPTH = 1
+MAX_PAGES = 25
+WORKERS = 8
+PER_HOST = 4
+
+_HREF = re.compile(r"""href\s*=\s*["']([^"'<>\s]+)["']""", re.IGNORECASE)
+_SITEMAP_LOC = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+_SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".jpg", ".jpeg", ".png", ".gif", ".svg",
+    ".ico", ".css", ".js", ".nc", ".h5", ".hdf", ".xls", ".xlsx", ".doc", ".docx",
+)
+
+Page = namedtuple("Page", "url depth status text links error")
+Probe = namedtuple("Probe", "url status text pairs triples passages outcome")
+
+
+def make_session(pool_size=WORKERS):
+    """A keep-alive session whose connection pool matches the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def normalize_url(url):
+    url, _ = urldefrag(url)
+    return url.rstrip("/") or url
+
+
+def same_site(url, seed):
+    """True for http(s) URLs on the seed's host or one of its subdomains."""
+    parsed, seed_parsed = urlparse(url), urlparse(seed)
+    if parsed.scheme not in ("http", "https"):
+        return False
+    host = (parsed.hostname or "").removeprefix("www.")
+    seed_host = (seed_parsed.hostname or "").removeprefix("www.")
+    return host == seed_host or host.endswith("." + seed_host)
+
+
+def extract_links(raw_html, base_url):
+    links = []
+    for href in _HREF.findall(raw_html):
+        if href.startswith(("mailto:", "javascript:", "tel:")):
+            continue
+        url = normalize_url(urljoin(base_url, href))
+        if not urlparse(url).path.lower().endswith(_SKIPPED_EXTENSIONS):
+            links.append(url)
+    return links
+
+
+def sitemap_urls(session, seed, timeout=TIMEOUT):
+    """URLs listed in the seed host's /sitemap.xml, or [] if there is none."""
+    try:
+        response = session.get(urljoin(seed, "/sitemap.xml"), timeout=timeout)
+    except requests.RequestException:
+        return []
+    if response.status_code != 200:
+        return []
+    return [normalize_url(url) for url in _SITEMAP_LOC.findall(response.text)]
+
+
+class _HostLimiter:
+    """One semaphore per host so no host sees more than ``per_host`` requests at once."""
+
+    def __init__(self, per_host):
+        self._lock = threading.Lock()
+        self._slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+
+    def slot(self, url):
+        with self._lock:
+            return self._slots[urlparse(url).netloc]
+
+
+@lru_cache(maxsize=None)
+def shared_session():
+    """Process-wide keep-alive session for single-page probes."""
+    return make_session()
+
+
+def _get(session, url, timeout, http_cache):
+    with METRICS.stage("fetch") as span:
+        if http_cache is not None:
+            result = http_cache.get(session, url, timeout)
+        else:
+            response = session.get(url, timeout=timeout)
+            result = HttpResult(
+                response.url, response.status_code, response.text,
+                response.headers.get("Content-Type", "text/html"), "miss",
+            )
+        span.add(pages=1, chars=len(result.text))
+        return result
+
+
+def fetch_page(session, url, depth, limiter=None, timeout=TIMEOUT, http_cache=None):
+    slot = limiter.slot(url) if limiter else threading.Semaphore()
+    try:
+        with slot:
+            response = _get(session, url, timeout, http_cache)
+    except requests.RequestException as e:
+        return Page(url, depth, None, "", [], str(e))
+    if response.status != 200:
+        return Page(url, depth, response.status, "", [], f"HTTP {response.status}")
+    content_type = response.content_type or "text/html"
+    if "html" not in content_type and "text" not in content_type:
+        return Page(url, depth, response.status, "", [], f"skipped {content_type}")
+    return Page(
+        url, depth, response.status,
+        clean_text(response.text), extract_links(response.text, response.url), None,
+    )
+
+
+def probe_url(url, extract, http_cache=None, session=None, timeout=TIMEOUT):
+    """Fetch, clean and extract a single page.
+
+    ``extract(blocks, passages)`` receives an iterable of cleaned text
+    blocks and a list to append ``(sentence, triples)`` passages to, as
+    ``mosdac.nlp.extract_entities_relations`` does. With an
+    ``HttpCache``, an unchanged page (TTL hit or 304) reuses the
+    stored cleaned text and extraction instead of recomputing them.
+    Returns a ``Probe``; ``text`` is empty unless ``status`` is 200.
+    """
+    session = session or shared_session()
+    response = _get(session, url, timeout, http_cache)
+    if response.status != 200:
+        return Probe(url, response.status, "", CooccurrenceCounts(), [], [], response.outcome)
+    if http_cache is not None and response.outcome != "miss":
+        stored = http_cache.analysis(url)
+        if stored:
+            return Probe(url, response.status, *stored, response.outcome)
+    blocks = []
+
+    def cleaned_blocks():
+        for block in METRICS.timed_iter("clean", iter_clean_blocks(response.text)):
+            blocks.append(block)
+            yield block
+
+    # Extraction consumes blocks while the rest of the page is still being cleaned.
+    passages = []
+    pairs, triples = extract(cleaned_blocks(), passages)
+    text = " ".join(blocks)
+    if http_cache is not None:
+        http_cache.store_analysis(url, text, pairs, triples, passages)
+    return Probe(url, response.status, text, pairs, triples, passages, response.outcome)
+
+
+def iter_crawl(seed, max_depth=MAX_DEPTH, max_pages=MAX_PAGES, workers=WORKERS,
+               per_host=PER_HOST, use_sitemap=False, session=None, timeout=TIMEOUT, http_cache=None):
+    """Yield ``Page`` objects in completion order, breadth-first from ``seed``.
+
+    Pages are fetched and cleaned on a thread pool; links on the seed's
+    site are followed up to ``max_depth`` hops and ``max_pages`` pages in
+    total. Failed fetches are yielded with ``error`` set. Bodies go
+    through ``http_cache`` when one is given.
+    """
+    session = session or make_session(workers)
+    limiter = _HostLimiter(per_host)
+    seed = normalize_url(seed)
+    seen = set()
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def schedule(url, depth):
+            if url in seen or len(seen) >= max_pages or not same_site(url, seed):
+                return
+            seen.add(url)
+            future = pool.submit(fetch_page, session, url, depth, limiter, timeout, http_cache)
+            pending[future] = url
+
+        schedule(seed, 0)
+        if use_sitemap and max_depth > 0:
+            for url in sitemap_urls(session, seed, timeout):
+                schedule(url, 1)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                page = future.result()
+                yield page
+                if page.depth < max_depth:
+                    for link in page.links:
+                        schedule(link, page.depth + 1)
+
+
+def crawl_site(seed, extract, on_page=None, on_extract=None, **crawl_options):
+    """Crawl from ``seed`` and merge every page's extraction into one result.
+
+    ``extract(text, passages)`` maps cleaned text to ``(cooccurrence, triples)``
+    and appends ``(sentence, triples)`` passages, normally
+    ``mosdac.nlp.extract_entities_relations``. It runs in the calling
+    thread as each page arrives, while the pool keeps fetching.
+    ``on_page(page, pages_done)`` is called after each page, and
+    ``on_extract(page, cooccurrence, triples)`` with each page's own
+    extraction before it is merged.
+    Returns ``(pages, cooccurrence, triples, passages)``.
+    """
+    pages = []
+    cooccurrence = CooccurrenceCounts()
+    triples = set()
+    passages = []
+    for page in iter_crawl(seed, **crawl_options):
+        pages.append(page._replace(text=""))
+        if page.text:
+            page_cooccurrence, page_triples = extract(page.text, passages)
+            if on_extract:
+                on_extract(page, page_cooccurrence, page_triples)
+            cooccurrence.update(page_cooccurrence)
+            triples.update(page_triples)
+        if on_page:
+            on_page(page, len(pages))
+    return pages, cooccurrence, list(triples), passages
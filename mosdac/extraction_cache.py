@@ -0,0 +1,124 @@
+"""Disk-backed cache of per-sentence extraction results."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from mosdac.settings import cache_path
+
+MAX_ENTRIES = 200_000
+WINDOW = 512
+
+
+def normalize_sentence(sentence):
+    return " ".join(sentence.split())
+
+
+class ExtractionCache:
+    """SQLite cache of ``(entity_groups, triples)`` keyed by sentence hash and model version.
+
+    Entries are evicted least-recently-used first once the table grows past
+    ``max_entries``. The connection is shared across Streamlit sessions, so
+    every access goes through one lock.
+    """
+
+    def __init__(self, model_version, path=None, max_entries=MAX_ENTRIES):
+        self.model_version = model_version
+        self.path = path or cache_path("extractions.sqlite3")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " key TEXT PRIMARY KEY, entity_groups TEXT NOT NULL, triples TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)")
+        self._conn.commit()
+
+    def key(self, sentence):
+        payload = f"{self.model_version}\0{normalize_sentence(sentence)}"
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Cached results for ``keys``; found entries are marked as recently used."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, entity_groups, triples FROM extractions WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, groups, triples in rows:
+                    found[key] = (json.loads(groups), [tuple(t) for t in json.loads(triples)])
+            now = time.time()
+            self._conn.executemany("UPDATE extractions SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store ``{key: (entity_groups, triples)}`` and evict down to ``max_entries``."""
+        now = time.time()
+        rows = [(key, json.dumps(groups), json.dumps(triples), now) for key, (groups, triples) in items.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)", rows)
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM extractions WHERE key IN"
+                    " (SELECT key FROM extractions ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def extract(self, sentences, extractor, window=WINDOW):
+        """Yield ``(sentence, (entity_groups, triples))``, running ``extractor`` on misses only.
+
+        ``extractor`` takes a list of sentences and yields one result per
+        sentence in order, like ``mosdac.nlp.iter_extractions``.
+        """
+        batch = []
+        for sentence in sentences:
+            batch.append(sentence)
+            if len(batch) >= window:
+                yield from self._extract_window(batch, extractor)
+                batch = []
+        if batch:
+            yield from self._extract_window(batch, extractor)
+
+    def _extract_window(self, sentences, extractor):
+        keys = [self.key(sentence) for sentence in sentences]
+        by_key = dict(zip(keys, sentences))
+        results = self.get_many(list(by_key))
+
+        missing = [key for key in by_key if key not in results]
+        if missing:
+            parsed = dict(zip(missing, extractor([by_key[key] for key in missing])))
+            self.put_many(parsed)
+            results.update(parsed)
+        # Repeated sentences are parsed once but still counted every time.
+        for key, sentence in zip(keys, sentences):
+            yield sentence, results[key]
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM extractions")
+            self._conn.commit()
+            self.hits = self.misses = 0
@@ -0,0 +1,143 @@
+"""Domain gazetteer of MOSDAC satellites, sensors, products and regions."""
+import re
+
+# Category -> surface forms. Matching is case-insensitive; every form is
+# also the lookup key that build_graph uses to type a node. Words that
+# are ordinary English in most sentences ("fog", "depression") are left
+# out; only their specific compounds are listed.
+TERMS = {
+    "SATELLITE": (
+        "INSAT-3D", "INSAT-3DR", "INSAT-3DS", "INSAT-3A", "Kalpana-1",
+        "SCATSAT-1", "Oceansat-1", "Oceansat-2", "Oceansat-3", "EOS-04", "EOS-06",
+        "Megha-Tropiques", "SARAL", "SARAL-AltiKa", "RISAT-1", "Resourcesat-2",
+    ),
+    "SENSOR": (
+        "Imager", "Sounder", "VHRR", "OCM", "OCM-3", "OSCAT", "OSCAT-3", "Scatterometer",
+        "AltiKa", "Altimeter", "MADRAS", "SAPHIR", "ScaRaB", "GNSS-RO", "SSTM",
+        "Doppler Weather Radar", "DWR", "Automatic Weather Station",
+    ),
+    "PRODUCT": (
+        "Sea Surface Temperature", "SST", "Land Surface Temperature", "LST",
+        "Outgoing Longwave Radiation", "OLR", "Total Precipitable Water", "TPW",
+        "Upper Tropospheric Humidity", "UTH", "Cloud Motion Vector", "CMV",
+        "Water Vapour Wind", "Hydro-Estimator", "Quantitative Precipitation Estimate",
+        "Ocean Wind Vector", "Sea Surface Wind", "Significant Wave Height", "Chlorophyll",
+        "Chlorophyll-a", "Aerosol Optical Depth", "Insolation", "Snow Cover", "Soil Moisture",
+        "Potential Fishing Zone", "PFZ", "Ocean State Forecast",
+    ),
+    "OCEAN": (
+        "Bay of Bengal", "Arabian Sea", "Indian Ocean", "North Indian Ocean", "Southern Ocean",
+        "Andaman Sea", "Laccadive Sea", "Gulf of Mannar", "Gulf of Kutch", "Gulf of Khambhat",
+    ),
+    "WEATHER": (
+        "Monsoon", "Southwest Monsoon", "Northeast Monsoon", "Cyclone", "Tropical Cyclone",
+        "Deep Depression", "Western Disturbance", "Thunderstorm", "Heat Wave",
+        "Cold Wave", "Heavy Rainfall", "Storm Surge",
+    ),
+    "LOCATION": (
+        "India", "Indian subcontinent", "Ahmedabad", "Sriharikota", "Himalaya", "Himalayas",
+        "Western Ghats", "Andaman and Nicobar Islands", "Lakshadweep", "Kerala", "Gujarat",
+        "Odisha", "Tamil Nadu", "West Bengal",
+    ),
+}
+
+# Acronyms that are ordinary words or names in other cases ("aws", "Rosa");
+# matched exactly as written.
+CASE_SENSITIVE_TERMS = {
+    "SENSOR": ("AWS", "CCD", "ROSA"),
+}
+
+# Satellite families, matched with or without a number: "Oceansat",
+# "Oceansat 2", "Oceansat-3" and "Oceansat3" are each one mention, so
+# numbered satellites the TERMS don't list still stay distinct.
+SERIES = {
+    "SATELLITE": ("INSAT", "Kalpana", "SCATSAT", "Oceansat", "EOS", "RISAT", "Cartosat", "Resourcesat", "GSAT"),
+}
+# Satellite numbers: "2", "3D", "3DR", "04".
+_NUMBER = r"\d+[a-z]*"
+
+CATEGORIES = tuple(TERMS)
+DEFAULT_CATEGORY = "DEFAULT"
+
+# Fallback for entities spaCy finds that the gazetteer doesn't list,
+# checked in order: the first category with a keyword in the name wins.
+KEYWORDS = (
+    ("SATELLITE", ("satellite", "insat", "scatsat", "oceansat")),
+    ("OCEAN", ("ocean", "sea", "bay", "arabian")),
+    ("PRODUCT", ("temperature", "data")),
+    ("WEATHER", ("weather", "wind", "forecast")),
+    ("LOCATION", ("bengal", "indian", "coast")),
+)
+
+
+def keyword_category(name):
+    """Category guessed from keywords in ``name``."""
+    name = name.lower()
+    for category, words in KEYWORDS:
+        if any(word in name for word in words):
+            return category
+    return DEFAULT_CATEGORY
+
+
+class Gazetteer:
+    """Case-insensitive term -> category table.
+
+    ``patterns`` feeds spaCy's ``entity_ruler`` (a ``PhraseMatcher`` on
+    lower-cased tokens plus token patterns for case-sensitive acronyms
+    and numbered series), so every listed term is found in one pass over
+    the text and labelled with its category. ``category`` types a node
+    with a dict lookup, falling back to ``keyword_category`` for
+    entities that only the statistical NER found.
+    """
+
+    def __init__(self, terms=TERMS, case_sensitive=CASE_SENSITIVE_TERMS, series=SERIES):
+        self.terms = terms
+        self.case_sensitive = case_sensitive
+        self.series = series
+        self.categories = {
+            _lookup_key(term): category
+            for table in (terms, case_sensitive)
+            for category, category_terms in table.items()
+            for term in category_terms
+        }
+        self._series = [
+            (category, re.compile(rf"(?:{'|'.join(map(re.escape, names))})(?:{_NUMBER})?", re.IGNORECASE))
+            for category, names in series.items()
+        ]
+
+    def patterns(self):
+        patterns = [
+            {"label": category, "pattern": term}
+            for category, category_terms in self.terms.items()
+            for term in category_terms
+        ]
+        patterns.extend(
+            {"label": category, "pattern": [{"ORTH": term}]}
+            for category, category_terms in self.case_sensitive.items()
+            for term in category_terms
+        )
+        for category, names in self.series.items():
+            for name in names:
+                lower = name.lower()
+                patterns.extend((
+                    # "Oceansat" and "Oceansat 2"; the ruler keeps the longest match.
+                    {"label": category, "pattern": [{"LOWER": lower}, {"LOWER": {"REGEX": f"^{_NUMBER}$"}, "OP": "?"}]},
+                    # "Oceansat-2" and "Oceansat2" are single tokens.
+                    {"label": category, "pattern": [{"LOWER": {"REGEX": f"^{re.escape(lower)}-?{_NUMBER}$"}}]},
+                ))
+        return patterns
+
+    def category(self, name):
+        key = _lookup_key(name)
+        category = self.categories.get(key)
+        if category is None:
+            category = next((category for category, series in self._series if series.fullmatch(key)), None)
+        return category or keyword_category(name.strip().lower())
+
+
+def _lookup_key(name):
+    # "INSAT 3D", "INSAT-3D" and "insat3d" are one term.
+    return re.sub(r"[\s-]+", "", name.strip().lower())
+
+
+GAZETTEER = Gazetteer()
@@ -0,0 +1,25 @@
+"""Knowledge graph construction."""
+import networkx as nx
+
+from mosdac.gazetteer import GAZETTEER
+from mosdac.metrics import METRICS
+
+
+def build_graph(cooccurrence, triples, min_count=1, gazetteer=GAZETTEER):
+    """Directed graph of co-occurrence and relation edges.
+
+    Co-occurrence edges are labelled "related" and weighted by how many
+    sentences the pair shared; pairs seen fewer than ``min_count`` times
+    are pruned. Relation triples relabel an existing edge or add a new one.
+    Every node gets a ``category`` attribute from ``gazetteer``.
+    """
+    with METRICS.stage("graph") as span:
+        G = nx.DiGraph()
+        G.add_edges_from(
+            (a, b, {"label": "related", "weight": count})
+            for a, b, count in cooccurrence.weighted_pairs(min_count)
+        )
+        G.add_edges_from((a, b, {"label": rel}) for a, rel, b in triples)
+        nx.set_node_attributes(G, {node: gazetteer.category(node) for node in G}, "category")
+        span.add(nodes=G.number_of_nodes(), edges=G.number_of_edges())
+    return G
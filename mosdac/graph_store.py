@@ -0,0 +1,226 @@
+"""Persistent knowledge graph accumulated across analyses."""
+import sqlite3
+import threading
+import time
+
+import networkx as nx
+
+from mosdac.canonical import Canonicalizer
+from mosdac.gazetteer import GAZETTEER
+from mosdac.settings import cache_path
+
+MAX_EDGES = 500
+HOPS = 1
+# Keeps "IN (...)" lists under SQLite's default bound-parameter limit.
+BATCH = 500
+
+
+def _batches(items, size=BATCH):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class GraphStore:
+    """SQLite knowledge graph that every analysis is merged into.
+
+    Entity names are stored once in ``nodes`` with their gazetteer
+    category. An ``edges`` row holds one ``(subject, relation, object)``
+    as contributed by one source (URL or file name) with its count:
+    co-occurrence edges are labelled "related" and counted per sentence,
+    relation triples count once. Merging a source again replaces its
+    previous rows, so re-probing a page updates its edges instead of
+    double counting. Edge weights are summed over sources when a
+    subgraph is loaded, so nothing is rebuilt in memory up front.
+
+    Node names are canonical (see ``mosdac.canonical``): a merged name
+    whose canonical key matches a stored node is stored under that
+    node's name, so analyses that settled on different spellings still
+    share nodes. The raw surface forms each analysis mapped to a node are
+    kept in ``mentions`` as provenance.
+    """
+
+    def __init__(self, path=None, gazetteer=GAZETTEER, canonicalizer=None):
+        self.path = path or cache_path("graph.sqlite3")
+        self.gazetteer = gazetteer
+        # Only resolves names against the stored nodes; analyses bring their own.
+        self.canonicalizer = canonicalizer or Canonicalizer(gazetteer)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS nodes ("
+            " id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, category TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS nodes_name_nocase ON nodes (name COLLATE NOCASE);"
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " id INTEGER PRIMARY KEY, source TEXT NOT NULL UNIQUE, merged_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS edges ("
+            " subject INTEGER NOT NULL, relation TEXT NOT NULL, object INTEGER NOT NULL,"
+            " source INTEGER NOT NULL, count INTEGER NOT NULL,"
+            " PRIMARY KEY (subject, relation, object, source)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS edges_object ON edges (object);"
+            "CREATE INDEX IF NOT EXISTS edges_relation ON edges (relation);"
+            "CREATE INDEX IF NOT EXISTS edges_source ON edges (source);"
+            "CREATE TABLE IF NOT EXISTS mentions ("
+            " node INTEGER NOT NULL, surface TEXT NOT NULL, count INTEGER NOT NULL,"
+            " PRIMARY KEY (node, surface)) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+        # Variants seen after a restart keep merging into the nodes already stored.
+        self.canonicalizer.prefer(name for (name,) in self._conn.execute("SELECT name FROM nodes"))
+
+    def _canonical(self, name):
+        # Lets "INSAT 3D" find the node stored as "INSAT-3D".
+        return self.canonicalizer.lookup(name)
+
+    def _node_ids(self, names):
+        ids = {}
+        for batch in _batches(names):
+            ids.update(self._conn.execute(
+                f"SELECT name, id FROM nodes WHERE name IN ({','.join('?' * len(batch))})", batch
+            ))
+        return ids
+
+    def merge(self, source, cooccurrence, triples, mentions=None):
+        """Replace ``source``'s contribution with ``(cooccurrence, triples)``.
+
+        ``mentions`` maps names to a ``Counter`` of their surface forms, as
+        ``Canonicalizer.mentions`` returns.
+        """
+        with self._lock:
+            resolved = {}
+
+            def node(name):
+                if name not in resolved:
+                    resolved[name] = self._canonical(name)
+                return resolved[name]
+
+            rows = [(node(a), "related", node(b), count) for a, b, count in cooccurrence.weighted_pairs()]
+            rows.extend((node(s), r, node(o), 1) for s, r, o in triples)
+            names = {name for a, _, b, _ in rows for name in (a, b)}
+            self.canonicalizer.prefer(names)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sources (source, merged_at) VALUES (?, ?)"
+                " ON CONFLICT (source) DO UPDATE SET merged_at = excluded.merged_at",
+                (source, time.time()),
+            )
+            (source_id,) = self._conn.execute("SELECT id FROM sources WHERE source = ?", (source,)).fetchone()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO nodes (name, category) VALUES (?, ?)",
+                ((name, self.gazetteer.category(name)) for name in names),
+            )
+            ids = self._node_ids(names)
+            self._conn.execute("DELETE FROM edges WHERE source = ?", (source_id,))
+            self._conn.executemany(
+                "INSERT INTO edges (subject, relation, object, source, count) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (subject, relation, object, source) DO UPDATE SET count = count + excluded.count",
+                ((ids[a], relation, ids[b], source_id, count) for a, relation, b, count in rows),
+            )
+            self._conn.executemany(
+                "INSERT INTO mentions (node, surface, count) VALUES (?, ?, ?)"
+                " ON CONFLICT (node, surface) DO UPDATE SET count = MAX(count, excluded.count)",
+                (
+                    (ids[resolved[name]], surface, count)
+                    for name, forms in (mentions or {}).items() if resolved.get(name) in ids
+                    for surface, count in forms.items()
+                ),
+            )
+
+    def subgraph(self, seeds=None, hops=HOPS, max_edges=MAX_EDGES):
+        """``nx.DiGraph`` around ``seeds`` (entity names, case-insensitive), like ``build_graph``'s.
+
+        Follows edges in both directions up to ``hops`` away, heaviest
+        first, until ``max_edges`` are loaded. Without seeds, the
+        ``max_edges`` heaviest edges of the whole store are loaded.
+        """
+        with self._lock:
+            if seeds is None:
+                edges = self._conn.execute(
+                    "SELECT subject, relation, object, SUM(count) AS weight FROM edges"
+                    " GROUP BY subject, relation, object ORDER BY weight DESC LIMIT ?",
+                    (max_edges,),
+                ).fetchall()
+            else:
+                edges = self._neighbourhood(seeds, hops, max_edges)
+            node_ids = {node for s, _, o, _ in edges for node in (s, o)}
+            nodes = {}
+            for batch in _batches(node_ids):
+                nodes.update(
+                    (node_id, (name, category)) for node_id, name, category in self._conn.execute(
+                        f"SELECT id, name, category FROM nodes WHERE id IN ({','.join('?' * len(batch))})", batch
+                    )
+                )
+
+        G = nx.DiGraph()
+        G.add_nodes_from((name, {"category": category}) for name, category in nodes.values())
+        # Same precedence as build_graph: relation labels override "related".
+        G.add_edges_from(
+            (nodes[s][0], nodes[o][0], {"label": relation, "weight": weight})
+            for s, relation, o, weight in edges if relation == "related"
+        )
+        G.add_edges_from(
+            (nodes[s][0], nodes[o][0], {"label": relation})
+            for s, relation, o, _ in edges if relation != "related"
+        )
+        return G
+
+    def _neighbourhood(self, seeds, hops, max_edges):
+        frontier = set()
+        for seed in seeds:
+            frontier.update(
+                node_id for (node_id,) in
+                self._conn.execute("SELECT id FROM nodes WHERE name = ? COLLATE NOCASE", (self._canonical(seed),))
+            )
+        seen = set(frontier)
+        edges = {}
+        for _ in range(hops):
+            if not frontier or len(edges) >= max_edges:
+                break
+            found = []
+            for batch in _batches(frontier):
+                marks = ",".join("?" * len(batch))
+                found.extend(self._conn.execute(
+                    "SELECT subject, relation, object, SUM(count) AS weight FROM edges"
+                    f" WHERE subject IN ({marks}) OR object IN ({marks})"
+                    " GROUP BY subject, relation, object",
+                    batch + batch,
+                ))
+            found.sort(key=lambda edge: -edge[3])
+            frontier = set()
+            for s, relation, o, weight in found:
+                if len(edges) >= max_edges:
+                    break
+                edges.setdefault((s, relation, o), weight)
+                frontier.update(node for node in (s, o) if node not in seen)
+            seen |= frontier
+        return [(s, relation, o, weight) for (s, relation, o), weight in edges.items()]
+
+    def provenance(self, name):
+        """``(source, merged_at, count)`` of every source mentioning ``name``, newest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT sources.source, sources.merged_at, SUM(edges.count) FROM nodes"
+                " JOIN edges ON edges.subject = nodes.id OR edges.object = nodes.id"
+                " JOIN sources ON sources.id = edges.source"
+                " WHERE nodes.name = ? COLLATE NOCASE"
+                " GROUP BY sources.id ORDER BY sources.merged_at DESC",
+                (self._canonical(name),),
+            ).fetchall()
+
+    def surface_forms(self, name):
+        """``(surface, count)`` of the raw mentions merged into the node ``name``, most frequent first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT mentions.surface, mentions.count FROM nodes"
+                " JOIN mentions ON mentions.node = nodes.id"
+                " WHERE nodes.name = ? COLLATE NOCASE ORDER BY mentions.count DESC",
+                (self._canonical(name),),
+            ).fetchall()
+
+    def stats(self):
+        with self._lock:
+            counts = [
+                self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("nodes", "edges", "sources")
+            ]
+        return dict(zip(("nodes", "edges", "sources"), counts))
@@ -0,0 +1,171 @@
+"""Disk-backed HTTP cache with ETag/Last-Modified revalidation."""
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import requests
+
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.settings import cache_path
+
+# Seconds a stored page is served without contacting the server at all.
+# 0 always revalidates; None never expires, for fully offline reuse.
+TTL = 300
+MAX_ENTRIES = 5_000
+
+HttpResult = namedtuple("HttpResult", "url status text content_type outcome")
+
+
+class HttpCache:
+    """SQLite store of page bodies, validators and the analysis derived from them.
+
+    ``get`` answers from the store while an entry is younger than ``ttl``,
+    otherwise sends ``If-None-Match``/``If-Modified-Since`` and reuses the
+    stored body on ``304 Not Modified``. When the server is unreachable a
+    stored body is served stale rather than failing. Outcomes are counted
+    as ``hits`` (no request), ``revalidated`` (304), ``stale`` (network
+    error) and ``misses`` (full download), under the same lock as the
+    store since every session shares one cache.
+
+    Cleaned text, extraction results and passages are stored per URL under
+    ``analysis_version`` and dropped whenever a new body is downloaded.
+    """
+
+    def __init__(self, analysis_version, path=None, ttl=TTL, max_entries=MAX_ENTRIES):
+        self.analysis_version = analysis_version
+        self.path = path or cache_path("http.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.revalidated = 0
+        self.stale = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, final_url TEXT NOT NULL, body TEXT NOT NULL,"
+            " content_type TEXT, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL,"
+            " analysis_version TEXT, cleaned TEXT, pairs TEXT, triples TEXT, passages TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "passages" not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN passages TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)")
+        self._conn.commit()
+
+    def _row(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT final_url, body, content_type, etag, last_modified, fetched_at"
+                " FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def get(self, session, url, timeout=10):
+        row = self._row(url)
+        if row:
+            final_url, body, content_type, etag, last_modified, fetched_at = row
+            cached = HttpResult(final_url, 200, body, content_type, None)
+            if self.ttl is None or time.time() - fetched_at < self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return cached._replace(outcome="hit")
+
+        headers = {}
+        if row and etag:
+            headers["If-None-Match"] = etag
+        if row and last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            if not row:
+                raise
+            with self._lock:
+                self.stale += 1
+            return cached._replace(outcome="stale")
+
+        if response.status_code == 304:
+            if row:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE responses SET fetched_at = ?, etag = COALESCE(?, etag),"
+                        " last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                        (time.time(), response.headers.get("ETag"), response.headers.get("Last-Modified"), url),
+                    )
+                    self._conn.commit()
+                    self.revalidated += 1
+                return cached._replace(outcome="revalidated")
+            # Nothing stored to reuse (a proxy or session cache answered for us): ask again for the body.
+            response = session.get(url, headers={"Cache-Control": "no-cache"}, timeout=timeout)
+
+        with self._lock:
+            self.misses += 1
+        content_type = response.headers.get("Content-Type", "text/html")
+        if response.status_code == 200:
+            self._store(url, response, content_type)
+        return HttpResult(response.url, response.status_code, response.text, content_type, "miss")
+
+    def _store(self, url, response, content_type):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (url, final_url, body, content_type, etag, last_modified, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url, response.url, response.text, content_type,
+                    response.headers.get("ETag"), response.headers.get("Last-Modified"), time.time(),
+                ),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE url IN"
+                    " (SELECT url FROM responses ORDER BY fetched_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def analysis(self, url):
+        """Stored ``(cleaned, pairs, triples, passages)`` for the current body of ``url``, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cleaned, pairs, triples, passages FROM responses"
+                " WHERE url = ? AND analysis_version = ?",
+                (url, self.analysis_version),
+            ).fetchone()
+        if not row or row[0] is None or row[3] is None:
+            return None
+        cleaned, pairs, triples, passages = row
+        return (
+            cleaned,
+            CooccurrenceCounts.from_dict(json.loads(pairs)),
+            [tuple(t) for t in json.loads(triples)],
+            [(sentence, [tuple(t) for t in sentence_triples]) for sentence, sentence_triples in json.loads(passages)],
+        )
+
+    def store_analysis(self, url, cleaned, pairs, triples, passages):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET analysis_version = ?, cleaned = ?, pairs = ?, triples = ?, passages = ?"
+                " WHERE url = ?",
+                (
+                    self.analysis_version, cleaned, json.dumps(pairs.to_dict()),
+                    json.dumps(triples), json.dumps(passages), url,
+                ),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "stale": self.stale,
+                "misses": self.misses,
+                "entries": entries,
+            }
@@ -0,0 +1,187 @@
+"""Streaming ingestion of uploaded pages and archives of pages.
+
+Uploads are read in ``READ_BYTES`` pieces, decoded incrementally with a
+detected encoding and cleaned block by block, so extraction starts on
+the first blocks and no full decoded or cleaned copy of the payload is
+ever held. ``.zip``, ``.tar``, ``.tar.gz``/``.tgz`` and ``.gz`` uploads
+are unpacked member by member the same way.
+"""
+import codecs
+import gzip
+import re
+import tarfile
+import zipfile
+from itertools import chain
+
+from mosdac.cleaning import BLOCK_CHARS, iter_clean_blocks, normalize_text
+from mosdac.metrics import METRICS
+
+try:
+    import charset_normalizer
+except ImportError:  # pragma: no cover - charset_normalizer is optional
+    charset_normalizer = None
+
+READ_BYTES = 64 * 1024
+# Bytes looked at to detect the encoding and whether a .txt file is really HTML.
+SNIFF_BYTES = 16 * 1024
+TEXT_SUFFIXES = (".html", ".htm", ".txt")
+HTML_SUFFIXES = (".html", ".htm")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz")
+FALLBACK_ENCODING = "cp1252"
+PREVIEW_WORDS = 500
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+_HTML_START = re.compile(r"\s*<(?:!doctype|html|head|body|\?xml|!--)", re.IGNORECASE)
+_TEXT_BREAK = re.compile(r"\n|[.!?]\s")
+
+
+class UnreadableUpload(Exception):
+    """The upload looked like an archive but could not be unpacked."""
+
+    def __init__(self, name, reason):
+        super().__init__(f"{name} could not be unpacked: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+def is_archive(name):
+    return name.lower().endswith((".zip", ".gz") + TAR_SUFFIXES)
+
+
+def detect_encoding(head):
+    """Encoding of a document starting with the bytes ``head``.
+
+    A byte-order mark wins, then an HTML ``<meta charset>``, then UTF-8
+    if ``head`` is valid UTF-8, then ``charset_normalizer``'s guess when
+    it is installed, and finally cp1252.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = _META_CHARSET.search(head)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    try:
+        # Not final: ``head`` may end in the middle of a multi-byte character.
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(head).best()
+        if best is not None:
+            return best.encoding
+    return FALLBACK_ENCODING
+
+
+def iter_decoded(stream, read_bytes=READ_BYTES):
+    """Decode a binary ``stream`` piece by piece, detecting its encoding from the first bytes."""
+    head = stream.read(max(read_bytes, SNIFF_BYTES))
+    decoder = codecs.getincrementaldecoder(detect_encoding(head))(errors="replace")
+    data = head
+    while data:
+        text = decoder.decode(data)
+        if text:
+            yield text
+        data = stream.read(read_bytes)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_text_blocks(pieces, block_chars=BLOCK_CHARS):
+    """Normalized blocks of plain text, cut at line or sentence breaks where possible."""
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        start = 0
+        while len(buffer) - start >= block_chars:
+            limit = start + block_chars
+            cut = max((match.end() for match in _TEXT_BREAK.finditer(buffer, start, limit)), default=0)
+            if cut <= start:
+                cut = buffer.rfind(" ", start, limit) + 1
+            if cut <= start:
+                cut = limit
+            block = normalize_text(buffer[start:cut])
+            if block.strip():
+                yield block
+            start = cut
+        buffer = buffer[start:]
+    block = normalize_text(buffer)
+    if block.strip():
+        yield block
+
+
+def iter_member_blocks(stream, name, block_chars=BLOCK_CHARS):
+    """Cleaned text blocks of one page; ``.txt`` files that are really HTML are cleaned as HTML."""
+    pieces = iter_decoded(stream)
+    first = next(pieces, "")
+    html = name.lower().endswith(HTML_SUFFIXES) or bool(_HTML_START.match(first))
+    clean = iter_clean_blocks if html else iter_text_blocks
+    yield from clean(chain([first], pieces), block_chars)
+
+
+def iter_members(upload, name):
+    """Yield ``(member_name, binary stream)`` for every page in the upload.
+
+    ``upload`` is a binary file object named ``name``. Archives yield
+    their ``.html``/``.htm``/``.txt`` members in archive order; anything
+    else is a single page. Each stream must be consumed before the next
+    member is requested.
+    """
+    lower = name.lower()
+    if lower.endswith(".zip"):
+        with zipfile.ZipFile(upload) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(TEXT_SUFFIXES):
+                    with archive.open(info) as member:
+                        yield info.filename, member
+    elif lower.endswith(TAR_SUFFIXES):
+        # Stream mode reads the archive front to back without seeking.
+        with tarfile.open(fileobj=upload, mode="r|*") as archive:
+            for info in archive:
+                if info.isfile() and info.name.lower().endswith(TEXT_SUFFIXES):
+                    member = archive.extractfile(info)
+                    if member is not None:
+                        yield info.name, member
+    elif lower.endswith(".gz"):
+        with gzip.GzipFile(fileobj=upload) as member:
+            yield name[:-3], member
+    else:
+        yield name, upload
+
+
+def _unpacking(name, items):
+    # Corrupt archives only fail once the damaged part is read.
+    try:
+        yield from items
+    except (zipfile.BadZipFile, tarfile.TarError, gzip.BadGzipFile, EOFError) as error:
+        raise UnreadableUpload(name, error) from error
+
+
+def iter_upload(upload, name, block_chars=BLOCK_CHARS):
+    """Yield ``(member_name, blocks)`` for each page, ``blocks`` being its cleaned text blocks."""
+    for member_name, stream in _unpacking(name, iter_members(upload, name)):
+        blocks = iter_member_blocks(stream, member_name, block_chars)
+        yield member_name, _unpacking(name, METRICS.timed_iter("clean", blocks))
+
+
+def preview(upload, name, words=PREVIEW_WORDS):
+    """The first ``words`` words of the upload's cleaned text, reading no further than needed."""
+    collected = []
+    for _, blocks in iter_upload(upload, name):
+        for block in blocks:
+            collected.extend(block.split()[:words - len(collected)])
+            if len(collected) >= words:
+                return " ".join(collected)
+    return " ".join(collected)
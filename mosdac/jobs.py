@@ -0,0 +1,137 @@
+"""Background jobs shared by every Streamlit session."""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+WORKERS = 4
+# Finished jobs kept for sessions that haven't collected their result yet.
+KEEP_FINISHED = 200
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its cancellation has been requested."""
+
+
+class Job:
+    """One unit of background work and what the UI may poll about it.
+
+    The job function receives the ``Job`` and calls ``report`` at stage
+    boundaries and ``check`` (or iterates through ``track``) in long
+    loops; both raise ``JobCancelled`` after ``cancel``. Text streamed by
+    the job goes to ``partial``.
+    """
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = None
+        self.detail = ""
+        self.partial = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def report(self, stage, progress=None, detail=""):
+        """Enter ``stage``; ``progress`` is a 0-1 fraction or None if unknown."""
+        self.check()
+        self.stage, self.progress, self.detail = stage, progress, detail
+
+    def track(self, items, stage=None):
+        """Iterate ``items``, checking for cancellation before each one."""
+        if stage:
+            self.report(stage)
+        for item in items:
+            self.check()
+            yield item
+
+    def cancel(self):
+        self._cancel.set()
+        # A job that never started is finished right away.
+        if self._future is not None and self._future.cancel():
+            self._finish(CANCELLED)
+
+    def _finish(self, status):
+        self.status = self.stage = status
+        self.finished_at = time.time()
+
+
+class JobManager:
+    """Thread pool running jobs for every session, with jobs looked up by id.
+
+    Jobs outlive the script run that submitted them, so a rerun only has
+    to keep the job id to poll progress or collect the result.
+    """
+
+    def __init__(self, workers=WORKERS, keep_finished=KEEP_FINISHED):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mosdac-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Run ``fn(job, *args, **kwargs)`` in the background and return its ``Job``."""
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancelled:
+            job._finish(CANCELLED)
+            return
+        job.status = RUNNING
+        try:
+            job.result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as error:
+            job.error = error
+            job._finish(FAILED)
+        else:
+            job._finish(CANCELLED if job.cancelled else DONE)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def active(self):
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.finished]
@@ -0,0 +1,70 @@
+"""Inverted index over triples for the knowledge base chat."""
+import math
+import re
+from collections import defaultdict
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words too common to say anything about which triple a question is about.
+# Relations made only of these (e.g. "be", "have") can never match alone.
+STOPWORDS = frozenset((
+    "a", "about", "all", "an", "and", "any", "are", "as", "at", "be", "by", "can",
+    "do", "does", "for", "from", "get", "has", "have", "how", "i", "in", "into",
+    "is", "it", "its", "me", "mentioned", "of", "on", "or", "related", "show",
+    "tell", "that", "the", "their", "them", "there", "these", "they", "this",
+    "to", "was", "what", "when", "where", "which", "who", "why", "with", "you",
+))
+
+# Matching the subject or object says more than matching the verb.
+FIELD_WEIGHTS = (2.0, 1.0, 2.0)
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class TripleIndex:
+    """Maps subject/relation/object tokens to the triples containing them.
+
+    A field matches a query when every one of its (non-stopword) tokens
+    appears in the query, the token-level version of the old substring
+    test. Triples are ranked by the IDF-weighted tokens of their matched
+    fields, so a lookup costs only the postings of the query's tokens.
+    """
+
+    def __init__(self, triples):
+        self.triples = list(triples)
+        self._postings = defaultdict(list)
+        self._field_sizes = []
+        for triple_id, triple in enumerate(self.triples):
+            sizes = []
+            for field, value in enumerate(triple):
+                tokens = set(tokenize(value))
+                sizes.append(len(tokens))
+                for token in tokens:
+                    self._postings[token].append((triple_id, field))
+            self._field_sizes.append(sizes)
+        count = len(self.triples) or 1
+        self._idf = {
+            token: math.log(1 + count / len({triple_id for triple_id, _ in postings}))
+            for token, postings in self._postings.items()
+        }
+
+    def __len__(self):
+        return len(self.triples)
+
+    def search(self, query):
+        """Triples with a field fully contained in ``query``, best first."""
+        hits = defaultdict(int)
+        weights = defaultdict(float)
+        for token in set(tokenize(query)):
+            for triple_id, field in self._postings.get(token, ()):
+                hits[triple_id, field] += 1
+                weights[triple_id, field] += self._idf[token]
+
+        scores = defaultdict(float)
+        for (triple_id, field), count in hits.items():
+            if count == self._field_sizes[triple_id][field]:
+                scores[triple_id] += FIELD_WEIGHTS[field] * weights[triple_id, field]
+        ranked = sorted(scores, key=lambda triple_id: (-scores[triple_id], triple_id))
+        return [self.triples[triple_id] for triple_id in ranked]
@@ -0,0 +1,258 @@
+"""Per-stage timing, memory and size counters shared by every session.
+
+Each timed stage becomes one record: wall-clock seconds, the process's
+resident memory before and after, and whatever sizes the stage reports
+(bytes, sentences, entities, edges, ...). Records are aggregated for the
+app's performance panel, exported as Prometheus text and logged as one
+JSON line each on the ``mosdac.metrics`` logger at INFO level.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RECENT = 500
+
+logger = logging.getLogger("mosdac.metrics")
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def resident_memory():
+    """Resident set size of this process in bytes, or None without ``/proc``."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Span:
+    """One running stage; ``add`` accumulates its size counters."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.sizes = defaultdict(int)
+        self.error = None
+        # Seconds spent inside lazily produced input (see ``Metrics.timed_iter``).
+        self.excluded = 0.0
+
+    def add(self, **sizes):
+        for name, value in sizes.items():
+            self.sizes[name] += value
+
+
+class _Totals:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.sizes = defaultdict(int)
+
+
+class Metrics:
+    """Thread-safe registry of stage records.
+
+    Stages run in job threads, crawler threads and the script thread at
+    once; one lock guards the aggregates and the ``recent`` records.
+    Stages may nest (drawing includes layout and rendering), and each
+    records its own wall-clock time including what it called.
+    """
+
+    def __init__(self, recent=RECENT):
+        self.recent = deque(maxlen=recent)
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name):
+        """Time the ``with`` block as stage ``name``; yields its ``Span``."""
+        span = Span(name)
+        stack = self._stack()
+        stack.append(span)
+        rss_before = resident_memory()
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as error:
+            span.error = type(error).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            self._record(span, elapsed - span.excluded, rss_before)
+
+    def timed_iter(self, name, items, size=len):
+        """Yield from ``items``, timing the production of each item as stage ``name``.
+
+        For input produced lazily while another stage consumes it, such as
+        cleaned blocks streamed into extraction: the time spent producing
+        items is recorded once under ``name`` and left out of the consuming
+        stage. ``size(item)`` is summed as the ``chars`` counter.
+        """
+        span = Span(name)
+        rss_before = resident_memory()
+        elapsed = 0.0
+        iterator = iter(items)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    spent = time.perf_counter() - start
+                    elapsed += spent
+                    stack = self._stack()
+                    if stack:
+                        stack[-1].excluded += spent
+                span.add(chars=size(item))
+                yield item
+        except BaseException as error:
+            span.error = type(error).__name__
+            raise
+        finally:
+            self._record(span, elapsed, rss_before)
+
+    def _record(self, span, seconds, rss_before):
+        rss_after = resident_memory()
+        record = {"stage": span.stage, "seconds": round(seconds, 6), "time": time.time(), **span.sizes}
+        if rss_after is not None and rss_before is not None:
+            record["rss_bytes"] = rss_after
+            record["rss_delta_bytes"] = rss_after - rss_before
+        if span.error:
+            record["error"] = span.error
+        with self._lock:
+            totals = self._totals.get(span.stage)
+            if totals is None:
+                totals = self._totals[span.stage] = _Totals()
+            totals.count += 1
+            totals.errors += span.error is not None
+            totals.seconds += seconds
+            totals.max_seconds = max(totals.max_seconds, seconds)
+            totals.last_seconds = seconds
+            bucket = bisect.bisect_left(BUCKETS, seconds)
+            if bucket < len(BUCKETS):
+                totals.buckets[bucket] += 1
+            for name, value in span.sizes.items():
+                totals.sizes[name] += value
+            self.recent.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record))
+
+    def summary(self):
+        """One dict per stage: counts, seconds and summed sizes."""
+        with self._lock:
+            return [
+                {
+                    "stage": name,
+                    "count": totals.count,
+                    "errors": totals.errors,
+                    "total_seconds": round(totals.seconds, 4),
+                    "mean_seconds": round(totals.seconds / totals.count, 4),
+                    "max_seconds": round(totals.max_seconds, 4),
+                    "last_seconds": round(totals.last_seconds, 4),
+                    **totals.sizes,
+                }
+                for name, totals in sorted(self._totals.items())
+            ]
+
+    def records(self, limit=None):
+        """The most recent records, newest first."""
+        with self._lock:
+            records = list(self.recent)
+        records.reverse()
+        return records[:limit] if limit else records
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self.recent.clear()
+
+    def prometheus_text(self):
+        """All aggregates in the Prometheus text exposition format."""
+        lines = [
+            "# HELP mosdac_stage_seconds Wall-clock seconds per pipeline stage.",
+            "# TYPE mosdac_stage_seconds histogram",
+        ]
+        with self._lock:
+            totals = sorted(self._totals.items())
+            for name, stage in totals:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stage.buckets):
+                    cumulative += count
+                    lines.append(f'mosdac_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'mosdac_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {stage.count}')
+                lines.append(f'mosdac_stage_seconds_sum{{stage="{name}"}} {stage.seconds:.6f}')
+                lines.append(f'mosdac_stage_seconds_count{{stage="{name}"}} {stage.count}')
+            lines += [
+                "# HELP mosdac_stage_errors_total Stage runs that raised.",
+                "# TYPE mosdac_stage_errors_total counter",
+            ]
+            lines += [f'mosdac_stage_errors_total{{stage="{name}"}} {stage.errors}' for name, stage in totals]
+            lines += [
+                "# HELP mosdac_stage_items_total Sizes reported by each stage (bytes, sentences, entities, ...).",
+                "# TYPE mosdac_stage_items_total counter",
+            ]
+            lines += [
+                f'mosdac_stage_items_total{{stage="{name}",item="{item}"}} {value}'
+                for name, stage in totals for item, value in sorted(stage.sizes.items())
+            ]
+        rss = resident_memory()
+        if rss is not None:
+            lines += [
+                "# HELP mosdac_resident_memory_bytes Resident set size of the app process.",
+                "# TYPE mosdac_resident_memory_bytes gauge",
+                f"mosdac_resident_memory_bytes {rss}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def serve_metrics(port, host="0.0.0.0", metrics=METRICS):
+    """Serve ``metrics.prometheus_text()`` at ``/metrics`` from a daemon thread.
+
+    Returns the running ``ThreadingHTTPServer``.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="mosdac-metrics", daemon=True).start()
+    return server
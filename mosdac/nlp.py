@@ -0,0 +1,279 @@
+"""spaCy model loading and entity/relation extraction."""
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+
+import spacy
+
+from mosdac.canonical import Canonicalizer
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.gazetteer import CATEGORIES, GAZETTEER
+from mosdac.metrics import METRICS
+from mosdac.relations import doc_relations
+
+MODEL_NAME = "en_core_web_sm"
+
+# extract_entities_relations reads sent.ents (ner), dep_ and sentence
+# boundaries (parser), pos_ (tagger, attribute_ruler) and lemma_
+# (lemmatizer). tok2vec stays because the parser and tagger depend on it.
+REQUIRED_COMPONENTS = ("tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner")
+
+# Bump when the relation patterns or the gazetteer change so cached
+# extractions are not reused.
+EXTRACTOR_VERSION = 6
+
+# Generic NER labels plus the gazetteer categories set by the entity ruler.
+ENTITY_LABELS = ("ORG", "PERSON", "GPE", "LOC", "PRODUCT", "EVENT") + CATEGORIES
+
+# Chunks stay far below spaCy's max_length (1,000,000 chars) so that the
+# parser's peak memory is bounded by the chunk, not the document.
+CHUNK_CHARS = 20_000
+BATCH_SIZE = 16
+N_PROCESS = 1
+
+_BOUNDARY = re.compile(r"\n\s*\n|(?<=[.!?])\s+")
+
+
+def excluded_components(model_name=MODEL_NAME):
+    """Components shipped with the model that extraction never uses."""
+    meta = spacy.info(model_name, silent=True)
+    components = meta.get("components") or meta.get("pipeline", [])
+    return [name for name in components if name not in REQUIRED_COMPONENTS]
+
+
+@lru_cache(maxsize=None)
+def load_nlp(model_name=MODEL_NAME):
+    """Load the pruned pipeline once per process, on first use.
+
+    An ``entity_ruler`` ahead of ``ner`` tags gazetteer terms with their
+    domain category; ``ner`` keeps those spans and fills in the rest.
+    """
+    nlp = spacy.load(model_name, exclude=excluded_components(model_name))
+    add_gazetteer(nlp)
+    return nlp
+
+
+def add_gazetteer(nlp, gazetteer=GAZETTEER):
+    placement = {"before": "ner"} if "ner" in nlp.pipe_names else {}
+    ruler = nlp.add_pipe(
+        "entity_ruler", config={"phrase_matcher_attr": "LOWER", "overwrite_ents": True}, **placement
+    )
+    ruler.add_patterns(gazetteer.patterns())
+    return ruler
+
+
+def model_version(model_name=MODEL_NAME):
+    """Identifies extraction output; cached results from other versions are ignored."""
+    meta = spacy.info(model_name, silent=True)
+    return f"{EXTRACTOR_VERSION}/{spacy.__version__}/{meta['name']}-{meta['version']}"
+
+
+def _split_long(piece, max_chars):
+    """Hard-split a boundary-less run of text on whitespace."""
+    start = 0
+    while len(piece) - start > max_chars:
+        cut = piece.rfind(" ", start, start + max_chars)
+        if cut <= start:
+            cut = start + max_chars
+        yield piece[start:cut]
+        start = cut
+    yield piece[start:]
+
+
+def _iter_pieces(text, max_chars):
+    """Paragraph/sentence pieces of ``text``, none longer than ``max_chars``."""
+    start = 0
+    for end in chain((m.end() for m in _BOUNDARY.finditer(text)), [len(text)]):
+        piece = text[start:end]
+        start = end
+        if not piece.strip():
+            continue
+        if len(piece) > max_chars:
+            yield from _split_long(piece, max_chars)
+        else:
+            yield piece
+
+
+def _iter_text_pieces(text, max_chars):
+    """Pieces of a string, or of each block of an iterable of text blocks."""
+    if isinstance(text, str):
+        yield from _iter_pieces(text, max_chars)
+        return
+    for block in text:
+        # Blocks are joined back together, so keep them word-separated.
+        if not block[-1:].isspace():
+            block += " "
+        yield from _iter_pieces(block, max_chars)
+
+
+def iter_chunks(text, max_chars=CHUNK_CHARS):
+    """Yield pieces of ``text`` no longer than ``max_chars``.
+
+    ``text`` is a string or an iterable of text blocks, such as
+    ``mosdac.cleaning.iter_clean_blocks``. Chunks are cut on paragraph or
+    sentence boundaries where possible, so a sentence is never split
+    across two spaCy docs unless it is itself longer than ``max_chars``.
+    """
+    buffer = []
+    size = 0
+    for piece in _iter_text_pieces(text, max_chars):
+        if size + len(piece) > max_chars and buffer:
+            yield "".join(buffer)
+            buffer, size = [], 0
+        buffer.append(piece)
+        size += len(piece)
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_sentences(text, max_chars=CHUNK_CHARS):
+    """Sentence-sized pieces of ``text``, the unit the extraction cache keys on."""
+    for piece in _iter_text_pieces(text, max_chars):
+        piece = piece.strip()
+        if piece:
+            yield piece
+
+
+def iter_sentence_entities(doc):
+    """``(sent, ents)`` for each sentence, with ``ents`` the entities inside it.
+
+    ``Span.ents`` rebuilds the whole doc's entity list on every call, which
+    made per-sentence extraction quadratic in chunk length; here
+    ``doc.ents`` is read once and split with a single merge pass.
+    """
+    ents = doc.ents
+    i = 0
+    for sent in doc.sents:
+        while i < len(ents) and ents[i].start < sent.start:
+            i += 1
+        j = i
+        while j < len(ents) and ents[j].end <= sent.end:
+            j += 1
+        yield sent, ents[i:j]
+        i = j
+
+
+def sentence_relations(sent, ents=None, triples=None):
+    """Entity mentions and relation triples of one sentence.
+
+    Every ordered pair of the returned entities co-occurs; callers count
+    the pairs with ``CooccurrenceCounts.add_group`` instead of listing them.
+    ``ents`` are the sentence's entities and ``triples`` its share of
+    ``doc_relations`` if already known; otherwise the sentence is matched
+    on its own.
+    """
+    ents = sent.ents if ents is None else ents
+    ent_text = [ent.text.strip() for ent in ents if ent.label_ in ENTITY_LABELS]
+    if triples is None:
+        triples = doc_relations(sent.as_doc()).get(0, [])
+    return ent_text, triples
+
+
+def iter_doc_sentences(doc, pattern_counts=None):
+    """``(sent, entities, triples)`` for each sentence, matching relations once for the whole doc."""
+    relations = doc_relations(doc, pattern_counts)
+    for sent, ents in iter_sentence_entities(doc):
+        yield (sent, *sentence_relations(sent, ents, relations.get(sent.start, [])))
+
+
+def iter_sentence_extractions(texts, batch_size=BATCH_SIZE, n_process=N_PROCESS, pattern_counts=None):
+    """Stream ``(sentence, entities, triples)`` for every sentence of every text.
+
+    Triples found by each relation pattern are added to the
+    ``pattern_counts`` ``Counter`` if one is given.
+    """
+    nlp = load_nlp()
+    for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+        for sent, entities, triples in iter_doc_sentences(doc, pattern_counts):
+            yield sent.text.strip(), entities, triples
+
+
+def iter_extractions(texts, batch_size=BATCH_SIZE, n_process=N_PROCESS, pattern_counts=None):
+    """Stream ``(entity_groups, triples)`` for each text through ``nlp.pipe``.
+
+    ``entity_groups`` holds one entity list per sentence with at least
+    two entities, i.e. the sentences that produce co-occurrence pairs.
+    """
+    nlp = load_nlp()
+    for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+        groups, triples = [], []
+        for _, entities, sent_triples in iter_doc_sentences(doc, pattern_counts):
+            if len(entities) > 1:
+                groups.append(entities)
+            triples.extend(sent_triples)
+        yield groups, triples
+
+
+def extract_entities_relations(text, chunk_chars=CHUNK_CHARS, batch_size=BATCH_SIZE, n_process=N_PROCESS,
+                               cache=None, passages=None, canonical=True, canonicalizer=None):
+    """Extract entity co-occurrence counts and deduplicated triples from ``text``.
+
+    ``text`` may also be an iterable of text blocks, which is consumed
+    lazily so parsing starts before the last block exists. The text is
+    cut into bounded chunks and parsed with ``nlp.pipe``; results are
+    merged as each chunk comes back, so documents larger than spaCy's
+    ``max_length`` work and peak memory stays per-chunk. With an
+    ``ExtractionCache``, the text is split into sentences instead and
+    only sentences missing from the cache are parsed.
+
+    With ``canonical``, entity names are mapped through ``canonicalizer``
+    (a ``mosdac.canonical.Canonicalizer``, fresh for this call unless
+    one is shared, e.g. by the pages of a crawl) after extraction, so the
+    extraction cache stays valid when the alias table changes. Names are
+    settled once every sentence has been read. If ``passages`` is a
+    list, every sentence is appended to it as ``(sentence, triples)`` for
+    retrieval. The triples each relation pattern found in freshly parsed
+    sentences are reported as ``triples_<pattern>`` counters of the
+    ``extract`` stage.
+
+    Returns ``(CooccurrenceCounts, triples)``.
+    """
+    cooccurrence = CooccurrenceCounts()
+    triples = set()
+    pattern_counts = Counter()
+    if cache is None:
+        results = (
+            (sentence, [entities], sentence_triples)
+            for sentence, entities, sentence_triples
+            in iter_sentence_extractions(iter_chunks(text, chunk_chars), batch_size, n_process, pattern_counts)
+        )
+    else:
+        results = (
+            (sentence, *result)
+            for sentence, result in cache.extract(
+                iter_sentences(text, chunk_chars),
+                lambda sentences: iter_extractions(sentences, batch_size, n_process, pattern_counts),
+            )
+        )
+    if canonical and canonicalizer is None:
+        canonicalizer = Canonicalizer()
+    intern = canonicalizer.intern if canonical else None
+    first_passage = len(passages) if passages is not None else 0
+    with METRICS.stage("extract") as span:
+        sentences = entities_seen = 0
+        for sentence, entity_groups, sentence_triples in results:
+            sentences += 1
+            if intern is not None:
+                # Entities are counted under their keys until every surface form has been seen.
+                # Variants of one entity in a sentence collapse into a single mention.
+                entity_groups = [list(dict.fromkeys(map(intern, entities))) for entities in entity_groups]
+                sentence_triples = [(intern(s), r, intern(o)) for s, r, o in sentence_triples]
+            for entities in entity_groups:
+                cooccurrence.add_group(entities)
+                entities_seen += len(entities)
+            triples.update(sentence_triples)
+            if passages is not None and sentence:
+                passages.append((sentence, sentence_triples))
+        span.add(sentences=sentences, entities=entities_seen, triples=len(triples))
+        span.add(**{f"triples_{name}": count for name, count in pattern_counts.items()})
+    if intern is not None:
+        name = canonicalizer.name
+        cooccurrence.rename({key: name(key) for key in cooccurrence.names})
+        triples = {(name(s), r, name(o)) for s, r, o in triples}
+        if passages is not None:
+            passages[first_passage:] = [
+                (sentence, [(name(s), r, name(o)) for s, r, o in sentence_triples])
+                for sentence, sentence_triples in passages[first_passage:]
+            ]
+    return cooccurrence, list(triples)
@@ -0,0 +1,164 @@
+"""Analysis pipeline run by background jobs: fetch, extract, store and pre-render."""
+import io
+from collections import namedtuple
+
+from mosdac.canonical import Canonicalizer
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.crawler import crawl_site, normalize_url, probe_url
+from mosdac.graph import build_graph
+from mosdac.ingest import is_archive, iter_upload
+from mosdac.layout import prune_graph
+from mosdac.nlp import extract_entities_relations, iter_chunks
+
+# ``text`` is the page or upload text for previews, ``pages`` the crawled
+# pages or uploaded archive members and ``outcome`` the page cache outcome
+# of a single probe.
+Analysis = namedtuple("Analysis", "source pairs triples passages text pages outcome")
+
+
+class ProbeFailed(Exception):
+    """The probed URL did not answer 200 OK."""
+
+    def __init__(self, url, status):
+        super().__init__(f"{url} answered with status {status}")
+        self.url = url
+        self.status = status
+
+
+class Pipeline:
+    """The app's analyses, wired to the process-wide caches and graph store.
+
+    Every method takes the running ``mosdac.jobs.Job``, reports the
+    fetching, parsing and graphing stages to it and stops at the next
+    block of text once the job is cancelled. The graph the app is about
+    to draw is laid out and rendered here, so drawing it afterwards only
+    hits the layout and render caches. Each analysis canonicalizes its
+    entity names with a ``Canonicalizer`` of its own, shared by the pages
+    of a crawl or the members of an archive.
+
+    With a ``mosdac.single_flight.SingleFlight``, probes and crawls of a
+    URL already being analyzed for another session wait for that
+    analysis and share it instead of fetching and parsing the page again.
+    """
+
+    def __init__(self, extraction_cache=None, http_cache=None, graph_store=None, layout_cache=None,
+                 render_cache=None, analytics_cache=None, single_flight=None):
+        self.extraction_cache = extraction_cache
+        self.http_cache = http_cache
+        self.graph_store = graph_store
+        self.layout_cache = layout_cache
+        self.render_cache = render_cache
+        self.analytics_cache = analytics_cache
+        self.single_flight = single_flight
+
+    def extract(self, job, text, passages, canonicalizer, stage=None):
+        # Whole strings are cut into chunks so cancellation doesn't wait for the end of a document.
+        blocks = iter_chunks(text) if isinstance(text, str) else text
+        return extract_entities_relations(job.track(blocks, stage), cache=self.extraction_cache, passages=passages,
+                                          canonicalizer=canonicalizer)
+
+    def _coalesced(self, job, key, fn):
+        if self.single_flight is None:
+            return fn()
+        return self.single_flight.run(
+            key,
+            fn,
+            check=job.check,
+            on_wait=lambda: job.report(job.stage, job.progress, "joined an identical probe already in flight"),
+        )
+
+    def probe(self, job, url):
+        job.report("fetching")
+        return self._coalesced(job, ("probe", normalize_url(url)), lambda: self._probe(job, url))
+
+    def _probe(self, job, url):
+        canonicalizer = Canonicalizer()
+        probe = probe_url(
+            url,
+            extract=lambda text, passages: self.extract(job, text, passages, canonicalizer, stage="parsing"),
+            http_cache=self.http_cache,
+        )
+        if probe.status != 200:
+            raise ProbeFailed(url, probe.status)
+        return self._finish(job, probe.url, probe.pairs, probe.triples, probe.passages,
+                            text=probe.text, outcome=probe.outcome, mentions=canonicalizer.mentions())
+
+    def crawl(self, job, url, max_pages, **crawl_options):
+        job.report("fetching", 0.0)
+        key = ("crawl", normalize_url(url), max_pages, tuple(sorted(crawl_options.items())))
+        return self._coalesced(job, key, lambda: self._crawl(job, url, max_pages, **crawl_options))
+
+    def _crawl(self, job, url, max_pages, **crawl_options):
+        canonicalizer = Canonicalizer()
+
+        def on_page(page, pages_done):
+            job.report("fetching", min(pages_done / max_pages, 1.0), page.url)
+
+        def on_extract(page, pairs, triples):
+            if self.graph_store is not None:
+                self.graph_store.merge(page.url, pairs, triples, canonicalizer.mentions())
+
+        pages, pairs, triples, passages = crawl_site(
+            url,
+            extract=lambda text, passages: self.extract(job, text, passages, canonicalizer),
+            on_page=on_page,
+            on_extract=on_extract,
+            max_pages=max_pages,
+            http_cache=self.http_cache,
+            **crawl_options,
+        )
+        # Pages were merged into the store one by one.
+        return self._finish(job, url, pairs, triples, passages, pages=pages, store=False)
+
+    def analyze_upload(self, job, upload, name):
+        """Stream an uploaded page or archive of pages through cleaning and extraction.
+
+        ``upload`` is a seekable binary file object (such as Streamlit's
+        ``UploadedFile``), read from its current position without being
+        copied. Archive members are merged into the graph store one by one
+        as ``name/member``; progress is the share of ``upload`` read so far.
+        """
+        job.report("parsing", 0.0)
+        start = upload.tell()
+        size = max(upload.seek(0, io.SEEK_END) - start, 1)
+        upload.seek(start)
+        archive = is_archive(name)
+        cooccurrence = CooccurrenceCounts()
+        triples = set()
+        passages = []
+        members = []
+        canonicalizer = Canonicalizer()
+
+        def tracked(blocks, member):
+            for block in blocks:
+                job.report("parsing", min((upload.tell() - start) / size, 1.0), member)
+                yield block
+
+        for member, blocks in iter_upload(upload, name):
+            member_pairs, member_triples = self.extract(job, tracked(blocks, member), passages, canonicalizer)
+            members.append(member)
+            if archive and self.graph_store is not None:
+                self.graph_store.merge(f"{name}/{member}", member_pairs, member_triples, canonicalizer.mentions())
+            cooccurrence.update(member_pairs)
+            triples.update(member_triples)
+        return self._finish(job, name, cooccurrence, list(triples), passages,
+                            pages=members if archive else None, store=not archive, mentions=canonicalizer.mentions())
+
+    def _finish(self, job, source, pairs, triples, passages, text="", pages=None, outcome=None, store=True,
+                mentions=None):
+        job.report("graphing")
+        if store and self.graph_store is not None:
+            self.graph_store.merge(source, pairs, triples, mentions)
+        self.prepare_graph(pairs, triples)
+        return Analysis(source, pairs, triples, passages, text, pages, outcome)
+
+    def prepare_graph(self, pairs, triples):
+        """Lay out and render the graph ``draw_space_graph`` will show for this analysis."""
+        if self.layout_cache is None or not (pairs or triples):
+            return
+        G = build_graph(pairs, triples)
+        scores = self.analytics_cache.get(G).pagerank if self.analytics_cache is not None else None
+        G = prune_graph(G, scores=scores)
+        pos = self.layout_cache.positions(G)
+        if self.render_cache is not None:
+            self.render_cache.render(G, pos)
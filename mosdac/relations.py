@@ -0,0 +1,180 @@
+"""Relation triples from compiled dependency patterns.
+
+Every pattern is compiled once into one ``DependencyMatcher`` per
+vocabulary and evaluated in a single pass over each parsed doc. A
+pattern's matched tokens are turned into a ``(subject, relation,
+object)`` triple by its builder; relations are verb lemmas, extended
+with the preposition for prepositional relations.
+"""
+import threading
+
+from spacy.matcher import DependencyMatcher
+
+_VERB = {"POS": {"IN": ["VERB", "AUX"]}}
+# Relative pronouns and "it" say nothing on their own; relcl covers the former.
+_SUBJECT = {"DEP": "nsubj", "POS": {"NOT_IN": ["PRON"]}}
+_OBJECT = {"DEP": {"IN": ["dobj", "attr", "oprd"]}}
+
+
+def _child(left, right, attrs):
+    return {"LEFT_ID": left, "REL_OP": ">", "RIGHT_ID": right, "RIGHT_ATTRS": attrs}
+
+
+# name -> (dependency pattern, builder(tokens by RIGHT_ID) -> (subject, relation, object) tokens/labels)
+PATTERNS = {
+    # "ISRO launched SCATSAT-1"; any clause, not only the sentence root.
+    "svo": (
+        [
+            {"RIGHT_ID": "verb", "RIGHT_ATTRS": _VERB},
+            _child("verb", "subject", _SUBJECT),
+            _child("verb", "object", _OBJECT),
+        ],
+        lambda t: (t["subject"], t["verb"].lemma_, t["object"]),
+    ),
+    # "ISRO built and launched INSAT-3D": the second verb shares the subject.
+    "conj": (
+        [
+            {"RIGHT_ID": "verb", "RIGHT_ATTRS": _VERB},
+            _child("verb", "subject", _SUBJECT),
+            _child("verb", "second", {"DEP": "conj", "POS": "VERB"}),
+            _child("second", "object", _OBJECT),
+        ],
+        lambda t: (t["subject"], t["second"].lemma_, t["object"]),
+    ),
+    # "INSAT-3D was launched by ISRO" -> (ISRO, launch, INSAT-3D)
+    "passive": (
+        [
+            {"RIGHT_ID": "verb", "RIGHT_ATTRS": _VERB},
+            _child("verb", "patient", {"DEP": "nsubjpass"}),
+            _child("verb", "by", {"DEP": "agent"}),
+            _child("by", "agent", {"DEP": "pobj"}),
+        ],
+        lambda t: (t["agent"], t["verb"].lemma_, t["patient"]),
+    ),
+    # "SCATSAT-1 was launched from Sriharikota" -> (SCATSAT-1, launch from, Sriharikota)
+    "passive_prep": (
+        [
+            {"RIGHT_ID": "verb", "RIGHT_ATTRS": _VERB},
+            _child("verb", "patient", {"DEP": "nsubjpass"}),
+            _child("verb", "prep", {"DEP": "prep"}),
+            _child("prep", "object", {"DEP": "pobj"}),
+        ],
+        lambda t: (t["patient"], f"{t['verb'].lemma_} {t['prep'].lower_}", t["object"]),
+    ),
+    # "Megha-Tropiques observes rainfall over the Bay of Bengal" (preposition on the verb)
+    "prep": (
+        [
+            {"RIGHT_ID": "verb", "RIGHT_ATTRS": _VERB},
+            _child("verb", "subject", _SUBJECT),
+            _child("verb", "prep", {"DEP": "prep"}),
+            _child("prep", "object", {"DEP": "pobj"}),
+        ],
+        lambda t: (t["subject"], f"{t['verb'].lemma_} {t['prep'].lower_}", t["object"]),
+    ),
+    # "INSAT-3D provides data over the Indian Ocean" (preposition on the object)
+    "object_prep": (
+        [
+            {"RIGHT_ID": "verb", "RIGHT_ATTRS": _VERB},
+            _child("verb", "subject", _SUBJECT),
+            _child("verb", "direct", {"DEP": "dobj"}),
+            _child("direct", "prep", {"DEP": "prep"}),
+            _child("prep", "object", {"DEP": "pobj"}),
+        ],
+        lambda t: (t["subject"], f"{t['verb'].lemma_} {t['direct'].lower_} {t['prep'].lower_}", t["object"]),
+    ),
+    # "SCATSAT-1, which measures ocean winds" -> (SCATSAT-1, measure, winds)
+    "relcl": (
+        [
+            {"RIGHT_ID": "noun", "RIGHT_ATTRS": {"POS": {"IN": ["NOUN", "PROPN"]}}},
+            _child("noun", "verb", {"DEP": "relcl"}),
+            _child("verb", "object", _OBJECT),
+        ],
+        lambda t: (t["noun"], t["verb"].lemma_, t["object"]),
+    ),
+    # "ISRO, India's space agency, ..." -> (ISRO, be, space agency)
+    "appos": (
+        [
+            {"RIGHT_ID": "noun", "RIGHT_ATTRS": {"POS": {"IN": ["NOUN", "PROPN"]}}},
+            _child("noun", "appositive", {"DEP": "appos"}),
+        ],
+        lambda t: (t["noun"], "be", t["appositive"]),
+    ),
+}
+
+_MATCHERS = {}
+_matchers_lock = threading.Lock()
+
+
+def relation_matcher(vocab):
+    """The ``DependencyMatcher`` holding every pattern, compiled once per vocab."""
+    with _matchers_lock:
+        matcher = _MATCHERS.get(id(vocab))
+        if matcher is None:
+            # The matcher keeps ``vocab`` alive, so its id is never reused.
+            matcher = _MATCHERS[id(vocab)] = DependencyMatcher(vocab)
+            for name, (pattern, _) in PATTERNS.items():
+                matcher.add(name, [pattern])
+    return matcher
+
+
+def argument_text(token, ents):
+    """The entity containing ``token``, else ``token`` with its compound modifiers.
+
+    ``ents`` maps token indices to the entity spans covering them.
+    """
+    ent = ents.get(token.i)
+    if ent is not None:
+        return ent.text.strip()
+    start = min((child.i for child in token.lefts if child.dep_ == "compound"), default=token.i)
+    return token.doc[start:token.i + 1].text
+
+
+def entity_index(doc):
+    """``{token index: entity span}`` for every token inside one of ``doc.ents``."""
+    return {i: ent for ent in doc.ents for i in range(ent.start, ent.end)}
+
+
+def doc_relations(doc, counts=None):
+    """``{sentence start: [triple, ...]}`` from one matcher pass over ``doc``.
+
+    A triple found by several patterns is kept once, credited to the
+    first. If ``counts`` is a ``Counter``, each kept triple is counted
+    under the name of its pattern.
+    """
+    if not doc.has_annotation("DEP"):
+        return {}
+    ents = entity_index(doc)
+    sentence_of = {}
+    for sent in doc.sents:
+        for i in range(sent.start, sent.end):
+            sentence_of[i] = sent.start
+    found = {}
+    strings = doc.vocab.strings
+    for match_id, token_ids in relation_matcher(doc.vocab)(doc):
+        name = strings[match_id]
+        pattern, build = PATTERNS[name]
+        subject, relation, obj = build({node["RIGHT_ID"]: doc[i] for node, i in zip(pattern, token_ids)})
+        triple = (argument_text(subject, ents), relation, argument_text(obj, ents))
+        if triple[0] == triple[2]:
+            continue
+        sentence = found.setdefault(sentence_of[token_ids[0]], {})
+        if triple not in sentence:
+            sentence[triple] = name
+            if counts is not None:
+                counts[name] += 1
+    return {start: list(triples) for start, triples in found.items()}
+
+
+def root_relations(sent, ents):
+    """The ROOT subject-verb-object triple of one sentence, as extracted before ``doc_relations``.
+
+    Kept as the baseline ``python -m mosdac.benchmark relations`` compares against.
+    """
+    root = [t for t in sent if t.dep_ == "ROOT"]
+    if root:
+        verb = root[0]
+        subj = [argument_text(w, ents) for w in verb.lefts if w.dep_ in ("nsubj", "nsubjpass")]
+        obj = [argument_text(w, ents) for w in verb.rights if w.dep_ in ("dobj", "pobj", "attr")]
+        if subj and obj:
+            return [(subj[0], verb.lemma_, obj[0])]
+    return []
@@ -0,0 +1,200 @@
+"""Knowledge graph rendering to image bytes, with a bounded render cache."""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+from mosdac.layout import graph_key
+from mosdac.metrics import METRICS
+
+# Professional color palette similar to the dashboard, keyed by gazetteer category
+ENTITY_COLORS = {
+    'SATELLITE': '#4A90E2',    # Blue for satellites
+    'SENSOR': '#8B572A',       # Brown for instruments
+    'LOCATION': '#F5A623',     # Orange for locations
+    'OCEAN': '#7ED321',        # Green for ocean-related
+    'WEATHER': '#BD10E0',      # Purple for weather
+    'PRODUCT': '#FF6B6B',      # Red for temperature and other data products
+    'DEFAULT': '#50E3C2'       # Teal for others
+}
+
+LEGEND = (
+    ('SATELLITE', 'Satellites'),
+    ('SENSOR', 'Sensors'),
+    ('OCEAN', 'Ocean/Sea'),
+    ('LOCATION', 'Locations'),
+    ('WEATHER', 'Weather'),
+    ('PRODUCT', 'Temperature/Data'),
+    ('DEFAULT', 'Other'),
+)
+
+# Every color and font is passed to the artists, so global rcParams don't change the image.
+BACKGROUND = '#f8f9fa'
+TEXT_COLOR = '#2c3e50'
+FONT = 'DejaVu Sans'
+
+FORMAT = "png"
+DPI = 100
+CACHE_BYTES = 64 * 1024 * 1024
+
+
+def node_color(G, node):
+    """Color of the ``category`` that build_graph stored on ``node``."""
+    return ENTITY_COLORS.get(G.nodes[node].get('category'), ENTITY_COLORS['DEFAULT'])
+
+
+def render_graph(G, pos, fmt=FORMAT, dpi=DPI):
+    """Draw ``G`` at ``pos`` and return the encoded image bytes.
+
+    Uses a standalone ``Figure`` rather than pyplot, so nothing is left in
+    pyplot's global figure registry and concurrent sessions don't share
+    the "current figure". Styling is explicit rather than a
+    ``style.context``, which would swap the process-wide rcParams under
+    other threads.
+    """
+    # Professional dashboard-style graph visualization
+    fig = Figure(figsize=(16, 10), dpi=dpi, facecolor=BACKGROUND, edgecolor=BACKGROUND, linewidth=0)
+    ax = fig.subplots()
+    ax.set_facecolor(BACKGROUND)
+    edge_labels = nx.get_edge_attributes(G, 'label')
+
+    # Create node colors
+    node_colors = [node_color(G, node) for node in G.nodes()]
+
+    # Draw nodes with professional styling
+    nx.draw_networkx_nodes(G, pos,
+                          node_color=node_colors,
+                          node_size=1500,
+                          alpha=0.9,
+                          linewidths=2,
+                          edgecolors='white',
+                          ax=ax)
+
+    # Add subtle glow effect
+    nx.draw_networkx_nodes(G, pos,
+                          node_color=node_colors,
+                          node_size=1800,
+                          alpha=0.3,
+                          ax=ax)
+
+    # Draw labels with better positioning
+    labels = {}
+    for node in G.nodes():
+        # Truncate long labels
+        if len(node) > 15:
+            labels[node] = node[:12] + "..."
+        else:
+            labels[node] = node
+
+    nx.draw_networkx_labels(G, pos,
+                           labels=labels,
+                           font_size=9,
+                           font_color=TEXT_COLOR,
+                           font_family=FONT,
+                           font_weight="bold",
+                           ax=ax)
+
+    # Draw edges with professional styling
+    nx.draw_networkx_edges(G, pos,
+                          edge_color="#bdc3c7",
+                          width=1.5,
+                          alpha=0.6,
+                          ax=ax)
+
+    # Draw edge labels with better styling
+    if edge_labels:
+        # Filter out generic labels
+        filtered_labels = {k: v for k, v in edge_labels.items() if v not in ['related', 'be', 'have']}
+        if filtered_labels:
+            nx.draw_networkx_edge_labels(G, pos,
+                                       edge_labels=filtered_labels,
+                                       font_color="#34495e",
+                                       font_size=7,
+                                       font_family=FONT,
+                                       bbox=dict(boxstyle="round,pad=0.2",
+                                               facecolor="white",
+                                               edgecolor="#bdc3c7",
+                                               alpha=0.8),
+                                       ax=ax)
+
+    # Add title and clean up
+    ax.set_title("🌌 Knowledge Graph - Entity Relationships",
+                color=TEXT_COLOR, fontsize=14, fontweight="bold", fontfamily=FONT, pad=20)
+    ax.axis('off')
+
+    # Add legend
+    legend_elements = [
+        Line2D([0], [0], marker='o', color='w',
+               markerfacecolor=ENTITY_COLORS[category], markersize=10,
+               label=label)
+        for category, label in LEGEND
+    ]
+
+    ax.legend(handles=legend_elements, loc='upper right',
+             bbox_to_anchor=(1.0, 1.0), frameon=True,
+             fancybox=True, shadow=True, ncol=1,
+             prop={'family': FONT, 'size': 10}, labelcolor=TEXT_COLOR,
+             facecolor=BACKGROUND, edgecolor='0.8', framealpha=0.8)
+
+    # Fixed margins: tight_layout pads by the global font size, and the axes are off anyway.
+    fig.subplots_adjust(left=0.01, right=0.99, bottom=0.01, top=0.93)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, facecolor=BACKGROUND, edgecolor=BACKGROUND,
+                bbox_inches=fig.bbox_inches, pad_inches=0, transparent=False)
+    # Drop the artists now instead of waiting for the garbage collector.
+    fig.clear()
+    return buffer.getvalue()
+
+
+def render_key(G, pos, fmt=FORMAT, dpi=DPI):
+    """Hash of everything that affects the image: structure, labels, categories, positions and style."""
+    digest = hashlib.sha1(graph_key(G).encode("ascii"))
+    for (a, b), label in sorted(nx.get_edge_attributes(G, 'label').items()):
+        digest.update(f"{a}\0{b}\0{label}\0".encode("utf-8"))
+    for node in sorted(G.nodes):
+        x, y = pos[node]
+        category = G.nodes[node].get('category')
+        digest.update(f"{node}\0{category}\0{x:.4f}\0{y:.4f}\0".encode("utf-8"))
+    digest.update(f"{fmt}\0{dpi}".encode("ascii"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """LRU cache of rendered graph images, bounded by total bytes."""
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def render(self, G, pos, fmt=FORMAT, dpi=DPI):
+        key = render_key(G, pos, fmt, dpi)
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return self._images[key]
+            self.misses += 1
+
+        with METRICS.stage("render") as span:
+            image = render_graph(G, pos, fmt, dpi)
+            span.add(bytes=len(image))
+        with self._lock:
+            if key not in self._images:
+                self._images[key] = image
+                self._size += len(image)
+            while self._size > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self._size -= len(evicted)
+        return image
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._images), "bytes": self._size}
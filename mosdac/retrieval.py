@@ -0,0 +1,58 @@
+"""Offline BM25 retrieval over extracted sentences."""
+import numpy as np
+from scipy import sparse
+
+from mosdac.kb_index import tokenize
+
+K1 = 1.5
+B = 0.75
+TOP_K = 3
+
+
+class PassageIndex:
+    """BM25 over ``(sentence, triples)`` passages from ``extract_entities_relations``.
+
+    Term weights are precomputed into a sparse passages x terms matrix,
+    so scoring a query is one column slice and a row sum.
+    """
+
+    def __init__(self, passages, k1=K1, b=B):
+        self.passages = list(dict.fromkeys((text, tuple(triples)) for text, triples in passages))
+        self.vocabulary = {}
+        rows, cols, counts = [], [], []
+        lengths = np.zeros(len(self.passages))
+        for row, (text, _) in enumerate(self.passages):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            for token in tokens:
+                rows.append(row)
+                cols.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                counts.append(1.0)
+        shape = (len(self.passages), len(self.vocabulary))
+        # Duplicate (row, col) entries are summed into term frequencies.
+        tf = sparse.csr_matrix((counts, (rows, cols)), shape=shape)
+        tf.sum_duplicates()
+
+        document_frequency = np.bincount(tf.indices, minlength=shape[1])
+        idf = np.log(1 + (shape[0] - document_frequency + 0.5) / (document_frequency + 0.5))
+        average_length = lengths.mean() if len(lengths) else 0.0
+        norm = k1 * (1 - b + b * lengths / (average_length or 1.0))
+        row_of_entry = np.repeat(np.arange(shape[0]), np.diff(tf.indptr))
+        weights = tf.data * (k1 + 1) / (tf.data + norm[row_of_entry]) * idf[tf.indices]
+        self._weights = sparse.csr_matrix((weights, tf.indices, tf.indptr), shape=shape).tocsc()
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query, k=TOP_K):
+        """Top ``k`` ``(score, sentence, triples)`` for ``query``, best first."""
+        columns = sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+        if not columns or not self.passages:
+            return []
+        scores = np.asarray(self._weights[:, columns].sum(axis=1)).ravel()
+        k = min(k, np.count_nonzero(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), *self.passages[i]) for i in top]
@@ -0,0 +1,9 @@
+"""Settings read from the environment."""
+import os
+
+
+def cache_path(filename):
+    """Path of a persistent cache file under ``MOSDAC_CACHE_DIR``."""
+    cache_dir = os.getenv("MOSDAC_CACHE_DIR", ".mosdac_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
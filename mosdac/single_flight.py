@@ -0,0 +1,110 @@
+"""Process-wide coalescing of identical concurrent requests."""
+import concurrent.futures
+import threading
+import time
+
+# Seconds a caller waits for another caller's identical request before giving up.
+TIMEOUT = 600
+# Seconds between checks of a waiting caller's own cancellation.
+POLL_SECONDS = 0.25
+
+_RETRY = object()
+
+
+class FlightTimeout(TimeoutError):
+    """An identical request in flight did not finish within the timeout."""
+
+    def __init__(self, key, timeout):
+        super().__init__(f"gave up after {timeout:g} s waiting for an identical request already in flight")
+        self.key = key
+        self.timeout = timeout
+
+
+class SingleFlight:
+    """Runs one computation per key at a time and shares it with everyone asking meanwhile.
+
+    The first caller of ``run`` for a key computes the result; callers
+    arriving before it finishes wait on the same ``Future`` and get its
+    result, or its exception re-raised. Only the table of in-flight keys
+    is locked, so different keys never wait on each other. Nothing is
+    kept once a computation finishes; repeated requests are the caches'
+    job. Exceptions in ``retry`` belong to the computing caller alone
+    (such as its job being cancelled); waiting callers then start the
+    computation again themselves.
+    """
+
+    def __init__(self, timeout=TIMEOUT, retry=(), poll_seconds=POLL_SECONDS):
+        self.timeout = timeout
+        self.retry = tuple(retry)
+        self.poll_seconds = poll_seconds
+        self.led = 0
+        self.shared = 0
+        self.timeouts = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, check=None, on_wait=None, timeout=None):
+        """Return ``fn()``, or the result of the call with the same ``key`` already in flight.
+
+        A waiting caller calls ``on_wait()`` once when it joins, calls
+        ``check()`` (which may raise to stop waiting) every
+        ``poll_seconds``, and raises ``FlightTimeout`` after ``timeout``
+        seconds (default ``self.timeout``; None waits indefinitely).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # A caller retrying after the leader was cancelled is still one shared request.
+        joined = False
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = concurrent.futures.Future()
+                    self.led += 1
+                elif not joined:
+                    self.shared += 1
+                    joined = True
+            if leader:
+                return self._lead(key, future, fn)
+            if on_wait is not None:
+                on_wait()
+                on_wait = None
+            result = self._wait(key, future, check, deadline, timeout)
+            if result is not _RETRY:
+                return result
+
+    def _lead(self, key, future, fn):
+        try:
+            result = fn()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def _wait(self, key, future, check, deadline, timeout):
+        # Not ``future.result(timeout)``: the computation may itself raise TimeoutError.
+        while not future.done():
+            wait = self.poll_seconds if deadline is None else min(self.poll_seconds, deadline - time.monotonic())
+            concurrent.futures.wait((future,), timeout=max(wait, 0))
+            if future.done():
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                with self._lock:
+                    self.timeouts += 1
+                raise FlightTimeout(key, timeout)
+            if check is not None:
+                check()
+        try:
+            return future.result()
+        except self.retry:
+            return _RETRY
+
+    def stats(self):
+        with self._lock:
+            return {"led": self.led, "shared": self.shared, "timeouts": self.timeouts, "in_flight": len(self._calls)}
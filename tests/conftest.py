@@ -0,0 +1,66 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FixtureSite:
+    """A local HTTP server answering from ``routes``: path -> (status, content type, body, headers)."""
+
+    def __init__(self, routes, host="127.0.0.1"):
+        self.routes = routes
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append((self.path, dict(self.headers)))
+                route = site.routes.get(self.path)
+                if callable(route):
+                    route = route(self.headers)
+                status, content_type, body, headers = route or (404, "text/plain", "not found", {})
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, 0), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def serve():
+    """``serve(routes, host=...)`` starts a ``FixtureSite``; every site is stopped after the test."""
+    sites = []
+
+    def start(routes, host="127.0.0.1"):
+        site = FixtureSite(routes, host)
+        sites.append(site)
+        return site
+
+    yield start
+    for site in sites:
+        site.close()
+
+
+def html(body):
+    return 200, "text/html; charset=utf-8", f"<html><body>{body}</body></html>", {}
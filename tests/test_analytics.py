@@ -0,0 +1,81 @@
+import networkx as nx
+import pytest
+
+from mosdac import analytics
+from mosdac.analytics import AnalyticsCache, analytics_key
+
+
+def graph(weight=1):
+    G = nx.DiGraph()
+    G.add_edge("INSAT-3D", "Bay of Bengal", label="observe", weight=weight)
+    G.add_edge("INSAT-3D", "Imager", label="related", weight=2)
+    G.add_edge("Oceansat-3", "Arabian Sea", label="related", weight=1)
+    return G
+
+
+def test_key_is_computed_once_per_graph(monkeypatch):
+    calls = []
+    original = analytics.graph_key
+    monkeypatch.setattr(analytics, "graph_key", lambda G: calls.append(1) or original(G))
+    G = graph()
+    cache = AnalyticsCache()
+    first = cache.get(G)
+    assert cache.get(G) is first and cache.get(G) is first
+    assert len(calls) == 1
+    assert cache.hits == 2 and cache.misses == 1
+
+
+def test_key_follows_labels_and_weights():
+    assert analytics_key(graph()) == analytics_key(graph())
+    assert analytics_key(graph(weight=3)) != analytics_key(graph())
+
+
+def test_subgraphs_do_not_reuse_the_parent_key():
+    G = graph()
+    key = analytics_key(G)
+    pruned = G.subgraph(["INSAT-3D", "Bay of Bengal", "Imager"]).copy()
+    assert analytics_key(pruned) != key
+    assert analytics_key(pruned) == analytics_key(nx.DiGraph(pruned.edges(data=True)))
+    assert analytics_key(G) == key
+
+
+@pytest.fixture
+def graph_analytics():
+    return AnalyticsCache().get(graph())
+
+
+@pytest.mark.parametrize("question", [
+    "What instruments do INSAT-3D and Oceansat-3 carry?",
+    "What is near the Imager on INSAT-3D?",
+    "Which important products does MOSDAC offer?",
+    "Does INSAT-3D observe the Bay of Bengal or the Arabian Sea?",
+    "What are the key products of Oceansat-3?",
+    "Which product groups cover the Arabian Sea?",
+    "Compare Imager data with INSAT-3D products",
+])
+def test_ordinary_questions_are_not_graph_queries(graph_analytics, question):
+    assert graph_analytics.parse_query(question) is None
+
+
+@pytest.mark.parametrize("question, kind, entities", [
+    ("How is INSAT-3D related to Oceansat-3?", "path", ["INSAT-3D", "Oceansat-3"]),
+    ("What connects the Imager and the Arabian Sea?", "path", ["Imager", "Arabian Sea"]),
+    ("Is there a path between Bay of Bengal and Imager?", "path", ["Bay of Bengal", "Imager"]),
+    ("What is connected to INSAT-3D?", "neighbourhood", ["INSAT-3D"]),
+    ("Entities within 2 hops of Imager", "neighbourhood", ["Imager"]),
+    ("Which community is INSAT-3D in?", "community", ["INSAT-3D"]),
+    ("Which are the most central entities?", "rank", []),
+    ("List the key entities", "rank", []),
+    ("What clusters does the graph have?", "communities", []),
+])
+def test_graph_questions(graph_analytics, question, kind, entities):
+    parsed = graph_analytics.parse_query(question)
+    assert (parsed.kind, parsed.entities) == (kind, entities)
+
+
+def test_path_steps(graph_analytics):
+    assert graph_analytics.shortest_path("Bay of Bengal", "Imager") == [
+        ("Bay of Bengal", "observe", "INSAT-3D", False),
+        ("INSAT-3D", "related", "Imager", True),
+    ]
+    assert graph_analytics.shortest_path("INSAT-3D", "Oceansat-3") is None
@@ -0,0 +1,209 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mosdac.answers import AgentPool, AnswerCache, Assistant
+from mosdac.jobs import CANCELLED, JobManager
+
+
+class FakeAgent:
+    """Stands in for an agno Agent backed by Groq and Firecrawl tools."""
+
+    def __init__(self, answer="INSAT-3D observes the Indian Ocean.", pieces=None, delay=0.0):
+        self.answer = answer
+        self.pieces = pieces if pieces is not None else [answer]
+        self.delay = delay
+        self.prompts = []
+
+    def run(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        time.sleep(self.delay)
+        if stream:
+            return (SimpleNamespace(content=piece) for piece in self.pieces)
+        return SimpleNamespace(content=self.answer)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnswerCache(str(tmp_path / "answers.sqlite3"))
+
+
+def assistant_for(agent, cache, size=1):
+    return Assistant(AgentPool(lambda: agent, size=size), cache)
+
+
+def test_repeated_question_is_a_cache_hit(cache):
+    agent = FakeAgent()
+    assistant = assistant_for(agent, cache)
+    first, first_latency = assistant.ask("What does INSAT-3D observe?")
+    second, second_latency = assistant.ask("  what does insat-3d observe ")
+    assert first == second == agent.answer
+    assert len(agent.prompts) == 1
+    assert not first_latency.cached and second_latency.cached
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_url_is_part_of_the_key(cache):
+    agent = FakeAgent()
+    assistant = assistant_for(agent, cache)
+    assistant.ask("products", url="https://www.mosdac.gov.in")
+    assistant.ask("products")
+    assert len(agent.prompts) == 2
+    assert "https://www.mosdac.gov.in" in agent.prompts[0]
+
+
+def test_expired_answer_is_asked_again(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), ttl=0.05)
+    agent = FakeAgent()
+    assistant = assistant_for(agent, cache)
+    assistant.ask("monsoon onset")
+    time.sleep(0.1)
+    _, latency = assistant.ask("monsoon onset")
+    assert len(agent.prompts) == 2 and not latency.cached
+
+
+def test_refresh_skips_and_replaces_the_cached_answer(cache):
+    agent = FakeAgent(answer="old")
+    assistant = assistant_for(agent, cache)
+    assistant.ask("cyclone track")
+    agent.answer = "new"
+    answer, latency = assistant.ask("cyclone track", refresh=True)
+    assert answer == "new" and not latency.cached
+    assert assistant.ask("cyclone track")[0] == "new"
+    assert len(agent.prompts) == 2
+
+
+def test_empty_answers_are_not_cached(cache):
+    agent = FakeAgent(answer=None)
+    assistant = assistant_for(agent, cache)
+    assert assistant.ask("nothing")[0] is None
+    assert cache.stats()["entries"] == 0
+    agent.answer = "something"
+    assert assistant.ask("nothing")[0] == "something"
+
+
+def test_cached_answer_streams_as_one_piece(cache):
+    agent = FakeAgent(pieces=["INSAT-3D ", "observes ", "the Indian Ocean."])
+    assistant = assistant_for(agent, cache)
+    streamed = []
+    answer, _ = assistant.ask("INSAT-3D coverage", on_token=streamed.append)
+    assert streamed == ["INSAT-3D ", "observes ", "the Indian Ocean."] and answer == "".join(streamed)
+
+    streamed.clear()
+    _, latency = assistant.ask("INSAT-3D coverage", on_token=streamed.append)
+    assert streamed == [answer] and latency.cached
+
+
+def test_agent_errors_propagate_and_are_not_cached(cache):
+    class FailingAgent:
+        def run(self, prompt, stream=False):
+            raise RuntimeError("rate limited")
+
+    assistant = Assistant(AgentPool(FailingAgent), cache)
+    with pytest.raises(RuntimeError):
+        assistant.ask("anything")
+    assert cache.stats()["entries"] == 0
+
+
+def test_pool_reuses_agents_and_waits_when_exhausted():
+    built = []
+
+    def factory():
+        agent = FakeAgent(delay=0.2)
+        built.append(agent)
+        return agent
+
+    pool = AgentPool(factory, size=1)
+    assert pool.run("a") == pool.run("b")
+    assert len(built) == 1
+
+    finished = []
+    threads = [threading.Thread(target=lambda: finished.append((pool.run("q"), time.perf_counter()))) for _ in range(2)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One agent, so the second caller waited for the first to hand it back.
+    assert len(built) == 1 and pool.built == 1
+    assert max(end for _, end in finished) - start >= 0.4
+
+
+def test_pool_forgets_agents_that_failed_to_build():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("no API key")
+        return FakeAgent()
+
+    pool = AgentPool(factory, size=1)
+    with pytest.raises(RuntimeError):
+        pool.run("q")
+    assert pool.built == 0
+    assert pool.run("q") == FakeAgent().answer
+
+
+class SlowStreamingAgent:
+    """Streams ``pieces`` one at a time, recording how many were produced."""
+
+    def __init__(self, pieces, delay=0.05):
+        self.pieces = pieces
+        self.delay = delay
+        self.produced = 0
+        self.closed = False
+
+    def run(self, prompt, stream=False):
+        def chunks():
+            try:
+                for piece in self.pieces:
+                    time.sleep(self.delay)
+                    self.produced += 1
+                    yield SimpleNamespace(content=piece)
+                    # Tool-call events carry no text and must not reach on_token.
+                    yield SimpleNamespace(content=None)
+            finally:
+                self.closed = True
+
+        return chunks()
+
+
+def test_streamed_tokens_arrive_in_order(cache):
+    pieces = [f"piece {i} " for i in range(10)]
+    assistant = Assistant(AgentPool(lambda: SlowStreamingAgent(pieces, delay=0)), cache)
+    streamed = []
+    answer, latency = assistant.ask("stream me", on_token=streamed.append)
+    assert streamed == pieces
+    assert answer == "".join(pieces)
+    assert cache.get("stream me", None, assistant.model) == answer
+    assert latency.first_token <= latency.total
+
+
+def test_cancelling_the_job_stops_the_stream(cache):
+    agent = SlowStreamingAgent([f"piece {i} " for i in range(40)])
+    pool = AgentPool(lambda: agent, size=1)
+    assistant = Assistant(pool, cache)
+    manager = JobManager(workers=1)
+
+    def ask(job):
+        def on_token(piece):
+            job.check()
+            job.partial.append(piece)
+        return assistant.ask("long answer", on_token=on_token)
+
+    job = manager.submit("chat", ask)
+    while len(job.partial) < 3:
+        time.sleep(0.01)
+    job.cancel()
+    while not job.finished:
+        time.sleep(0.01)
+
+    assert job.status == CANCELLED
+    assert job.partial == [f"piece {i} " for i in range(len(job.partial))]
+    assert agent.produced < len(agent.pieces) and agent.closed
+    # The agent went back to the pool and nothing partial was cached.
+    assert pool._idle.qsize() == 1
+    assert cache.stats()["entries"] == 0
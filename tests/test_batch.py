@@ -0,0 +1,128 @@
+import json
+import os
+
+import pytest
+
+from mosdac import batch
+from mosdac.batch import JsonlWriter, fingerprint, iter_input_files, run_batch
+from mosdac.cooccurrence import CooccurrenceCounts
+
+
+def fake_extract(text, passages=None):
+    """Capitalised words of each line co-occur; no parser needed."""
+    counts = CooccurrenceCounts()
+    for line in text.splitlines():
+        counts.add_group([word.strip(".,") for word in line.split() if word[:1].isupper()])
+        passages.append((line, []))
+    return counts, [("INSAT-3D", "observe", "Bay of Bengal")] if "INSAT-3D" in text else []
+
+
+@pytest.fixture
+def pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "extract_entities_relations", fake_extract)
+    directory = tmp_path / "pages"
+    directory.mkdir()
+    for name, text in [("insat.txt", "INSAT-3D observes the Bay of Bengal."),
+                       ("oceansat.txt", "Oceansat-3 watches the Arabian Sea."),
+                       ("scatsat.html", "<p>SCATSAT-1 measures Ocean winds.</p>")]:
+        (directory / name).write_text(text)
+    (directory / "notes.md").write_text("ignored")
+    return directory
+
+
+def records(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_inputs_are_listed_once_in_order(pages):
+    paths = list(iter_input_files([str(pages), str(pages / "*.txt")]))
+    assert [os.path.basename(path) for path in paths] == ["insat.txt", "oceansat.txt", "scatsat.html"]
+
+
+def test_in_process_run(pages, tmp_path):
+    output = tmp_path / "out.jsonl"
+    progress = []
+    summary = run_batch([str(pages)], JsonlWriter(str(output)), workers=1,
+                        on_record=lambda record, done, total: progress.append((done, total)))
+    assert (summary["files"], summary["skipped"], summary["failed"]) == (3, 0, 0)
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+    insat = records(output)[0]
+    assert fingerprint(insat["path"]) == (insat["path"], insat["size"], insat["mtime_ns"])
+    assert insat["pairs"] == [{"a": "INSAT-3D", "b": "Bay", "count": 1}, {"a": "INSAT-3D", "b": "Bengal", "count": 1},
+                              {"a": "Bay", "b": "Bengal", "count": 1}]
+    assert insat["triples"] == [{"subject": "INSAT-3D", "relation": "observe", "object": "Bay of Bengal"}]
+    assert insat["stats"]["sentences"] == 1 and insat["error"] is None
+
+
+def test_failures_are_recorded(pages, tmp_path, monkeypatch):
+    def broken(text, passages=None):
+        raise RuntimeError("parser crashed")
+
+    monkeypatch.setattr(batch, "extract_entities_relations", broken)
+    output = tmp_path / "out.jsonl"
+    summary = run_batch([str(pages)], JsonlWriter(str(output)), workers=1)
+    assert summary["failed"] == 3
+    assert all(record["error"] == "RuntimeError: parser crashed" and record["stats"] is None
+               for record in records(output))
+
+
+def test_finished_files_are_skipped(pages, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    run_batch([str(pages)], JsonlWriter(output), workers=1)
+    summary = run_batch([str(pages)], JsonlWriter(output), workers=1)
+    assert (summary["files"], summary["skipped"]) == (0, 3)
+    assert len(records(output)) == 3
+
+
+def test_changed_files_are_processed_again(pages, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    run_batch([str(pages)], JsonlWriter(output), workers=1)
+    (pages / "oceansat.txt").write_text("Oceansat-3 watches the Arabian Sea and the Bay of Bengal.")
+    stat = os.stat(pages / "insat.txt")
+    os.utime(pages / "insat.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    summary = run_batch([str(pages)], JsonlWriter(output), workers=1)
+    assert (summary["files"], summary["skipped"]) == (2, 1)
+    latest = records(output)[3:]
+    assert sorted(os.path.basename(record["path"]) for record in latest) == ["insat.txt", "oceansat.txt"]
+    assert {fingerprint(path) for path in iter_input_files([str(pages)])} <= JsonlWriter(output).done()
+
+
+def test_missing_output_has_nothing_done(tmp_path):
+    assert JsonlWriter(str(tmp_path / "out.jsonl")).done() == set()
+
+
+@pytest.mark.parametrize("tail", [
+    b'{"path": "/data/scatsat.html", "si',  # cut off mid-record
+    b'{"path": "/data/scatsat.html", "si\n{"path": "/data/kalpana.txt", "size": 1, "mtime_ns": 1}\n',  # torn write
+])
+def test_interrupted_output_is_truncated_to_whole_records(tmp_path, tail):
+    output = tmp_path / "out.jsonl"
+    whole = b"".join(
+        json.dumps({"path": path, "size": 10, "mtime_ns": 5, "error": None}).encode() + b"\n"
+        for path in ("/data/insat.txt", "/data/oceansat.txt")
+    )
+    output.write_bytes(whole + tail)
+
+    writer = JsonlWriter(str(output))
+    assert writer.done() == {("/data/insat.txt", 10, 5), ("/data/oceansat.txt", 10, 5)}
+    assert output.read_bytes() == whole
+    writer.write({"path": "/data/scatsat.html", "size": 12, "mtime_ns": 6, "error": None})
+    writer.close()
+    assert [record["path"] for record in records(output)] == ["/data/insat.txt", "/data/oceansat.txt",
+                                                              "/data/scatsat.html"]
+
+
+def test_interrupted_run_resumes(pages, tmp_path):
+    output = tmp_path / "out.jsonl"
+    run_batch([str(pages)], JsonlWriter(str(output)), workers=1)
+    lines = output.read_bytes().splitlines(keepends=True)
+    # Killed while writing the last record.
+    output.write_bytes(b"".join(lines[:2]) + lines[2][:20])
+
+    summary = run_batch([str(pages)], JsonlWriter(str(output)), workers=1)
+    assert (summary["files"], summary["skipped"]) == (1, 2)
+    assert [os.path.basename(record["path"]) for record in records(output)] == ["insat.txt", "oceansat.txt",
+                                                                                "scatsat.html"]
@@ -0,0 +1,80 @@
+from collections import Counter
+
+import pytest
+
+from mosdac.canonical import Canonicalizer, alias_version
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.graph_store import GraphStore
+
+
+def test_display_name_does_not_depend_on_mention_order():
+    mentions = ["the Kolkata Port", "Kolkata port", "kolkata port", "Kolkata port"]
+    names = set()
+    for order in (mentions, mentions[::-1], sorted(mentions)):
+        canonicalizer = Canonicalizer(aliases={})
+        keys = {canonicalizer.intern(mention) for mention in order}
+        assert len(keys) == 1
+        names.add(canonicalizer.name(keys.pop()))
+    assert names == {"Kolkata port"}
+
+
+def test_ties_are_broken_alphabetically():
+    for order in (["Kolkata Port", "kolkata port"], ["kolkata port", "Kolkata Port"]):
+        canonicalizer = Canonicalizer(aliases={})
+        key, = {canonicalizer.intern(name) for name in order}
+        assert canonicalizer.name(key) == "Kolkata Port"
+
+
+def test_gazetteer_terms_and_aliases_win():
+    canonicalizer = Canonicalizer(aliases={"SST": "Sea Surface Temperature"})
+    for mention in ("sst", "sst", "SST"):
+        canonicalizer.intern(mention)
+    assert canonicalizer.canonical("sst") == "Sea Surface Temperature"
+    assert canonicalizer.surface_forms("Sea Surface Temperature") == Counter({"sst": 3, "SST": 1})
+
+
+def test_canonicalizers_share_nothing():
+    first, second = Canonicalizer(aliases={}), Canonicalizer(aliases={})
+    first.canonical("Monsoon Trough")
+    assert second.mentions() == {}
+    assert second.lookup("monsoon trough") == "monsoon trough"
+
+
+def test_graph_store_merges_variants_from_separate_analyses(tmp_path):
+    store = GraphStore(str(tmp_path / "graph.sqlite3"))
+    for source, spelling in (("a", "Insat3D"), ("b", "INSAT 3D")):
+        canonicalizer = Canonicalizer(aliases={})
+        subject = canonicalizer.canonical(spelling)
+        pairs = CooccurrenceCounts()
+        pairs.add_group([subject, canonicalizer.canonical("Bay of Bengal")])
+        store.merge(source, pairs, [], canonicalizer.mentions())
+
+    G = store.subgraph()
+    assert set(G.nodes) == {"INSAT-3D", "Bay of Bengal"}
+    assert G["INSAT-3D"]["Bay of Bengal"]["weight"] == 2
+    stored = dict(store._conn.execute(
+        "SELECT surface, count FROM mentions JOIN nodes ON nodes.id = mentions.node WHERE nodes.name = 'INSAT-3D'"
+    ))
+    assert stored == {"Insat3D": 1, "INSAT 3D": 1}
+
+
+def test_alias_version_follows_the_alias_table(tmp_path, monkeypatch):
+    monkeypatch.delenv("MOSDAC_ALIASES", raising=False)
+    default = alias_version()
+    assert alias_version() == default
+
+    path = tmp_path / "aliases.json"
+    path.write_text('{"BoB": "Bay of Bengal"}', encoding="utf-8")
+    monkeypatch.setenv("MOSDAC_ALIASES", str(path))
+    assert alias_version() != default
+
+
+@pytest.mark.parametrize("renames", [{}, {"a": "A"}, {"a": "A", "b": "B"}])
+def test_cooccurrence_rename(renames):
+    pairs = CooccurrenceCounts()
+    pairs.add_group(["a", "b", "c"])
+    pairs.add_group(["a", "b"])
+    pairs.rename(renames)
+    weights = {(a, b): count for a, b, count in pairs.weighted_pairs()}
+    a, b = renames.get("a", "a"), renames.get("b", "b")
+    assert weights == {(a, b): 2, (a, "c"): 1, (b, "c"): 1}
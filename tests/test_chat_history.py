@@ -0,0 +1,78 @@
+import os
+import time
+
+from mosdac.chat_history import EXPIRED_TURN, SPILL_TTL, ChatHistory, remove_stale_spills
+
+
+def turns(count, start=0):
+    return [("user" if i % 2 == 0 else "bot", f"message {i}", "user" if i % 2 == 0 else "bot")
+            for i in range(start, start + count)]
+
+
+def filled(directory, count, window=2):
+    history = ChatHistory(str(directory), window=window)
+    for turn in turns(count):
+        history.append(*turn)
+    return history
+
+
+def backdate(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_old_turns_spill_to_disk(tmp_path):
+    history = filled(tmp_path, 5)
+    assert len(history) == 5
+    assert len(history._recent) == 2 and len(history._offsets) == 3
+    assert os.path.exists(history.path)
+
+
+def test_pages_span_spilled_and_recent_turns(tmp_path):
+    history = filled(tmp_path, 7, window=3)
+    assert history.page(0, 7) == turns(7)
+    assert history.page(2, 3) == turns(3, start=2)
+    assert history.page(3, 2) == turns(2, start=3)
+    assert history.page(5, 10) == turns(2, start=5)
+    assert history.page(-1, 2) == turns(1)
+    assert history.page(9) == []
+
+
+def test_unicode_survives_a_spill(tmp_path):
+    history = ChatHistory(str(tmp_path), window=1)
+    history.append("user", "🛰️ INSAT-3D → Bay of Bengal", "user")
+    history.append("bot", "ok", "bot")
+    assert history.page(0, 1) == [("user", "🛰️ INSAT-3D → Bay of Bengal", "user")]
+
+
+def test_clear_removes_the_spill_file(tmp_path):
+    history = filled(tmp_path, 4)
+    history.clear()
+    assert len(history) == 0 and history.page(0) == []
+    assert not os.path.exists(history.path)
+
+
+def test_stale_spills_are_removed(tmp_path):
+    stale, fresh = filled(tmp_path, 3), filled(tmp_path, 3)
+    backdate(stale.path, SPILL_TTL + 3600)
+    (tmp_path / "notes.txt").write_text("kept")
+    remove_stale_spills(str(tmp_path))
+    assert not os.path.exists(stale.path)
+    assert os.path.exists(fresh.path) and (tmp_path / "notes.txt").exists()
+
+
+def test_turns_of_a_removed_spill_read_back_as_expired(tmp_path):
+    history = filled(tmp_path, 5)
+    backdate(history.path, SPILL_TTL + 3600)
+    ChatHistory(str(tmp_path))  # a new session cleans up the idle one's spill file
+
+    assert len(history) == 5
+    assert history.page(0) == [EXPIRED_TURN] * 3 + turns(2, start=3)
+    assert history.page(3, 1) == turns(1, start=3)
+
+    # The conversation goes on: new spills start a new file after the expired turns.
+    for turn in turns(2, start=5):
+        history.append(*turn)
+    assert len(history) == 7
+    assert history.page(0) == [EXPIRED_TURN] * 3 + turns(4, start=3)
+    assert history.page(4, 2) == turns(2, start=4)
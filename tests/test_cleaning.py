@@ -0,0 +1,61 @@
+import pytest
+
+from mosdac import cleaning
+from mosdac.benchmark import sample_html
+
+CASES = [
+    "",
+    "plain text without markup",
+    "<p>INSAT-3D &amp; INSAT-3DR &copy; ISRO</p>",
+    "<html><head><title>MOSDAC</title><style>p {color: red}</style></head>"
+    "<body><script>var s = '<p>not text</p>';</script><p>Ocean <b>wind</b> data</p></body></html>",
+    "<div>a<b>b</b>c</div><ul><li>one</li><li>two</li></ul><br/>tail",
+    "<!DOCTYPE html><!-- comment --><template><p>hidden</p></template><ruby>Kan<rt>ji</rt></ruby>",
+    "<p>unclosed <b>bold <i>italic",
+    "<table><tr><td>SST</td><td>28.5 C</td></tr><tr><td>Wind</td><td>12 m/s</td></tr></table>",
+    # CDATA
+    "<p>before<![CDATA[ INSAT-3D data ]]>after</p>",
+    "<svg><text><![CDATA[ Bay of Bengal ]]></text></svg>",
+    "<p><![cdata[ lower case marker ]]></p>",
+    "<p><![CDATA[ a < b & c > d ]]></p><p><![CDATA[ second\nline ]]></p>",
+    "<script><![CDATA[ var hidden = 1; ]]></script><p>shown</p>",
+    "<!-- <![CDATA[ commented out ]]> --><p>kept</p>",
+    # script and style
+    "<SCRIPT type='text/javascript'>document.write('<p>x</p>')</SCRIPT><p>after</p>",
+    "<script>if (a < b && c > d) {}</script>visible",
+    "<style>/* </p> */ body{}</style>shown",
+    "<p>a</p><script>x</script>tail text<style>p{}</style><script src='a.js'></script>",
+    "<noscript>Enable JavaScript</noscript>",
+    # entities
+    "<p>&lt;b&gt;not bold&lt;/b&gt; and &amp;amp;</p>",
+    "<p>Sea&nbsp;Surface &#8364;5 &euro;5 &#x41;&#66; &quot;SST&quot; &#39;OLR&#39;</p>",
+    "<p>R&amp;D at SAC &mdash; Ahmedabad &hellip; &copy;2024</p>",
+    "<p>Tom&Jerry &amp Co</p>",
+]
+
+
+@pytest.mark.parametrize("backend", [*cleaning.BACKENDS, "blocks"])
+@pytest.mark.parametrize("case", CASES + [sample_html(50)], ids=lambda case: case[:40])
+def test_backends_match_bs4(case, backend):
+    expected = " ".join(cleaning.clean_text(case, "bs4").split())
+    if backend == "blocks":
+        output = " ".join(cleaning.iter_clean_blocks(case))
+    else:
+        output = cleaning.clean_text(case, backend)
+    assert " ".join(output.split()) == expected
+
+
+@pytest.mark.parametrize("backend", cleaning.BACKENDS)
+def test_cdata_text_is_kept(backend):
+    assert cleaning.clean_text("<p>before<![CDATA[ INSAT-3D data ]]>after</p>", backend).split() == [
+        "before", "INSAT-3D", "data", "after",
+    ]
+
+
+def test_blocks_split_at_block_tags():
+    assert list(cleaning.iter_clean_blocks(["<p>first", " block</p><p>second</p>"])) == ["first block", "second"]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        cleaning.clean_text("<p>x</p>", "regex")
@@ -0,0 +1,103 @@
+from conftest import html
+
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.crawler import crawl_site, iter_crawl, probe_url
+
+
+def crawled(seed, **options):
+    return {page.url: page for page in iter_crawl(seed, **options)}
+
+
+def test_depth_limit(serve):
+    site = serve({
+        "/": html("<p>Home</p><a href='/a'>a</a>"),
+        "/a": html("<p>INSAT-3D page</p><a href='/b'>b</a>"),
+        "/b": html("<p>Too deep</p>"),
+    })
+    pages = crawled(site.url, max_depth=1)
+    assert set(pages) == {site.url, site.url + "/a"}
+    assert pages[site.url + "/a"].depth == 1
+    assert "/b" not in site.paths
+
+    assert set(crawled(site.url, max_depth=2)) == {site.url, site.url + "/a", site.url + "/b"}
+
+
+def test_max_pages(serve):
+    site = serve({"/": html("".join(f"<a href='/p{i}'>{i}</a>" for i in range(10)))}
+                 | {f"/p{i}": html(f"<p>page {i}</p>") for i in range(10)})
+    assert len(crawled(site.url, max_pages=4)) == 4
+
+
+def test_only_same_site_links_are_followed(serve):
+    other = serve({"/": html("<p>Elsewhere</p>")}, host="localhost")
+    site = serve({
+        "/": html(f"<a href='{other.url}/'>other</a><a href='mailto:help@mosdac.gov.in'>mail</a><a href='/a#top'>a</a>"),
+        "/a": html("<p>Same site</p>"),
+    })
+    pages = crawled(site.url, max_depth=2)
+    assert set(pages) == {site.url, site.url + "/a"}
+    assert other.requests == []
+
+
+def test_non_html_links_are_skipped(serve):
+    site = serve({
+        "/": html("<a href='/report.pdf'>pdf</a><a href='/logo.png'>logo</a><a href='/data'>data</a>"),
+        "/data": (200, "application/json", '{"sst": 28.5}', {}),
+    })
+    pages = crawled(site.url)
+    # Known binary extensions are never requested; other non-HTML answers are skipped.
+    assert "/report.pdf" not in site.paths and "/logo.png" not in site.paths
+    assert pages[site.url + "/data"].error == "skipped application/json"
+    assert pages[site.url + "/data"].text == ""
+
+
+def test_sitemap_adds_unlinked_pages(serve):
+    routes = {
+        "/": html("<p>Home without links</p>"),
+        "/orphan": html("<p>Only in the sitemap</p>"),
+    }
+    site = serve(routes)
+    routes["/sitemap.xml"] = (200, "application/xml", f"<urlset><url><loc>{site.url}/orphan</loc></url></urlset>", {})
+
+    assert set(crawled(site.url, use_sitemap=True)) == {site.url, site.url + "/orphan"}
+    assert set(crawled(site.url)) == {site.url}
+
+
+def test_failed_pages_are_reported(serve):
+    site = serve({"/": html("<a href='/missing'>gone</a>")})
+    pages = crawled(site.url)
+    assert pages[site.url + "/missing"].status == 404
+    assert pages[site.url + "/missing"].error == "HTTP 404"
+
+
+def test_crawl_site_extracts_every_page(serve):
+    site = serve({
+        "/": html("<p>Home</p><a href='/a'>a</a>"),
+        "/a": html("<p>Page a</p>"),
+    })
+    extracted = []
+
+    def extract(text, passages):
+        extracted.append(text)
+        passages.append((text, []))
+        return CooccurrenceCounts(), []
+
+    pages, _, triples, passages = crawl_site(site.url, extract, max_depth=1)
+    assert len(pages) == 2 and all(page.text == "" for page in pages)
+    assert sorted(extracted) == ["Home a", "Page a"]
+    assert len(passages) == 2 and triples == []
+
+
+def test_probe_url(serve):
+    site = serve({"/": html("<script>skip()</script><p>INSAT-3D observes the Bay of Bengal.</p>")})
+
+    def extract(blocks, passages):
+        text = " ".join(blocks)
+        passages.append((text, []))
+        return CooccurrenceCounts(), [("INSAT-3D", "observe", "Bay of Bengal")]
+
+    probe = probe_url(site.url + "/", extract)
+    assert probe.status == 200
+    assert probe.text == "INSAT-3D observes the Bay of Bengal."
+    assert probe.triples == [("INSAT-3D", "observe", "Bay of Bengal")]
+    assert probe_url(site.url + "/missing", extract).status == 404
@@ -0,0 +1,121 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+import spacy
+
+from mosdac import extraction_cache
+from mosdac.extraction_cache import ExtractionCache
+from mosdac.nlp import MODEL_NAME, extract_entities_relations, model_version
+
+SENTENCES = [
+    "INSAT-3D observes the Bay of Bengal.",
+    "Oceansat-3 watches the Arabian Sea.",
+    "INSAT-3D observes the Bay of Bengal.",
+]
+
+
+class Extractor:
+    """Capitalised words as entities; records which sentences it was asked to parse."""
+
+    def __init__(self):
+        self.parsed = []
+
+    def __call__(self, sentences):
+        for sentence in sentences:
+            self.parsed.append(sentence)
+            entities = [word.strip(".") for word in sentence.split() if word[:1].isupper()]
+            yield [entities], [(entities[0], "observe", entities[-1])]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "extractions.sqlite3")
+
+
+def run(cache, sentences, extractor):
+    return list(cache.extract(sentences, extractor))
+
+
+def test_repeated_sentences_are_hits(path):
+    cache, extractor = ExtractionCache("v1", path=path), Extractor()
+    first = run(cache, SENTENCES, extractor)
+    assert extractor.parsed == SENTENCES[:2]
+    assert [sentence for sentence, _ in first] == SENTENCES
+    assert first[0][1] == first[2][1]
+
+    # Whitespace differences hash to the same entry.
+    again = run(cache, ["INSAT-3D  observes the\nBay of Bengal."], extractor)
+    assert extractor.parsed == SENTENCES[:2]
+    assert again[0][1] == ([["INSAT-3D", "Bay", "Bengal"]], [("INSAT-3D", "observe", "Bengal")])
+    assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 2
+
+
+def test_entries_survive_a_restart(path):
+    run(ExtractionCache("v1", path=path), SENTENCES, Extractor())
+    extractor = Extractor()
+    cache = ExtractionCache("v1", path=path)
+    run(cache, SENTENCES, extractor)
+    assert extractor.parsed == []
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_a_new_model_version_misses(path):
+    run(ExtractionCache("v1", path=path), SENTENCES, Extractor())
+    extractor = Extractor()
+    cache = ExtractionCache("v2", path=path)
+    run(cache, SENTENCES, extractor)
+    assert extractor.parsed == SENTENCES[:2]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_least_recently_used_entries_are_evicted(path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(extraction_cache, "time", SimpleNamespace(time=lambda: float(next(clock))))
+    cache, extractor = ExtractionCache("v1", path=path, max_entries=2), Extractor()
+    run(cache, ["Kalpana-1 images India."], extractor)
+    run(cache, ["SCATSAT-1 measures Ocean winds."], extractor)
+    run(cache, ["Kalpana-1 images India."], extractor)  # now more recent than SCATSAT-1
+    run(cache, ["Megha-Tropiques orbits over India."], extractor)
+    assert cache.stats()["entries"] == 2
+
+    extractor.parsed.clear()
+    run(cache, ["Kalpana-1 images India.", "Megha-Tropiques orbits over India.", "SCATSAT-1 measures Ocean winds."],
+        extractor)
+    assert extractor.parsed == ["SCATSAT-1 measures Ocean winds."]
+
+
+def test_long_inputs_are_read_in_windows(path):
+    cache, extractor = ExtractionCache("v1", path=path), Extractor()
+    sentences = [f"Station {i} reports Rain." for i in range(10)]
+    results = list(cache.extract(sentences, extractor, window=3))
+    assert [sentence for sentence, _ in results] == sentences
+    assert cache.stats()["misses"] == 10
+
+
+def test_clear(path):
+    cache = ExtractionCache("v1", path=path)
+    run(cache, SENTENCES, Extractor())
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0}
+
+
+@pytest.fixture(scope="module")
+def model():
+    if not spacy.util.is_package(MODEL_NAME):
+        pytest.skip(f"{MODEL_NAME} is not installed")
+
+
+def test_cached_extraction_matches_uncached(model, path):
+    text = (
+        "INSAT-3D was launched by ISRO. The Imager on INSAT-3D observes the Bay of Bengal and the Arabian Sea. "
+        "SCATSAT-1, which measures ocean winds, was launched from Sriharikota. "
+        "INSAT-3D was launched by ISRO."
+    )
+    expected_counts, expected_triples = extract_entities_relations(text)
+    expected = (sorted(expected_counts.weighted_pairs()), sorted(expected_triples))
+    for _ in range(2):  # cold cache, then warm
+        cache = ExtractionCache(model_version(), path=path)
+        counts, triples = extract_entities_relations(text, cache=cache)
+        assert (sorted(counts.weighted_pairs()), sorted(triples)) == expected
+    assert cache.misses == 0
@@ -0,0 +1,53 @@
+import pytest
+import spacy
+
+from mosdac.canonical import Canonicalizer
+from mosdac.gazetteer import GAZETTEER
+from mosdac.nlp import add_gazetteer
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    nlp = spacy.blank("en")
+    add_gazetteer(nlp)
+    return nlp
+
+
+def entities(nlp, text):
+    return [(ent.text, ent.label_) for ent in nlp(text).ents]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Oceansat 2 and Oceansat 3 observe the ocean.", ["Oceansat 2", "Oceansat 3"]),
+    ("INSAT 3D and INSAT 3DR share a platform.", ["INSAT 3D", "INSAT 3DR"]),
+    ("INSAT-3D, Insat3D and the INSAT series.", ["INSAT-3D", "Insat3D", "INSAT"]),
+    ("Oceansat-4 is not listed but still numbered.", ["Oceansat-4"]),
+])
+def test_numbered_satellites_stay_distinct(nlp, text, expected):
+    assert entities(nlp, text) == [(name, "SATELLITE") for name in expected]
+
+
+@pytest.mark.parametrize("text", [
+    "Dense fog delayed the flights.",
+    "A depression can follow a long illness.",
+    "Rainfall was normal this year.",
+    "The aws and ccd files belong to Rosa.",
+])
+def test_common_words_are_not_entities(nlp, text):
+    assert entities(nlp, text) == []
+
+
+def test_acronyms_match_as_written(nlp):
+    assert entities(nlp, "The AWS, CCD and ROSA data.") == [("AWS", "SENSOR"), ("CCD", "SENSOR"), ("ROSA", "SENSOR")]
+    assert entities(nlp, "A Deep Depression formed.") == [("Deep Depression", "WEATHER")]
+
+
+@pytest.mark.parametrize("name", ["INSAT 3D", "insat3dr", "Oceansat 4", "Kalpana 1", "INSAT"])
+def test_series_category(name):
+    assert GAZETTEER.category(name) == "SATELLITE"
+
+
+def test_spelling_variants_share_a_canonical_name():
+    canonicalizer = Canonicalizer(aliases={})
+    assert {canonicalizer.canonical(name) for name in ("INSAT 3D", "Insat3D", "INSAT-3D")} == {"INSAT-3D"}
+    assert canonicalizer.canonical("Oceansat 2") != canonicalizer.canonical("Oceansat 3")
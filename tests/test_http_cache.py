@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+import requests
+from conftest import html
+
+from mosdac.http_cache import HttpCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache("v1", path=str(tmp_path / "http.sqlite3"), ttl=0)
+
+
+def etag_route(body="<p>INSAT-3D</p>", etag='"v1"'):
+    def route(headers):
+        if headers.get("If-None-Match") == etag:
+            return 304, "text/html", "", {"ETag": etag}
+        return 200, "text/html", body, {"ETag": etag}
+    return route
+
+
+def test_fresh_entries_are_hits(serve, tmp_path):
+    site = serve({"/": html("<p>INSAT-3D</p>")})
+    cache = HttpCache("v1", path=str(tmp_path / "http.sqlite3"), ttl=60)
+    with requests.Session() as session:
+        assert cache.get(session, site.url + "/").outcome == "miss"
+        assert cache.get(session, site.url + "/").outcome == "hit"
+    assert len(site.requests) == 1
+
+
+def test_revalidation_reuses_the_stored_body(serve, cache):
+    site = serve({"/": etag_route()})
+    with requests.Session() as session:
+        first = cache.get(session, site.url + "/")
+        second = cache.get(session, site.url + "/")
+    assert (first.outcome, second.outcome) == ("miss", "revalidated")
+    assert second.status == 200 and second.text == first.text == "<p>INSAT-3D</p>"
+    assert site.requests[1][1]["If-None-Match"] == '"v1"'
+
+
+def test_unexpected_304_is_fetched_again_without_validators(serve, cache):
+    answers = iter([(304, "text/html", "", {}), (200, "text/html", "<p>Oceansat-3</p>", {})])
+    site = serve({"/": lambda headers: next(answers)})
+    with requests.Session() as session:
+        result = cache.get(session, site.url + "/")
+    assert (result.status, result.outcome, result.text) == (200, "miss", "<p>Oceansat-3</p>")
+    assert len(site.requests) == 2
+    assert not any(name.startswith("If-") for name in site.requests[1][1])
+    assert cache.stats()["entries"] == 1
+
+
+def test_unreachable_server_serves_stale(serve, cache):
+    site = serve({"/": html("<p>Kalpana-1</p>")})
+    url = site.url + "/"
+    with requests.Session() as session:
+        cache.get(session, url)
+        site.close()
+        result = cache.get(session, url, timeout=1)
+    assert result.outcome == "stale" and result.text.endswith("<p>Kalpana-1</p></body></html>")
+
+
+def test_counters_are_exact_under_concurrency(serve, tmp_path):
+    site = serve({"/": html("<p>INSAT-3DR</p>")})
+    cache = HttpCache("v1", path=str(tmp_path / "http.sqlite3"), ttl=None)
+    with requests.Session() as session:
+        cache.get(session, site.url + "/")
+
+    def hammer():
+        with requests.Session() as session:
+            for _ in range(200):
+                cache.get(session, site.url + "/")
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["hits"] == 1600 and cache.stats()["misses"] == 1
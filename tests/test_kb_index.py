@@ -0,0 +1,84 @@
+import pytest
+
+from mosdac.benchmark import scan_triples
+from mosdac.kb_index import TripleIndex, tokenize
+
+TRIPLES = [
+    ("INSAT-3D", "observe", "Bay of Bengal"),
+    ("ISRO", "be", "space agency"),
+    ("INSAT-3D", "carry", "Imager"),
+    ("Oceansat-3", "carry", "Ocean Colour Monitor"),
+    ("SCATSAT-1", "measure", "ocean winds"),
+    ("MOSDAC", "distribute", "INSAT-3D data"),
+    ("Megha-Tropiques", "orbit over", "India"),
+]
+
+
+@pytest.fixture
+def index():
+    return TripleIndex(TRIPLES)
+
+
+def test_stopwords_are_dropped():
+    assert tokenize("What is the Bay of Bengal?") == ["bay", "bengal"]
+
+
+@pytest.mark.parametrize("query", [
+    "What is INSAT-3D?",
+    "Where can I get ocean data?",
+    "Tell me about the Bay of Bengal",
+])
+def test_stopword_relations_never_match(index, query):
+    assert ("ISRO", "be", "space agency") not in index.search(query)
+    # The old substring scan matched "be" inside almost any question.
+    assert ("ISRO", "be", "space agency") in scan_triples(TRIPLES, query + " before")
+
+
+def test_stopword_relations_match_through_their_subject(index):
+    assert index.search("Who is ISRO?") == [("ISRO", "be", "space agency")]
+
+
+def test_every_token_of_a_field_must_appear(index):
+    assert index.search("What does the Ocean Colour Monitor do?") == [("Oceansat-3", "carry", "Ocean Colour Monitor")]
+    # "ocean" alone covers neither "Ocean Colour Monitor" nor "ocean winds".
+    assert index.search("Which satellites watch the ocean?") == []
+    assert index.search("ocean winds") == [("SCATSAT-1", "measure", "ocean winds")]
+
+
+def test_no_match(index):
+    assert index.search("Kalpana-1 rainfall") == []
+    assert index.search("") == []
+    assert TripleIndex([]).search("INSAT-3D") == []
+
+
+def test_rare_tokens_rank_first():
+    index = TripleIndex([("Imager", "on", "INSAT-3D"), ("Imager", "on", "Kalpana-1"), ("Sounder", "on", "INSAT-3D")])
+    # Both subjects match in full, but "sounder" is in one triple and "imager" in two.
+    assert index.search("Imager and Sounder data") == [
+        ("Sounder", "on", "INSAT-3D"), ("Imager", "on", "INSAT-3D"), ("Imager", "on", "Kalpana-1"),
+    ]
+
+
+def test_more_matched_fields_rank_higher(index):
+    results = index.search("INSAT-3D Imager")
+    assert results == [("INSAT-3D", "carry", "Imager"), ("INSAT-3D", "observe", "Bay of Bengal")]
+
+
+def test_subjects_and_objects_outweigh_relations():
+    index = TripleIndex([("Oceansat-3", "measure", "chlorophyll"), ("SCATSAT-1", "orbit", "Earth")])
+    # Both match one token of equal IDF; the object match wins.
+    assert index.search("measure Earth") == [("SCATSAT-1", "orbit", "Earth"), ("Oceansat-3", "measure", "chlorophyll")]
+
+
+def test_ties_keep_extraction_order():
+    index = TripleIndex([("INSAT-3D", "carry", "Imager"), ("INSAT-3D", "carry", "Sounder")])
+    assert index.search("INSAT-3D") == [("INSAT-3D", "carry", "Imager"), ("INSAT-3D", "carry", "Sounder")]
+
+
+def test_results_are_the_extracted_triples(index):
+    # The chat formats results as "**s** — *r* → **o**", so they must come back exactly as extracted.
+    for query in ("INSAT-3D", "Which satellites orbit over India?", "MOSDAC distribute"):
+        results = index.search(query)
+        assert results and all(triple in TRIPLES and type(triple) is tuple for triple in results)
+        assert set(results) <= set(scan_triples(TRIPLES, query))
+    assert len(index) == len(TRIPLES)
@@ -0,0 +1,128 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from mosdac import layout
+from mosdac.layout import (LARGE_GRAPH, LayoutCache, approximate_force_layout, collapse_leaf_nodes,
+                           compute_layout, prune_graph)
+
+
+def star(hub, leaves, weight=1):
+    G = nx.DiGraph()
+    for i in range(leaves):
+        G.add_edge(hub, f"{hub} leaf {i}", label="related", weight=weight)
+    return G
+
+
+def mesh(count, seed=1):
+    return nx.DiGraph(nx.gnm_random_graph(count, count * 3, seed=seed))
+
+
+def test_leaves_on_one_hub_collapse_into_a_summary_node():
+    G = star("INSAT-3D", 4, weight=2)
+    G.add_edge("INSAT-3D", "Oceansat-3", weight=1)
+    G.add_edge("Oceansat-3", "Arabian Sea", weight=1)
+    collapsed = collapse_leaf_nodes(G)
+    assert set(collapsed) == {"INSAT-3D", "Oceansat-3", "Arabian Sea", "+4 more"}
+    assert collapsed.edges["INSAT-3D", "+4 more"]["collapsed"] == 4
+    assert collapsed.edges["INSAT-3D", "+4 more"]["weight"] == 8
+    assert G.number_of_nodes() == 7  # the input graph is left alone
+
+
+def test_small_leaf_groups_are_kept():
+    G = star("INSAT-3D", 2)
+    assert collapse_leaf_nodes(G) is G
+
+
+def test_small_graphs_are_not_pruned():
+    G = mesh(20)
+    assert prune_graph(G, collapse_leaves=False) is G
+
+
+def test_pruning_keeps_the_heaviest_nodes():
+    G = mesh(60)
+    degree = dict(G.degree(weight="weight"))
+    pruned = prune_graph(G, max_nodes=10, collapse_leaves=False)
+    assert pruned.number_of_nodes() == 10
+    assert min(degree[node] for node in pruned) >= max(degree[node] for node in G if node not in pruned)
+
+
+def test_kcore_pruning_keeps_the_dense_core():
+    G = nx.DiGraph(nx.complete_graph(5))
+    # A long path of heavy edges: high weighted degree, but core number 1.
+    nx.add_path(G, range(10, 30), weight=10)
+    pruned = prune_graph(G, max_nodes=5, strategy="kcore", collapse_leaves=False)
+    assert set(pruned) == set(range(5))
+    assert set(prune_graph(G, max_nodes=5, collapse_leaves=False)) <= set(range(10, 30))
+
+
+def test_scores_override_the_strategy():
+    G = mesh(30)
+    scores = {node: -node for node in G}
+    assert set(prune_graph(G, max_nodes=5, collapse_leaves=False, scores=scores)) == set(range(5))
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        prune_graph(mesh(30), max_nodes=5, strategy="random")
+
+
+def test_unchanged_graphs_reuse_their_layout():
+    cache = LayoutCache()
+    first = cache.positions(mesh(30))
+    assert cache.positions(mesh(30)) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_grown_graphs_start_from_the_cached_layout(monkeypatch):
+    cache = LayoutCache()
+    G = mesh(30)
+    before = cache.positions(G)
+    calls = []
+    original = layout.compute_layout
+    monkeypatch.setattr(layout, "compute_layout", lambda G, previous=None: calls.append(previous) or original(G, previous))
+    grown = G.copy()
+    grown.add_edge(0, "Oceansat-3")
+    after = cache.positions(grown)
+    assert calls == [before]
+    assert set(after) == set(grown)
+    assert cache.misses == 2
+
+
+def test_warm_start_keeps_nodes_in_place():
+    G = mesh(30)
+    # Mirror a fresh layout so the previous positions differ from what a cold start settles on.
+    previous = {node: xy * [-1, 1] for node, xy in compute_layout(G).items()}
+    grown = G.copy()
+    grown.add_edge(0, "Oceansat-3")
+    warm = compute_layout(grown, previous)
+    cold = compute_layout(grown)
+    drift = lambda pos: np.mean([np.linalg.norm(pos[node] - previous[node]) for node in G])
+    assert drift(warm) < drift(cold)
+
+
+def test_large_graphs_use_the_approximate_layout(monkeypatch):
+    G = mesh(LARGE_GRAPH + 50)
+    monkeypatch.setattr(nx, "spring_layout", lambda *args, **kwargs: pytest.fail("spring_layout on a large graph"))
+    pos = compute_layout(G)
+    assert set(pos) == set(G)
+    X = np.array(list(pos.values()))
+    assert np.isfinite(X).all() and np.abs(X).max() == pytest.approx(1.0)
+    # Nodes are spread out rather than piled on one spot.
+    assert len({tuple(np.round(x, 3)) for x in X}) == len(X)
+
+
+def test_approximate_layout_pulls_neighbours_together():
+    G = nx.DiGraph()
+    for cluster in range(3):
+        nx.add_path(G, [f"{cluster}-{i}" for i in range(150)] + [f"{cluster}-0"])
+    G.add_edge("0-0", "1-0")
+    G.add_edge("1-0", "2-0")
+    pos = approximate_force_layout(G)
+    neighbours = np.mean([np.linalg.norm(pos[a] - pos[b]) for a, b in G.edges])
+    anywhere = np.mean([np.linalg.norm(pos[a] - pos[b]) for a in list(G)[::7] for b in list(G)[::11]])
+    assert neighbours < anywhere / 2
+
+
+def test_approximate_layout_of_an_empty_graph():
+    assert approximate_force_layout(nx.DiGraph()) == {}
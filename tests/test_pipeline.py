@@ -0,0 +1,54 @@
+import io
+import zipfile
+
+from mosdac.cooccurrence import CooccurrenceCounts
+from mosdac.ingest import preview
+from mosdac.jobs import Job
+from mosdac.pipeline import Pipeline
+
+
+class RecordingPipeline(Pipeline):
+    """Reads the cleaned blocks and records progress instead of running spaCy."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocks = []
+        self.progress = []
+
+    def extract(self, job, text, passages, canonicalizer, stage=None):
+        for block in text:
+            self.blocks.append(block)
+            self.progress.append(job.progress)
+        return CooccurrenceCounts(), []
+
+
+def archive(pages):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for name, text in pages.items():
+            bundle.writestr(name, text)
+    return buffer.getvalue()
+
+
+def test_upload_is_read_in_place_after_a_preview():
+    pages = {f"page{i}.txt": f"INSAT-3D page {i}. " * 2000 for i in range(3)}
+    upload = io.BytesIO(archive(pages))
+    assert preview(upload, "bundle.zip", words=5) == "INSAT-3D page 0. INSAT-3D page"
+
+    upload.seek(0)
+    pipeline = RecordingPipeline()
+    analysis = pipeline.analyze_upload(Job("upload"), upload, "bundle.zip")
+    assert analysis.pages == list(pages)
+    assert " ".join(pipeline.blocks).count("INSAT-3D") == 6000
+    assert all(0.0 <= progress <= 1.0 for progress in pipeline.progress)
+
+
+def test_progress_is_relative_to_the_starting_position():
+    text = b"Cyclone over the Bay of Bengal. " * 4000
+    upload = io.BytesIO(b"ignored prefix" + text)
+    upload.seek(len(b"ignored prefix"))
+    pipeline = RecordingPipeline()
+    pipeline.analyze_upload(Job("upload"), upload, "report.txt")
+    assert "ignored" not in " ".join(pipeline.blocks)
+    assert pipeline.progress == sorted(pipeline.progress)
+    assert pipeline.progress[-1] == 1.0
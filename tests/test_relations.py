@@ -0,0 +1,138 @@
+from collections import Counter
+
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+from mosdac.nlp import MODEL_NAME, load_nlp
+from mosdac.relations import PATTERNS, doc_relations, root_relations
+
+
+def parsed(*tokens, ents=None):
+    """A doc from ``(word, head index, dep, pos, lemma)`` tokens, as the parser would annotate it."""
+    words, heads, deps, pos, lemmas = zip(*tokens)
+    return Doc(spacy.blank("en").vocab, words=list(words), heads=list(heads), deps=list(deps), pos=list(pos),
+               lemmas=list(lemmas), ents=ents)
+
+
+def relations(doc):
+    counts = Counter()
+    triples = [triple for sentence in doc_relations(doc, counts).values() for triple in sentence]
+    return triples, counts
+
+
+# One hand-parsed sentence per pattern, with the triple it must produce.
+HAND_PARSED = {
+    "svo": (
+        parsed(("ISRO", 1, "nsubj", "PROPN", "ISRO"), ("launched", 1, "ROOT", "VERB", "launch"),
+               ("SCATSAT-1", 1, "dobj", "PROPN", "SCATSAT-1")),
+        ("ISRO", "launch", "SCATSAT-1"),
+    ),
+    "conj": (
+        parsed(("ISRO", 1, "nsubj", "PROPN", "ISRO"), ("built", 1, "ROOT", "VERB", "build"),
+               ("and", 1, "cc", "CCONJ", "and"), ("launched", 1, "conj", "VERB", "launch"),
+               ("INSAT-3D", 3, "dobj", "PROPN", "INSAT-3D")),
+        ("ISRO", "launch", "INSAT-3D"),
+    ),
+    "passive": (
+        parsed(("INSAT-3D", 2, "nsubjpass", "PROPN", "INSAT-3D"), ("was", 2, "auxpass", "AUX", "be"),
+               ("launched", 2, "ROOT", "VERB", "launch"), ("by", 2, "agent", "ADP", "by"),
+               ("ISRO", 3, "pobj", "PROPN", "ISRO")),
+        ("ISRO", "launch", "INSAT-3D"),
+    ),
+    "passive_prep": (
+        parsed(("SCATSAT-1", 2, "nsubjpass", "PROPN", "SCATSAT-1"), ("was", 2, "auxpass", "AUX", "be"),
+               ("launched", 2, "ROOT", "VERB", "launch"), ("from", 2, "prep", "ADP", "from"),
+               ("Sriharikota", 3, "pobj", "PROPN", "Sriharikota")),
+        ("SCATSAT-1", "launch from", "Sriharikota"),
+    ),
+    "prep": (
+        parsed(("Megha-Tropiques", 1, "nsubj", "PROPN", "Megha-Tropiques"), ("orbits", 1, "ROOT", "VERB", "orbit"),
+               ("over", 1, "prep", "ADP", "over"), ("India", 2, "pobj", "PROPN", "India")),
+        ("Megha-Tropiques", "orbit over", "India"),
+    ),
+    "object_prep": (
+        parsed(("INSAT-3D", 1, "nsubj", "PROPN", "INSAT-3D"), ("provides", 1, "ROOT", "VERB", "provide"),
+               ("data", 1, "dobj", "NOUN", "datum"), ("over", 2, "prep", "ADP", "over"),
+               ("the", 6, "det", "DET", "the"), ("Indian", 6, "compound", "PROPN", "Indian"),
+               ("Ocean", 3, "pobj", "PROPN", "Ocean"),
+               ents=["B-SATELLITE", "O", "O", "O", "O", "B-OCEAN", "I-OCEAN"]),
+        ("INSAT-3D", "provide data over", "Indian Ocean"),
+    ),
+    "relcl": (
+        parsed(("SCATSAT-1", 0, "ROOT", "PROPN", "SCATSAT-1"), (",", 0, "punct", "PUNCT", ","),
+               ("which", 3, "nsubj", "PRON", "which"), ("measures", 0, "relcl", "VERB", "measure"),
+               ("winds", 3, "dobj", "NOUN", "wind")),
+        ("SCATSAT-1", "measure", "winds"),
+    ),
+    "appos": (
+        parsed(("ISRO", 6, "nsubj", "PROPN", "ISRO"), (",", 0, "punct", "PUNCT", ","),
+               ("the", 4, "det", "DET", "the"), ("space", 4, "compound", "NOUN", "space"),
+               ("agency", 0, "appos", "NOUN", "agency"), (",", 0, "punct", "PUNCT", ","),
+               ("built", 6, "ROOT", "VERB", "build"), ("INSAT-3D", 6, "dobj", "PROPN", "INSAT-3D")),
+        ("ISRO", "be", "space agency"),
+    ),
+}
+
+
+def test_every_pattern_has_a_case():
+    assert set(HAND_PARSED) == set(PATTERNS)
+
+
+@pytest.mark.parametrize("name", HAND_PARSED)
+def test_pattern_on_hand_parsed_sentence(name):
+    doc, expected = HAND_PARSED[name]
+    triples, counts = relations(doc)
+    assert expected in triples
+    assert counts[name] >= 1
+    assert sum(counts.values()) == len(triples) == len(set(triples))
+
+
+def test_relative_pronouns_are_not_subjects():
+    doc, _ = HAND_PARSED["relcl"]
+    triples, counts = relations(doc)
+    assert all(subject != "which" for subject, _, _ in triples)
+    assert counts["svo"] == 0
+
+
+def test_patterns_find_what_the_root_loop_misses():
+    doc, expected = HAND_PARSED["conj"]
+    assert root_relations(next(doc.sents), {}) == []
+    assert relations(doc)[0] == [expected]
+
+
+def test_triples_are_grouped_by_sentence():
+    doc = parsed(("ISRO", 1, "nsubj", "PROPN", "ISRO"), ("launched", 1, "ROOT", "VERB", "launch"),
+                 ("SCATSAT-1", 1, "dobj", "PROPN", "SCATSAT-1"), (".", 1, "punct", "PUNCT", "."),
+                 ("IMD", 5, "nsubj", "PROPN", "IMD"), ("uses", 5, "ROOT", "VERB", "use"),
+                 ("winds", 5, "dobj", "NOUN", "wind"))
+    assert doc_relations(doc) == {0: [("ISRO", "launch", "SCATSAT-1")], 4: [("IMD", "use", "winds")]}
+
+
+def test_unparsed_docs_have_no_relations():
+    assert doc_relations(spacy.blank("en")("ISRO launched SCATSAT-1")) == {}
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    if not spacy.util.is_package(MODEL_NAME):
+        pytest.skip(f"{MODEL_NAME} is not installed")
+    return load_nlp()
+
+
+@pytest.mark.parametrize("text, name, expected", [
+    ("ISRO launched SCATSAT-1 in 2016.", "svo", ("ISRO", "launch", "SCATSAT-1")),
+    ("ISRO built and launched INSAT-3D.", "conj", ("ISRO", "launch", "INSAT-3D")),
+    ("INSAT-3D was launched by ISRO.", "passive", ("ISRO", "launch", "INSAT-3D")),
+    ("SCATSAT-1 was launched from Sriharikota.", "passive_prep", ("SCATSAT-1", "launch from", "Sriharikota")),
+    ("Oceansat-3 passes over the Arabian Sea twice a day.", "prep", ("Oceansat-3", "pass over", "Arabian Sea")),
+    ("INSAT-3D provides data over the Indian Ocean.", "object_prep",
+     ("INSAT-3D", "provide data over", "Indian Ocean")),
+    ("MOSDAC distributes data from SCATSAT-1, which measures ocean winds.", "relcl",
+     ("SCATSAT-1", "measure", "ocean winds")),
+    ("ISRO, the space agency, operates MOSDAC.", "appos", ("ISRO", "be", "space agency")),
+])
+def test_pattern_on_parsed_sentence(nlp, text, name, expected):
+    triples, counts = relations(nlp(text))
+    assert expected in triples
+    assert counts[name] >= 1
@@ -0,0 +1,37 @@
+import matplotlib
+import networkx as nx
+
+from mosdac.render import RenderCache, render_graph
+
+
+def small_graph():
+    G = nx.DiGraph()
+    G.add_node("INSAT-3D", category="SATELLITE")
+    G.add_node("Bay of Bengal", category="OCEAN")
+    G.add_edge("INSAT-3D", "Bay of Bengal", label="observe", weight=1)
+    return G, {"INSAT-3D": (0.0, 0.0), "Bay of Bengal": (1.0, 1.0)}
+
+
+def test_rendering_leaves_rcparams_alone():
+    G, pos = small_graph()
+    before = dict(matplotlib.rcParams)
+    render_graph(G, pos, dpi=20)
+    assert dict(matplotlib.rcParams) == before
+
+
+def test_global_style_does_not_change_the_image():
+    G, pos = small_graph()
+    image = render_graph(G, pos, dpi=20)
+    with matplotlib.rc_context({
+        "font.size": 30, "font.family": "serif", "text.color": "red",
+        "axes.facecolor": "black", "figure.facecolor": "black", "legend.facecolor": "green",
+        "savefig.facecolor": "black", "savefig.bbox": "tight",
+    }):
+        assert render_graph(G, pos, dpi=20) == image
+
+
+def test_render_cache_hits_identical_graphs():
+    G, pos = small_graph()
+    cache = RenderCache()
+    assert cache.render(G, pos, dpi=20) is cache.render(G.copy(), dict(pos), dpi=20)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
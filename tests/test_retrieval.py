@@ -0,0 +1,81 @@
+import math
+
+import pytest
+
+from mosdac.kb_index import tokenize
+from mosdac.retrieval import B, K1, PassageIndex
+
+PASSAGES = [
+    ("INSAT-3D carries an Imager and a Sounder.", [("INSAT-3D", "carry", "Imager")]),
+    ("The Imager on INSAT-3D images the Bay of Bengal every half hour.", [("Imager", "image", "Bay of Bengal")]),
+    ("SCATSAT-1 measures ocean surface winds.", [("SCATSAT-1", "measure", "ocean surface winds")]),
+    ("Oceansat-3 monitors ocean colour over the Arabian Sea.", []),
+    ("MOSDAC distributes cyclone products from INSAT-3D and SCATSAT-1.", [("MOSDAC", "distribute", "cyclone products")]),
+]
+
+
+@pytest.fixture
+def index():
+    return PassageIndex(PASSAGES)
+
+
+def bm25(query, passages=PASSAGES):
+    """Textbook BM25 scores, for checking the sparse-matrix version."""
+    documents = [tokenize(text) for text, _ in passages]
+    average = sum(map(len, documents)) / len(documents)
+    scores = []
+    for document in documents:
+        score = 0.0
+        for term in set(tokenize(query)):
+            frequency = document.count(term)
+            containing = sum(term in other for other in documents)
+            if frequency:
+                idf = math.log(1 + (len(documents) - containing + 0.5) / (containing + 0.5))
+                score += idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * len(document) / average))
+        scores.append(score)
+    return scores
+
+
+@pytest.mark.parametrize("query", ["INSAT-3D Imager", "ocean winds", "cyclone products from SCATSAT-1"])
+def test_scores_are_bm25(index, query):
+    expected = bm25(query)
+    results = index.search(query, k=len(PASSAGES))
+    for score, sentence, _ in results:
+        row = [text for text, _ in PASSAGES].index(sentence)
+        assert score == pytest.approx(expected[row])
+    assert [score for score, _, _ in results] == pytest.approx(sorted((s for s in expected if s), reverse=True))
+
+
+def test_rarer_terms_rank_higher(index):
+    # "winds" is in one passage, "insat" and "3d" in three.
+    assert index.search("INSAT-3D winds")[0][1] == "SCATSAT-1 measures ocean surface winds."
+
+
+def test_top_k(index):
+    assert len(index.search("INSAT-3D")) == 3
+    assert len(index.search("INSAT-3D", k=1)) == 1
+    # Passages that share no term with the query are never padded in.
+    assert [sentence for _, sentence, _ in index.search("Arabian Sea", k=5)] == [PASSAGES[3][0]]
+
+
+def test_passages_come_with_their_triples(index):
+    score, sentence, triples = index.search("surface winds")[0]
+    assert score > 0
+    assert (sentence, triples) == (PASSAGES[2][0], (("SCATSAT-1", "measure", "ocean surface winds"),))
+
+
+def test_duplicate_passages_are_indexed_once():
+    index = PassageIndex(PASSAGES + PASSAGES[:2])
+    assert len(index) == len(PASSAGES)
+    assert len(index.search("Imager", k=5)) == 2
+
+
+@pytest.mark.parametrize("query", ["", "what is the", "Kalpana rainfall"])
+def test_no_results(index, query):
+    assert index.search(query) == []
+
+
+def test_empty_index():
+    index = PassageIndex([])
+    assert len(index) == 0
+    assert index.search("INSAT-3D") == []
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from mosdac.jobs import JobCancelled
+from mosdac.single_flight import FlightTimeout, SingleFlight
+
+
+def run_together(count, call):
+    results = [None] * count
+    errors = [None] * count
+
+    def target(index):
+        try:
+            results[index] = call(index)
+        except BaseException as error:
+            errors[index] = error
+
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_identical_calls_share_one_computation():
+    flight = SingleFlight(poll_seconds=0.01)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "INSAT-3D"
+
+    results, errors = run_together(5, lambda _: flight.run("probe", slow))
+    assert results == ["INSAT-3D"] * 5 and errors == [None] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"led": 1, "shared": 4, "timeouts": 0, "in_flight": 0}
+
+
+def test_errors_reach_every_waiting_caller():
+    flight = SingleFlight(poll_seconds=0.01)
+
+    def failing():
+        time.sleep(0.1)
+        raise ValueError("server down")
+
+    _, errors = run_together(3, lambda _: flight.run("probe", failing))
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_followers_are_counted_once_when_the_leader_is_cancelled():
+    flight = SingleFlight(poll_seconds=0.01, retry=(JobCancelled,))
+    runs = []
+
+    def compute(index):
+        def fn():
+            runs.append(index)
+            time.sleep(0.1)
+            if index == 0:
+                raise JobCancelled("leader recalled")
+            return index
+        return fn
+
+    results, errors = run_together(4, lambda index: flight.run("crawl", compute(index)))
+    assert isinstance(errors[0], JobCancelled)
+    # One follower took over; the others waited for it instead of for the cancelled leader.
+    assert len(runs) == 2 and len(set(results[1:])) == 1
+    stats = flight.stats()
+    assert stats["led"] == 2 and stats["shared"] == 3
+
+
+def test_waiting_gives_up_after_the_timeout():
+    flight = SingleFlight(poll_seconds=0.01)
+    release = threading.Event()
+    leader = threading.Thread(target=flight.run, args=("probe", release.wait))
+    leader.start()
+    time.sleep(0.05)
+    with pytest.raises(FlightTimeout):
+        flight.run("probe", lambda: None, timeout=0.1)
+    release.set()
+    leader.join()
+    assert flight.stats()["timeouts"] == 1